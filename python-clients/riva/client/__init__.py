@@ -4,6 +4,7 @@
 from riva.client.asr import (
     AudioChunkFileIterator,
     ASRService,
+    add_audio_buffer_specs_to_config,
     add_audio_file_specs_to_config,
     add_word_boosting_to_config,
     add_speaker_diarization_to_config,
@@ -14,9 +15,13 @@ from riva.client.asr import (
     add_endpoint_parameters_to_config,
     add_custom_configuration_to_config,
 )
+from riva.client.audio_buffer import AudioBuffer
 from riva.client.auth import Auth
+from riva.client.dnt import DNTDictionary
 from riva.client.nlp import (
+    CachingNLPService,
     NLPService,
+    TokenClassificationResults,
     extract_all_text_classes_and_confidences,
     extract_all_token_classification_predictions,
     extract_most_probable_text_class_and_confidence,
@@ -39,5 +44,17 @@ from riva.client.proto.riva_asr_pb2 import RecognitionConfig, StreamingRecogniti
 from riva.client.proto.riva_audio_pb2 import AudioEncoding
 from riva.client.proto.riva_nlp_pb2 import AnalyzeIntentOptions
 from riva.client.proto.riva_nmt_pb2 import StreamingTranslateSpeechToSpeechConfig, TranslationConfig, SynthesizeSpeechConfig, StreamingTranslateSpeechToTextConfig
-from riva.client.tts import SpeechSynthesisService
-from riva.client.nmt import NeuralMachineTranslationClient
+from riva.client.tts import CachingSpeechSynthesisService, SpeechSynthesisService, VoiceProfile
+from riva.client.nmt import (
+    CachingNeuralMachineTranslationClient,
+    IncrementalTranslationSession,
+    NeuralMachineTranslationClient,
+)
+from riva.client.document_translation import segment_document, translate_document, translate_documents
+from riva.client.speech_translation import (
+    AudioTee,
+    MultiTargetSpeechToText,
+    SpeechTranslationEvent,
+    SpeechTranslationPipeline,
+)
+from riva.client.multichannel import ChannelSegment, MultiChannelRecognizer
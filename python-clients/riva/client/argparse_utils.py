@@ -108,3 +108,41 @@ def add_connection_argparse_parameters(parser: argparse.ArgumentParser) -> argpa
     )
     parser.add_argument("--metadata", action='append', nargs='+', help="Send HTTP Header(s) to server")
     return parser
+
+
+def add_async_punctuation_argparse_parameters(parser: argparse.ArgumentParser) -> argparse.ArgumentParser:
+    parser.add_argument(
+        "--async-punctuation",
+        default=False,
+        action='store_true',
+        help="Punctuate final transcripts with a separate NLP request without delaying intermediate transcripts. "
+        "Use it instead of `--automatic-punctuation`.",
+    )
+    parser.add_argument(
+        "--punctuation-model",
+        help="A punctuation model for `--async-punctuation`. If this parameter is missing, then the server will try "
+        "to select a first available Punctuation & Capitalization model.",
+    )
+    parser.add_argument(
+        "--punctuation-latency-budget",
+        default=1.0,
+        type=float,
+        help="Maximum time in seconds a final transcript waits for punctuation. If punctuation is not ready in time, "
+        "then the raw transcript is printed.",
+    )
+    return parser
+
+
+def add_discovery_argparse_parameters(parser: argparse.ArgumentParser) -> argparse.ArgumentParser:
+    parser.add_argument(
+        "--capabilities-cache-dir",
+        help="A directory where available models and voices of a server are cached between runs. If this parameter "
+        "is missing, then they are requested from the server on every run.",
+    )
+    parser.add_argument(
+        "--capabilities-ttl",
+        default=3600.0,
+        type=float,
+        help="Time in seconds after which cached models and voices are requested from the server again.",
+    )
+    return parser
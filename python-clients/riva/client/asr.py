@@ -15,6 +15,7 @@ from grpc._channel import _MultiThreadedRendezvous
 import riva.client
 import riva.client.proto.riva_asr_pb2 as rasr
 import riva.client.proto.riva_asr_pb2_grpc as rasr_srv
+from riva.client.audio_buffer import AudioBuffer, to_audio_bytes
 from riva.client.auth import Auth
 
 
@@ -114,6 +115,15 @@ def add_audio_file_specs_to_config(
         inner_config.audio_channel_count = wav_parameters['nchannels']
 
 
+def add_audio_buffer_specs_to_config(
+    config: Union[rasr.StreamingRecognitionConfig, rasr.RecognitionConfig], audio: AudioBuffer
+) -> None:
+    inner_config: rasr.RecognitionConfig = config if isinstance(config, rasr.RecognitionConfig) else config.config
+    inner_config.encoding = riva.client.AudioEncoding.LINEAR_PCM
+    inner_config.sample_rate_hertz = audio.sample_rate_hz
+    inner_config.audio_channel_count = audio.nchannels
+
+
 def add_speaker_diarization_to_config(
     config: Union[rasr.RecognitionConfig],
     diarization_enable: bool,
@@ -340,11 +350,11 @@ def print_offline(response: rasr.RecognizeResponse) -> None:
 
 
 def streaming_request_generator(
-    audio_chunks: Iterable[bytes], streaming_config: rasr.StreamingRecognitionConfig
+    audio_chunks: Iterable[Union[bytes, AudioBuffer]], streaming_config: rasr.StreamingRecognitionConfig
 ) -> Generator[rasr.StreamingRecognizeRequest, None, None]:
     yield rasr.StreamingRecognizeRequest(streaming_config=streaming_config)
     for chunk in audio_chunks:
-        yield rasr.StreamingRecognizeRequest(audio_content=chunk)
+        yield rasr.StreamingRecognizeRequest(audio_content=to_audio_bytes(chunk))
 
 
 class ASRService:
@@ -361,7 +371,10 @@ class ASRService:
         self.stub = rasr_srv.RivaSpeechRecognitionStub(self.auth.channel)
 
     def streaming_response_generator(
-        self, audio_chunks: Iterable[bytes], streaming_config: rasr.StreamingRecognitionConfig
+        self,
+        audio_chunks: Union[Iterable[Union[bytes, AudioBuffer]], AudioBuffer],
+        streaming_config: rasr.StreamingRecognitionConfig,
+        chunk_n_frames: int = 1600,
     ) -> Generator[rasr.StreamingRecognizeResponse, None, None]:
         """
         Generates speech recognition responses for fragments of speech audio in :param:`audio_chunks`.
@@ -371,8 +384,9 @@ class ASRService:
         All available audio chunks will be sent to a server on first ``next()`` call.
 
         Args:
-            audio_chunks (:obj:`Iterable[bytes]`): an iterable object which contains raw audio fragments
-                of speech. For example, such raw audio can be obtained with
+            audio_chunks (:obj:`Union[Iterable[Union[bytes, riva.client.AudioBuffer]], riva.client.AudioBuffer]`): an
+                iterable object which contains raw audio fragments of speech. For example, such raw audio can be
+                obtained with
 
                 .. code-block:: python
 
@@ -380,6 +394,9 @@ class ASRService:
                     with wave.open(file_name, 'rb') as wav_f:
                         raw_audio = wav_f.readframes(n_frames)
 
+                If an :class:`riva.client.AudioBuffer` is passed, then it is sent in views of :param:`chunk_n_frames`
+                frames.
+
             streaming_config (:obj:`riva.client.proto.riva_asr_pb2.StreamingRecognitionConfig`): a config for streaming.
                 You may find description of config fields in message ``StreamingRecognitionConfig`` in
                 `common repo
@@ -392,6 +409,9 @@ class ASRService:
                     config = RecognitionConfig(enable_automatic_punctuation=True)
                     streaming_config = StreamingRecognitionConfig(config, interim_results=True)
 
+            chunk_n_frames (:obj:`int`, defaults to :obj:`1600`): a number of frames in one request if
+                :param:`audio_chunks` is an :class:`riva.client.AudioBuffer`.
+
         Yields:
             :obj:`riva.client.proto.riva_asr_pb2.StreamingRecognizeResponse`: responses for audio chunks in
             :param:`audio_chunks`. You may find description of response fields in declaration of
@@ -399,19 +419,22 @@ class ASRService:
             message `here
             <https://docs.nvidia.com/deeplearning/riva/user-guide/docs/reference/protos/protos.html#riva-proto-riva-asr-proto>`_.
         """
+        if isinstance(audio_chunks, AudioBuffer):
+            audio_chunks = audio_chunks.chunks(chunk_n_frames)
         generator = streaming_request_generator(audio_chunks, streaming_config)
         for response in self.stub.StreamingRecognize(generator, metadata=self.auth.get_auth_metadata()):
             yield response
 
     def offline_recognize(
-        self, audio_bytes: bytes, config: rasr.RecognitionConfig, future: bool = False
+        self, audio_bytes: Union[bytes, AudioBuffer], config: rasr.RecognitionConfig, future: bool = False
     ) -> Union[rasr.RecognizeResponse, _MultiThreadedRendezvous]:
         """
         Performs speech recognition for raw audio in :param:`audio_bytes`. This method is for processing of
         huge audio at once - not as it is being generated.
 
         Args:
-            audio_bytes (:obj:`bytes`): a raw audio. For example it can be obtained with
+            audio_bytes (:obj:`Union[bytes, riva.client.AudioBuffer]`): a raw audio. For example it can be obtained
+                with
 
                 .. code-block:: python
 
@@ -419,6 +442,9 @@ class ASRService:
                     with wave.open(file_name, 'rb') as wav_f:
                         raw_audio = wav_f.readframes(n_frames)
 
+                or with :meth:`riva.client.AudioBuffer.from_wav_file`. Format of an :class:`riva.client.AudioBuffer`
+                can be put into :param:`config` with :func:`riva.client.add_audio_buffer_specs_to_config`.
+
             config (:obj:`riva.client.proto.riva_asr_pb2.RecognitionConfig`): a config for offline speech recognition.
                 You may find description of config fields in message ``RecognitionConfig`` in
                 `common repo
@@ -440,6 +466,6 @@ class ASRService:
             If :param:`future` is :obj:`True`, then a future object is returned. You may retrieve a response from a
             future object by calling ``result()`` method.
         """
-        request = rasr.RecognizeRequest(config=config, audio=audio_bytes)
+        request = rasr.RecognizeRequest(config=config, audio=to_audio_bytes(audio_bytes))
         func = self.stub.Recognize.future if future else self.stub.Recognize
         return func(request, metadata=self.auth.get_auth_metadata())
@@ -0,0 +1,174 @@
+# SPDX-FileCopyrightText: Copyright (c) 2022 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Deque, Dict, Generator, Iterable, List, Tuple, Union
+
+import riva.client.proto.riva_asr_pb2 as rasr
+from riva.client.async_utils import STREAM_END, StreamFailure, put_until_stopped
+from riva.client.coalescing import RequestCoalescer
+
+_WAKE = object()
+
+
+class _PendingFinal:
+    __slots__ = ('response', 'futures', 'deadline', 'submitted')
+
+    def __init__(
+        self, response: rasr.StreamingRecognizeResponse, futures: List[Tuple[int, int, str, Future]], deadline: float
+    ) -> None:
+        self.response = response
+        self.futures = futures
+        self.deadline = deadline
+        self.submitted = time.monotonic()
+
+    def ready(self, now: float) -> bool:
+        return now >= self.deadline or all(f.done() for _, _, _, f in self.futures)
+
+
+class AsyncPunctuationStage:
+    """
+    Punctuates final transcripts of streaming speech recognition responses without blocking the response loop.
+
+    Use it with ``enable_automatic_punctuation=False`` in a recognition config. Transcripts of final results are
+    submitted to a :class:`riva.client.coalescing.RequestCoalescer`, e.g. one created with
+    :func:`riva.client.coalescing.punctuate_text_coalescer`. One stage (and one coalescer) can be shared by many
+    streams, so finals of concurrent streams are punctuated in common batches.
+
+    Responses with final results are yielded in the order they were received, when their punctuation is ready or when
+    :param:`latency_budget` seconds passed. In the latter case, or if punctuation failed, raw transcripts are kept.
+    Responses without final results are yielded as soon as they are received if no final is waiting for punctuation.
+    Otherwise only the latest of them is held until waiting finals are yielded, so interim results of an utterance are
+    never printed before the final of a previous utterance.
+
+    Responses are read ahead by a separate thread into a queue of up to :param:`max_queue_size` responses. The thread
+    stops reading when a generator returned by :meth:`process` is closed.
+
+    Args:
+        coalescer (:obj:`riva.client.coalescing.RequestCoalescer`): a coalescer which returns punctuated texts.
+        latency_budget (:obj:`float`, defaults to :obj:`1.0`): a maximum time in seconds a final result is delayed.
+        max_queue_size (:obj:`int`, defaults to :obj:`32`): a maximum number of responses read ahead.
+    """
+    def __init__(self, coalescer: RequestCoalescer, latency_budget: float = 1.0, max_queue_size: int = 32) -> None:
+        if max_queue_size < 1:
+            raise ValueError(f"Parameter `max_queue_size` has to be positive whereas `{max_queue_size}` was given.")
+        self.coalescer = coalescer
+        self.latency_budget = latency_budget
+        self.max_queue_size = max_queue_size
+        self._lock = threading.Lock()
+        self.n_punctuated = 0
+        self.n_fallbacks = 0
+        self.total_delay = 0.0
+
+    @property
+    def stats(self) -> Dict[str, Union[int, float]]:
+        n_finals = self.n_punctuated + self.n_fallbacks
+        return {
+            'n_punctuated': self.n_punctuated,
+            'n_fallbacks': self.n_fallbacks,
+            'mean_delay': self.total_delay / n_finals if n_finals else 0.0,
+        }
+
+    def process(
+        self, responses: Iterable[rasr.StreamingRecognizeResponse]
+    ) -> Generator[rasr.StreamingRecognizeResponse, None, None]:
+        """
+        Args:
+            responses (:obj:`Iterable[riva.client.proto.riva_asr_pb2.StreamingRecognizeResponse]`): responses, e.g.
+                returned by :meth:`riva.client.ASRService.streaming_response_generator`. They are read in a separate
+                thread.
+
+        Yields:
+            :obj:`riva.client.proto.riva_asr_pb2.StreamingRecognizeResponse`: responses with punctuated finals.
+        """
+        source: queue.Queue = queue.Queue(self.max_queue_size)
+        stop = threading.Event()
+        reader = threading.Thread(target=self._read, args=(responses, source, stop), daemon=True)
+        reader.start()
+        pending: Deque[_PendingFinal] = deque()
+        held_interim = None
+        finished = False
+        try:
+            while not finished or pending or held_interim is not None:
+                while pending and pending[0].ready(time.monotonic()):
+                    yield self._finish(pending.popleft())
+                if not pending and held_interim is not None:
+                    yield held_interim
+                    held_interim = None
+                if finished and not pending:
+                    break
+                try:
+                    item = source.get(timeout=max(0.0, pending[0].deadline - time.monotonic()) if pending else None)
+                except queue.Empty:
+                    continue
+                if item is _WAKE:
+                    continue
+                if item is STREAM_END:
+                    finished = True
+                elif isinstance(item, StreamFailure):
+                    raise item.error
+                elif any(result.is_final for result in item.results):
+                    # A final supersedes held interim results.
+                    held_interim = None
+                    pending.append(self._submit(item, source))
+                elif pending:
+                    held_interim = item
+                else:
+                    yield item
+        finally:
+            stop.set()
+
+    def _read(
+        self, responses: Iterable[rasr.StreamingRecognizeResponse], source: queue.Queue, stop: threading.Event
+    ) -> None:
+        try:
+            for response in responses:
+                if not put_until_stopped(source, response, stop):
+                    return
+            put_until_stopped(source, STREAM_END, stop)
+        except Exception as e:
+            put_until_stopped(source, StreamFailure(e), stop)
+
+    def _submit(self, response: rasr.StreamingRecognizeResponse, source: queue.Queue) -> _PendingFinal:
+        futures = []
+        for i, result in enumerate(response.results):
+            if not result.is_final:
+                continue
+            for j, alternative in enumerate(result.alternatives):
+                text = alternative.transcript.strip()
+                if text:
+                    future = self.coalescer.submit(text)
+                    future.add_done_callback(lambda _: self._wake(source))
+                    futures.append((i, j, alternative.transcript[len(alternative.transcript.rstrip()):], future))
+        return _PendingFinal(response, futures, time.monotonic() + self.latency_budget)
+
+    @staticmethod
+    def _wake(source: queue.Queue) -> None:
+        # Called on coalescer threads, which must not block. If the queue is full, then the consumer is not waiting
+        # and checks pending finals when it takes the next item.
+        try:
+            source.put_nowait(_WAKE)
+        except queue.Full:
+            pass
+
+    def _finish(self, pending: _PendingFinal) -> rasr.StreamingRecognizeResponse:
+        response = pending.response
+        punctuated = 0
+        if pending.futures:
+            response = rasr.StreamingRecognizeResponse()
+            response.CopyFrom(pending.response)
+            for i, j, trailing_whitespace, future in pending.futures:
+                if future.done() and future.exception() is None:
+                    response.results[i].alternatives[j].transcript = future.result() + trailing_whitespace
+                    punctuated += 1
+        with self._lock:
+            if punctuated == len(pending.futures):
+                self.n_punctuated += 1
+            else:
+                self.n_fallbacks += 1
+            self.total_delay += time.monotonic() - pending.submitted
+        return response
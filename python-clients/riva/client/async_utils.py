@@ -0,0 +1,166 @@
+# SPDX-FileCopyrightText: Copyright (c) 2022 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import queue
+import threading
+from typing import Any, Callable, Dict, Generator, Iterable, List, Optional, Tuple
+
+# A queue item which tells a consumer that a producer finished.
+STREAM_END = object()
+
+
+class StreamFailure:
+    """A queue item which tells a consumer that a producer failed with :attr:`error`."""
+    __slots__ = ('error',)
+
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
+
+
+def put_until_stopped(target: queue.Queue, item: Any, *stops: threading.Event) -> bool:
+    """
+    Puts :param:`item` into bounded queue :param:`target` waiting for free space until any of :param:`stops` is set.
+    Returns :obj:`False` if the item was not put because of a stop event, so a producer is never blocked on a queue
+    whose consumer is gone.
+    """
+    while not any(stop.is_set() for stop in stops):
+        try:
+            target.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def check_max_in_flight(max_in_flight: int, name: str = 'max_in_flight') -> None:
+    if not isinstance(max_in_flight, int) or max_in_flight < 1:
+        raise ValueError(f"Parameter `{name}` has to be a positive integer whereas `{name}={max_in_flight}` was given.")
+
+
+def ordered_async_results(
+    items: Iterable[Any],
+    submit: Callable[[Any], Any],
+    max_in_flight: int,
+    max_buffered_results: Optional[int] = None,
+    return_exceptions: bool = False,
+) -> Generator[Any, None, None]:
+    """
+    Submits a request for every element of :param:`items` keeping up to :param:`max_in_flight` requests in flight
+    and yields results in the order of :param:`items`.
+
+    Unlike waiting for a whole group of requests, a new request is submitted as soon as any request in flight
+    finishes, so one slow request does not leave a server idle. Results which are finished out of order are held
+    until all preceding results are yielded.
+
+    Args:
+        items (:obj:`Iterable[Any]`): inputs for requests. The iterable is consumed lazily.
+        submit (:obj:`Callable[[Any], Any]`): a function which starts a request for an element of :param:`items`
+            and returns a future object. The future object has to provide ``add_done_callback()`` and ``result()``
+            methods, e.g. a gRPC future returned by ``future=True`` service methods or
+            :class:`concurrent.futures.Future`.
+        max_in_flight (:obj:`int`): a maximum number of requests which are being processed simultaneously.
+        max_buffered_results (:obj:`int`, `optional`): a maximum number of finished results waiting for preceding
+            results. If the limit is reached, no new requests are submitted until the oldest result is yielded.
+            Defaults to :param:`max_in_flight`.
+        return_exceptions (:obj:`bool`, defaults to :obj:`False`): whether to yield an exception of a failed request
+            instead of raising it, so later requests are still processed.
+
+    Yields:
+        :obj:`Any`: results of futures in the order of :param:`items`. If a request failed, then its exception is
+        raised when the turn of its result comes, or yielded if :param:`return_exceptions` is :obj:`True`.
+    """
+    check_max_in_flight(max_in_flight)
+    if max_buffered_results is None:
+        max_buffered_results = max_in_flight
+    check_max_in_flight(max_buffered_results, 'max_buffered_results')
+    done_indices: queue.Queue = queue.Queue()
+    in_flight: Dict[int, Any] = {}
+    finished: Dict[int, Any] = {}
+    items_iter = iter(items)
+    exhausted = False
+    n_submitted, n_yielded = 0, 0
+    try:
+        while True:
+            while not exhausted and len(in_flight) < max_in_flight and len(finished) < max_buffered_results:
+                try:
+                    item = next(items_iter)
+                except StopIteration:
+                    exhausted = True
+                    break
+                future = submit(item)
+                in_flight[n_submitted] = future
+                future.add_done_callback(lambda _, i=n_submitted: done_indices.put(i))
+                n_submitted += 1
+            if n_yielded in finished:
+                future = finished.pop(n_yielded)
+                n_yielded += 1
+                if return_exceptions:
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = e
+                    yield result
+                else:
+                    yield future.result()
+                continue
+            if not in_flight:
+                return
+            i = done_indices.get()
+            finished[i] = in_flight.pop(i)
+    finally:
+        for future in in_flight.values():
+            future.cancel()
+
+
+def merge_iterables(
+    sources: List[Callable[[threading.Event], Iterable[Any]]], max_buffered_results: int = 64
+) -> Generator[Tuple[int, Any], None, None]:
+    """
+    Iterates every source on its own thread and yields ``(source_index, item)`` pairs in the order items are
+    produced, e.g. responses of several streaming requests merged into one stream.
+
+    Up to :param:`max_buffered_results` items wait to be yielded, so fast sources are held back when a consumer is
+    slow. When the generator is closed or a source fails, a stop event passed to every source is set and the
+    generator waits for all threads to finish, so a source has to stop soon after the event is set, e.g. by ending
+    a request stream.
+
+    Args:
+        sources (:obj:`List[Callable[[threading.Event], Iterable[Any]]]`): functions which receive a stop event and
+            return iterables.
+        max_buffered_results (:obj:`int`, defaults to :obj:`64`): a maximum number of items waiting to be yielded.
+
+    Yields:
+        :obj:`Tuple[int, Any]`: an index of a source in :param:`sources` and an item. If a source fails, then its
+        exception is raised.
+    """
+    check_max_in_flight(max_buffered_results, 'max_buffered_results')
+    stop = threading.Event()
+    results: queue.Queue = queue.Queue(max_buffered_results)
+
+    def run(index: int, source: Callable[[threading.Event], Iterable[Any]]) -> None:
+        try:
+            for item in source(stop):
+                if not put_until_stopped(results, (index, item), stop):
+                    return
+        except BaseException as e:
+            put_until_stopped(results, (index, StreamFailure(e)), stop)
+            return
+        put_until_stopped(results, (index, STREAM_END), stop)
+
+    threads = [threading.Thread(target=run, args=(i, source), daemon=True) for i, source in enumerate(sources)]
+    for thread in threads:
+        thread.start()
+    try:
+        n_done = 0
+        while n_done < len(threads):
+            index, item = results.get()
+            if item is STREAM_END:
+                n_done += 1
+            elif isinstance(item, StreamFailure):
+                raise item.error
+            else:
+                yield index, item
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
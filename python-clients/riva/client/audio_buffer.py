@@ -0,0 +1,172 @@
+# SPDX-FileCopyrightText: Copyright (c) 2022 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import io
+import os
+import struct
+import wave
+from pathlib import Path
+from typing import Any, Generator, List, Tuple, Union
+
+SAMPLE_WIDTH_DTYPES = {1: 'u1', 2: '<i2', 4: '<i4'}
+SAMPLE_WIDTH_FORMATS = {1: 'B', 2: 'h', 4: 'i'}
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
+
+def _wav_data_chunk(data: memoryview) -> Tuple[int, int]:
+    # Walks RIFF chunks after the 12 bytes of a RIFF header and returns an offset and a size of the `data` chunk. A
+    # chunk has an 8 byte header of an id and a little-endian size, and its contents are padded to an even size.
+    pos = 12
+    while pos + 8 <= len(data):
+        chunk_id = bytes(data[pos : pos + 4])
+        (size,) = struct.unpack_from('<I', data, pos + 4)
+        if chunk_id == b'data':
+            return pos + 8, min(size, len(data) - pos - 8)
+        pos += 8 + size + size % 2
+    raise wave.Error("WAV data has no `data` chunk.")
+
+
+class AudioBuffer:
+    """
+    Raw PCM audio with its format. Samples are not copied: an :class:`AudioBuffer` holds a :obj:`memoryview` of the
+    object it is created from, e.g. ``bytes`` of a TTS response, a ``bytearray`` or a NumPy array. Slices and chunks
+    are views of the same memory.
+
+    :meth:`to_numpy` returns a NumPy array over the same memory, so processing such as resampling, voice activity
+    detection or level computation runs without copies. The array is writable if the underlying object is writable,
+    e.g. after :meth:`copy`. NumPy is needed only for :meth:`to_numpy`.
+
+    Args:
+        data (:obj:`Union[bytes, bytearray, memoryview]`): samples as a C-contiguous buffer of interleaved frames.
+        sample_rate_hz (:obj:`int`): a number of frames per second.
+        nchannels (:obj:`int`, defaults to :obj:`1`): a number of channels.
+        sampwidth (:obj:`int`, defaults to :obj:`2`): a number of bytes in a sample.
+    """
+    __slots__ = ('_source', 'data', 'sample_rate_hz', 'nchannels', 'sampwidth')
+
+    def __init__(self, data: Any, sample_rate_hz: int, nchannels: int = 1, sampwidth: int = 2) -> None:
+        self._source = data
+        self.data = memoryview(data).cast('B')
+        self.sample_rate_hz = sample_rate_hz
+        self.nchannels = nchannels
+        self.sampwidth = sampwidth
+        if len(self.data) % self.frame_size:
+            raise ValueError(
+                f"A number of bytes in audio data has to be a multiple of a frame size {self.frame_size} whereas "
+                f"{len(self.data)} bytes were given."
+            )
+
+    @classmethod
+    def from_wav_bytes(cls, wav_data: BytesLike) -> 'AudioBuffer':
+        """Returns a view of samples of WAV file contents :param:`wav_data`."""
+        view = memoryview(wav_data).cast('B')
+        with wave.open(io.BytesIO(wav_data), 'rb') as wf:
+            offset, size = _wav_data_chunk(view)
+            frame_size = wf.getsampwidth() * wf.getnchannels()
+            view = view[offset : offset + size - size % frame_size]
+            return cls(view, wf.getframerate(), wf.getnchannels(), wf.getsampwidth())
+
+    @classmethod
+    def from_wav_file(cls, path: Union[str, os.PathLike]) -> 'AudioBuffer':
+        """Reads a WAV file in one read and returns a view of its samples."""
+        return cls.from_wav_bytes(Path(path).expanduser().read_bytes())
+
+    @classmethod
+    def from_numpy(cls, array: Any, sample_rate_hz: int) -> 'AudioBuffer':
+        """Returns a view of a C-contiguous NumPy array of shape ``(n_frames,)`` or ``(n_frames, n_channels)``."""
+        nchannels = 1 if array.ndim == 1 else array.shape[1]
+        return cls(array, sample_rate_hz, nchannels, array.itemsize)
+
+    @property
+    def frame_size(self) -> int:
+        return self.sampwidth * self.nchannels
+
+    @property
+    def n_frames(self) -> int:
+        return len(self.data) // self.frame_size
+
+    @property
+    def duration(self) -> float:
+        return self.n_frames / self.sample_rate_hz
+
+    def __len__(self) -> int:
+        return self.n_frames
+
+    def __getitem__(self, frames: slice) -> 'AudioBuffer':
+        """Returns a view of frames :param:`frames`."""
+        if not isinstance(frames, slice) or frames.step not in (None, 1):
+            raise TypeError("Only slices of frames with step 1 are supported.")
+        start, stop, _ = frames.indices(self.n_frames)
+        return AudioBuffer(
+            self.data[start * self.frame_size : max(start, stop) * self.frame_size],
+            self.sample_rate_hz,
+            self.nchannels,
+            self.sampwidth,
+        )
+
+    def chunks(self, chunk_n_frames: int) -> Generator['AudioBuffer', None, None]:
+        """Yields views of consecutive chunks of :param:`chunk_n_frames` frames."""
+        if chunk_n_frames < 1:
+            raise ValueError(f"Parameter `chunk_n_frames` has to be positive whereas `{chunk_n_frames}` was given.")
+        for start in range(0, self.n_frames, chunk_n_frames):
+            yield self[start : start + chunk_n_frames]
+
+    def tobytes(self) -> bytes:
+        """Returns samples as :obj:`bytes`. If the buffer is a whole ``bytes`` object, then the object is returned
+        without copying."""
+        if isinstance(self._source, bytes) and len(self._source) == len(self.data):
+            return self._source
+        return self.data.tobytes()
+
+    def __bytes__(self) -> bytes:
+        return self.tobytes()
+
+    def copy(self) -> 'AudioBuffer':
+        """Returns a buffer with a writable copy of samples."""
+        return AudioBuffer(bytearray(self.data), self.sample_rate_hz, self.nchannels, self.sampwidth)
+
+    def to_numpy(self) -> Any:
+        """Returns a NumPy array of shape ``(n_frames,)`` for mono audio or ``(n_frames, n_channels)`` over the same
+        memory."""
+        import numpy as np
+
+        if self.sampwidth not in SAMPLE_WIDTH_DTYPES:
+            raise ValueError(
+                f"Sample width {self.sampwidth} is not supported. Supported sample widths are "
+                f"{list(SAMPLE_WIDTH_DTYPES)}."
+            )
+        array = np.frombuffer(self.data, dtype=SAMPLE_WIDTH_DTYPES[self.sampwidth])
+        return array if self.nchannels == 1 else array.reshape(-1, self.nchannels)
+
+    def split_channels(self) -> List['AudioBuffer']:
+        """
+        Returns one mono buffer per channel. Channels are deinterleaved in one vectorized copy with NumPy if it is
+        installed, or with strided :obj:`memoryview` copies otherwise. Mono audio is returned without copying.
+        """
+        if self.nchannels == 1:
+            return [self]
+        if self.sampwidth not in SAMPLE_WIDTH_FORMATS:
+            raise ValueError(
+                f"Sample width {self.sampwidth} is not supported. Supported sample widths are "
+                f"{list(SAMPLE_WIDTH_FORMATS)}."
+            )
+        try:
+            import numpy as np
+        except ImportError:
+            samples = self.data.cast(SAMPLE_WIDTH_FORMATS[self.sampwidth])
+            channels = [samples[i :: self.nchannels].tobytes() for i in range(self.nchannels)]
+        else:
+            channels = np.ascontiguousarray(self.to_numpy().T)
+        return [AudioBuffer(channel, self.sample_rate_hz, 1, self.sampwidth) for channel in channels]
+
+    def __repr__(self) -> str:
+        return (
+            f"AudioBuffer(n_frames={self.n_frames}, sample_rate_hz={self.sample_rate_hz}, "
+            f"nchannels={self.nchannels}, sampwidth={self.sampwidth})"
+        )
+
+
+def to_audio_bytes(audio: Union[bytes, AudioBuffer]) -> bytes:
+    """Returns raw audio of :param:`audio` as :obj:`bytes` which can be put into a request."""
+    return audio.tobytes() if isinstance(audio, AudioBuffer) else audio
@@ -1,30 +1,83 @@
 # SPDX-FileCopyrightText: Copyright (c) 2022 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
 # SPDX-License-Identifier: MIT
 
-import queue
-from typing import Dict, Union, Optional
+import time
+from typing import Dict, Optional, Tuple, Union
 
 import pyaudio
 
+from riva.client.capture import CaptureBuffer
+from riva.client.playback import PlaybackEngine
+
 
 class MicrophoneStream:
-    """Opens a recording stream as responses yielding the audio chunks."""
+    """
+    Opens a recording stream and yields recorded audio chunks.
+
+    Recorded audio is kept in a preallocated :class:`riva.client.capture.CaptureBuffer` holding up to
+    :param:`buffer_seconds` of audio, so memory use is bounded when a consumer stalls. A chunk contains at least
+    :param:`min_chunk_seconds` and at most :param:`max_chunk_seconds` of audio. If the buffer is full, then
+    :param:`overflow` decides what happens: ``"drop_oldest"`` drops the oldest audio, ``"block"`` blocks recording, and
+    ``"error"`` makes iteration raise :obj:`RuntimeError`. Overruns and dropped audio are counted in :attr:`stats`.
+
+    Note that defaults differ from earlier versions, which kept all recorded audio in an unbounded queue and returned
+    everything queued since the previous read as one chunk. Now at most 5 seconds of audio are buffered, the oldest
+    audio is dropped if a consumer falls further behind, and a chunk holds at most 0.5 seconds of audio. To never drop
+    audio in the client, pass ``overflow="block"`` and :param:`buffer_seconds` covering the longest expected stall of
+    a consumer.
+
+    A new buffer is created every time the stream is entered, so a stream can be entered again after it is closed.
+
+    A capture time of the first frame of the last yielded chunk is available in :attr:`last_capture_time`, and
+    :meth:`read_chunk` returns a chunk together with its capture time. Capture times are :func:`time.monotonic`
+    seconds.
+
+    Args:
+        rate (:obj:`int`): a number of frames per second.
+        chunk (:obj:`int`): a number of frames a device delivers at once.
+        device (:obj:`int`, `optional`): an index of an input device.
+        channels (:obj:`int`, defaults to :obj:`1`): a number of recorded channels. Chunks contain interleaved
+            frames, which can be split with :class:`riva.client.MultiChannelRecognizer`.
+        buffer_seconds, max_chunk_seconds, min_chunk_seconds, overflow: same as in
+            :class:`riva.client.capture.CaptureBuffer`.
+    """
 
-    def __init__(self, rate: int, chunk: int, device: int = None) -> None:
+    def __init__(
+        self,
+        rate: int,
+        chunk: int,
+        device: int = None,
+        channels: int = 1,
+        buffer_seconds: float = 5.0,
+        max_chunk_seconds: float = 0.5,
+        min_chunk_seconds: float = 0.0,
+        overflow: str = 'drop_oldest',
+    ) -> None:
         self._rate = rate
         self._chunk = chunk
         self._device = device
-
-        # Create a thread-safe buffer of audio data
-        self._buff = queue.Queue()
+        self._channels = channels
+        self._buffer_args = (buffer_seconds, max_chunk_seconds, min_chunk_seconds, overflow)
+        # Parameters are validated when a stream is created, and statistics are available before it is entered.
+        self._buff = self._new_buffer()
+        self.last_capture_time: Optional[float] = None
         self.closed = True
 
+    @property
+    def stats(self) -> Dict[str, Union[int, float]]:
+        return self._buff.stats
+
+    def _new_buffer(self) -> CaptureBuffer:
+        return CaptureBuffer(2, self._channels, self._rate, *self._buffer_args)
+
     def __enter__(self):
+        self._buff = self._new_buffer()
+        self.last_capture_time = None
         self._audio_interface = pyaudio.PyAudio()
         self._audio_stream = self._audio_interface.open(
             format=pyaudio.paInt16,
             input_device_index=self._device,
-            channels=1,
+            channels=self._channels,
             rate=self._rate,
             input=True,
             frames_per_buffer=self._chunk,
@@ -36,12 +89,12 @@ class MicrophoneStream:
         return self
 
     def close(self) -> None:
+        # Closing the buffer first wakes up a consumer, so that the client's streaming_recognize method will not block
+        # the process termination, and a recording callback blocked on a full buffer, which `stop_stream` waits for.
+        self._buff.close()
         self._audio_stream.stop_stream()
         self._audio_stream.close()
         self.closed = True
-        # Signal the responses to terminate so that the client's
-        # streaming_recognize method will not block the process termination.
-        self._buff.put(None)
         self._audio_interface.terminate()
 
     def __exit__(self, type, value, traceback):
@@ -49,27 +102,21 @@ class MicrophoneStream:
 
     def _fill_buffer(self, in_data, frame_count, time_info, status_flags):
         """Continuously collect data from the audio stream into the buffer."""
-        self._buff.put(in_data)
+        self._buff.write(in_data, time.monotonic() - frame_count / self._rate)
         return None, pyaudio.paContinue
 
-    def __next__(self) -> bytes:
+    def read_chunk(self) -> Optional[Tuple[bytes, float]]:
+        """Returns a chunk of audio and a capture time of its first frame, or :obj:`None` if the stream is closed."""
         if self.closed:
-            raise StopIteration
-        chunk = self._buff.get()
+            return None
+        return self._buff.read()
+
+    def __next__(self) -> bytes:
+        chunk = self.read_chunk()
         if chunk is None:
             raise StopIteration
-        data = [chunk]
-
-        while True:
-            try:
-                chunk = self._buff.get(block=False)
-                if chunk is None:
-                    assert not self.closed
-                data.append(chunk)
-            except queue.Empty:
-                break
-
-        return b''.join(data)
+        data, self.last_capture_time = chunk
+        return data
 
     def __iter__(self):
         return self
@@ -114,6 +161,38 @@ def list_input_devices() -> None:
     p.terminate()
 
 
+class PyAudioSink:
+    """An output audio device for :class:`riva.client.playback.PlaybackEngine`."""
+    def __init__(
+        self, output_device_index: Optional[int], sampwidth: int, nchannels: int, framerate: int,
+    ) -> None:
+        self.pa = pyaudio.PyAudio()
+        self.stream = self.pa.open(
+            output_device_index=output_device_index,
+            format=self.pa.get_format_from_width(sampwidth),
+            channels=nchannels,
+            rate=framerate,
+            output=True,
+        )
+
+    def write(self, data: bytes) -> None:
+        self.stream.write(data)
+
+    def close(self) -> None:
+        self.stream.close()
+        self.pa.terminate()
+
+
+def open_playback(
+    output_device_index: Optional[int], sampwidth: int, nchannels: int, framerate: int, **kwargs
+) -> PlaybackEngine:
+    """Returns a :class:`riva.client.playback.PlaybackEngine` playing to an output device. Keyword arguments are
+    passed to :class:`riva.client.playback.PlaybackEngine`."""
+    return PlaybackEngine(
+        PyAudioSink(output_device_index, sampwidth, nchannels, framerate), sampwidth, nchannels, framerate, **kwargs
+    )
+
+
 class SoundCallBack:
     def __init__(
         self, output_device_index: Optional[int], sampwidth: int, nchannels: int, framerate: int,
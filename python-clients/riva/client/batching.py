@@ -0,0 +1,128 @@
+# SPDX-FileCopyrightText: Copyright (c) 2022 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+from typing import Any, Dict, Generator, List, Optional, Sequence
+
+LENGTH_UNITS = ['token', 'char']
+
+
+def text_length(text: str, length_unit: str = 'token') -> int:
+    if length_unit == 'token':
+        return len(text.split())
+    if length_unit == 'char':
+        return len(text)
+    raise ValueError(f"Not allowed value '{length_unit}' of parameter `length_unit`. Allowed values are {LENGTH_UNITS}")
+
+
+def padded_length(lengths: Sequence[int]) -> int:
+    """Returns a number of tokens in a batch after padding all elements to the longest element."""
+    return len(lengths) * max(lengths) if lengths else 0
+
+
+class BatchPlan:
+    """
+    A partition of inputs into batches. Batches contain indices of inputs. Results obtained for batches in plan order
+    can be put back into input order with :meth:`restore_order`.
+    """
+    def __init__(self, batches: List[List[int]], lengths: List[int], max_batch_size: int) -> None:
+        self.batches = batches
+        self.lengths = lengths
+        self.max_batch_size = max_batch_size
+
+    def __len__(self) -> int:
+        return len(self.batches)
+
+    def batch_inputs(self, inputs: Sequence[Any]) -> Generator[List[Any], None, None]:
+        for batch in self.batches:
+            yield [inputs[i] for i in batch]
+
+    def restore_order(self, results: Sequence[Any]) -> List[Any]:
+        """
+        Args:
+            results (:obj:`Sequence[Any]`): one result per input in the order of concatenated :attr:`batches`.
+
+        Returns:
+            :obj:`List[Any]`: results in the order of inputs.
+        """
+        restored = [None] * len(self.lengths)
+        pos = 0
+        for batch in self.batches:
+            for i in batch:
+                restored[i] = results[pos]
+                pos += 1
+        if pos != len(results):
+            raise ValueError(f"Expected {pos} results whereas {len(results)} results were given.")
+        return restored
+
+    @property
+    def padded_tokens(self) -> int:
+        return sum(padded_length([self.lengths[i] for i in batch]) for batch in self.batches)
+
+    @property
+    def naive_padded_tokens(self) -> int:
+        """A number of padded tokens if inputs were cut into fixed-size slices in input order."""
+        return sum(
+            padded_length(self.lengths[i : i + self.max_batch_size])
+            for i in range(0, len(self.lengths), self.max_batch_size)
+        )
+
+    def padding_stats(self) -> Dict[str, int]:
+        n_tokens = sum(self.lengths)
+        return {
+            'tokens': n_tokens,
+            'padding': self.padded_tokens - n_tokens,
+            'naive_padding': self.naive_padded_tokens - n_tokens,
+            'padding_saved': self.naive_padded_tokens - self.padded_tokens,
+        }
+
+
+def plan_length_bucketed_batches(
+    texts: Sequence[str],
+    max_batch_size: int,
+    max_batch_tokens: Optional[int] = None,
+    lookahead: Optional[int] = None,
+    length_unit: str = 'token',
+) -> BatchPlan:
+    """
+    Splits :param:`texts` into batches of texts with similar lengths so that a server spends less time on padding.
+
+    Texts are sorted by length inside consecutive windows of :param:`lookahead` texts, so texts far apart in
+    the input never get into one batch and results for the beginning of a long input can be obtained early.
+    Sorted texts are cut into batches which contain at most :param:`max_batch_size` texts and at most
+    :param:`max_batch_tokens` tokens after padding. A text longer than :param:`max_batch_tokens` forms a batch
+    of its own.
+
+    Args:
+        texts (:obj:`Sequence[str]`): input texts.
+        max_batch_size (:obj:`int`): a maximum number of texts in a batch.
+        max_batch_tokens (:obj:`int`, `optional`): a maximum number of tokens in a padded batch. If :obj:`None`,
+            then batches are limited only by :param:`max_batch_size`.
+        lookahead (:obj:`int`, `optional`): a number of texts sorted together. If :obj:`None`, then all
+            :param:`texts` are sorted together.
+        length_unit (:obj:`str`, defaults to :obj:`"token"`): :obj:`"token"` for a number of whitespace separated
+            tokens or :obj:`"char"` for a number of characters.
+
+    Returns:
+        :obj:`BatchPlan`: batches of indices of :param:`texts`.
+    """
+    if not isinstance(max_batch_size, int) or max_batch_size < 1:
+        raise ValueError(f"Parameter `max_batch_size` has to be a positive integer whereas `{max_batch_size}` was given.")
+    lengths = [text_length(text, length_unit) for text in texts]
+    if lookahead is None or lookahead < 1:
+        lookahead = max(len(texts), 1)
+    batches = []
+    for start in range(0, len(texts), lookahead):
+        window = sorted(range(start, min(start + lookahead, len(texts))), key=lambda i: lengths[i])
+        batch: List[int] = []
+        for i in window:
+            # Lengths grow inside a window, so the current text is the longest one in the batch.
+            if batch and (
+                len(batch) == max_batch_size
+                or max_batch_tokens is not None and (len(batch) + 1) * lengths[i] > max_batch_tokens
+            ):
+                batches.append(batch)
+                batch = []
+            batch.append(i)
+        if batch:
+            batches.append(batch)
+    return BatchPlan(batches, lengths, max_batch_size)
@@ -0,0 +1,446 @@
+# SPDX-FileCopyrightText: Copyright (c) 2022 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import mmap
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple, Union
+
+MISSING = object()
+
+
+class CacheStats:
+    """Thread-safe hit and miss counters of a cache."""
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.deduplicated = 0
+
+    def add(self, memory_hits: int = 0, disk_hits: int = 0, misses: int = 0, deduplicated: int = 0) -> None:
+        with self._lock:
+            self.memory_hits += memory_hits
+            self.disk_hits += disk_hits
+            self.misses += misses
+            self.deduplicated += deduplicated
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def as_dict(self) -> Dict[str, Union[int, float]]:
+        return {
+            'hits': self.hits,
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'deduplicated': self.deduplicated,
+            'hit_rate': self.hit_rate,
+        }
+
+
+class LRUCache:
+    """
+    A thread-safe in-memory cache which evicts least recently used entries when there are more than
+    :param:`max_entries` entries or when total size of values exceeds :param:`max_bytes`, and treats entries older
+    than :param:`ttl` seconds as missing. Sizes of values are computed with :param:`size_of`. If :param:`max_entries`
+    is :obj:`None`, then a number of entries is not limited.
+    """
+    def __init__(
+        self,
+        max_entries: Optional[int] = 10000,
+        ttl: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        size_of: Callable[[Any], int] = len,
+    ) -> None:
+        if max_entries is not None and max_entries < 1:
+            raise ValueError(f"Parameter `max_entries` has to be positive whereas `max_entries={max_entries}` was given.")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.size_of = size_of
+        self.n_bytes = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any:
+        """Returns a value for :param:`key` or :data:`MISSING`."""
+        with self._lock:
+            entry = self._entries.get(key, MISSING)
+            if entry is MISSING:
+                return MISSING
+            expires_at, value, size = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._entries[key]
+                self.n_bytes -= size
+                return MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any, age: float = 0.0) -> None:
+        """Adds :param:`value` for :param:`key`. An entry written :param:`age` seconds ago expires sooner."""
+        expires_at = None if self.ttl is None else time.monotonic() + self.ttl - age
+        size = 0 if self.max_bytes is None else self.size_of(value)
+        with self._lock:
+            old_entry = self._entries.pop(key, None)
+            if old_entry is not None:
+                self.n_bytes -= old_entry[2]
+            self._entries[key] = (expires_at, value, size)
+            self.n_bytes += size
+            # The newest entry is kept even if it alone exceeds `max_bytes`.
+            while (self.max_entries is not None and len(self._entries) > self.max_entries) or (
+                self.max_bytes is not None and self.n_bytes > self.max_bytes and len(self._entries) > 1
+            ):
+                self.n_bytes -= self._entries.popitem(last=False)[1][2]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.n_bytes = 0
+
+
+class SqliteCache:
+    """
+    A persistent cache of :obj:`bytes` values stored in a SQLite database. Entries older than :param:`ttl` seconds
+    are treated as missing. Entries are evicted in least recently used order when there are more than
+    :param:`max_entries` entries. Access times of hits are kept in memory and written in one transaction by the next
+    :meth:`put`, by :meth:`close`, or when :param:`access_batch_size` of them are collected, so a hit does not write to
+    the database.
+    """
+    def __init__(
+        self,
+        path: Union[str, os.PathLike],
+        ttl: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        table: str = 'cache',
+        access_batch_size: int = 256,
+    ) -> None:
+        if access_batch_size < 1:
+            raise ValueError(
+                f"Parameter `access_batch_size` has to be positive whereas `access_batch_size={access_batch_size}` "
+                f"was given."
+            )
+        self.path = Path(path).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.table = table
+        self.access_batch_size = access_batch_size
+        self._accessed: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} "
+                f"(key TEXT PRIMARY KEY, value BLOB, created REAL, accessed REAL)"
+            )
+
+    def get(self, key: str) -> Any:
+        """Returns a value for :param:`key` or :data:`MISSING`."""
+        return self.get_with_age(key)[0]
+
+    def get_with_age(self, key: str) -> Tuple[Any, Optional[float]]:
+        """Returns a value for :param:`key` or :data:`MISSING` and a number of seconds since the value was written."""
+        now = time.time()
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                f"SELECT value, created FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return MISSING, None
+            value, created = row
+            if self.ttl is not None and created + self.ttl < now:
+                self._connection.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self._accessed.pop(key, None)
+                return MISSING, None
+            self._accessed[key] = now
+            if len(self._accessed) >= self.access_batch_size:
+                self._write_access_times()
+            return value, max(now - created, 0.0)
+
+    def _write_access_times(self) -> None:
+        # Has to be called with `_lock` held inside a transaction.
+        if self._accessed:
+            self._connection.executemany(
+                f"UPDATE {self.table} SET accessed = ? WHERE key = ?",
+                [(accessed, key) for key, accessed in self._accessed.items()],
+            )
+            self._accessed.clear()
+
+    def put(self, key: str, value: bytes) -> None:
+        now = time.time()
+        with self._lock, self._connection:
+            self._accessed.pop(key, None)
+            self._write_access_times()
+            self._connection.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            if self.max_entries is not None:
+                self._connection.execute(
+                    f"DELETE FROM {self.table} WHERE key IN (SELECT key FROM {self.table} ORDER BY accessed DESC "
+                    f"LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            with self._connection:
+                self._write_access_times()
+            self._connection.close()
+
+
+class MmapFileCache:
+    """
+    A persistent cache of :obj:`bytes` values stored one per file in :param:`directory`. Values are read through
+    read-only memory maps, so a hit does not copy a value into a process buffer until it is used. Least recently used
+    files are deleted when total size of values exceeds :param:`max_bytes`. Access order is kept in file modification
+    times, so it survives restarts.
+
+    Up to :param:`max_open_maps` memory maps of recently read values are kept open and are shared by hits. A map is
+    closed when its value is evicted, replaced or pushed out by other maps, or when the cache is closed. A map which
+    is still viewed by a caller is closed when the last view is released.
+
+    Keys have to consist of letters, digits, ``_`` and ``-``, e.g. hex digests.
+    """
+    def __init__(
+        self, directory: Union[str, os.PathLike], max_bytes: Optional[int] = None, max_open_maps: int = 64
+    ) -> None:
+        if max_open_maps < 1:
+            raise ValueError(
+                f"Parameter `max_open_maps` has to be positive whereas `max_open_maps={max_open_maps}` was given."
+            )
+        self.directory = Path(directory).expanduser()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_open_maps = max_open_maps
+        self.n_bytes = 0
+        self._lock = threading.Lock()
+        self._sizes: OrderedDict = OrderedDict()
+        self._maps: OrderedDict = OrderedDict()
+        files = [p for p in self.directory.glob('*/*') if p.is_file() and not p.name.endswith('.tmp')]
+        for path, stat in sorted(((p, p.stat()) for p in files), key=lambda x: x[1].st_mtime):
+            self._sizes[path.name] = stat.st_size
+            self.n_bytes += stat.st_size
+
+    def _path(self, key: str) -> Path:
+        if not key or not key.replace('_', '').replace('-', '').isalnum():
+            raise ValueError(f"Not allowed cache key '{key}'. A key has to consist of letters, digits, '_' and '-'.")
+        return self.directory / key[:2] / key
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+    def get(self, key: str) -> Any:
+        """Returns a read-only :obj:`memoryview` of a memory-mapped value for :param:`key` or :data:`MISSING`."""
+        path = self._path(key)
+        with self._lock:
+            if key not in self._sizes:
+                return MISSING
+            try:
+                os.utime(path)
+                if not self._sizes[key]:
+                    value = memoryview(b'')
+                elif key in self._maps:
+                    self._maps.move_to_end(key)
+                    value = memoryview(self._maps[key])
+                else:
+                    with path.open('rb') as f:
+                        self._maps[key] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    value = memoryview(self._maps[key])
+                    while len(self._maps) > self.max_open_maps:
+                        self._close_map(next(iter(self._maps)))
+            except (OSError, ValueError):
+                self.n_bytes -= self._sizes.pop(key)
+                self._close_map(key)
+                return MISSING
+            self._sizes.move_to_end(key)
+            return value
+
+    def get_with_age(self, key: str) -> Tuple[Any, Optional[float]]:
+        """Same as :meth:`get` with an unknown age of a value. Files keep access times, not write times."""
+        return self.get(key), None
+
+    def put(self, key: str, value: bytes) -> None:
+        path = self._path(key)
+        with self._lock:
+            path.parent.mkdir(exist_ok=True)
+            tmp_path = path.with_name(path.name + '.tmp')
+            tmp_path.write_bytes(value)
+            os.replace(tmp_path, path)
+            self._close_map(key)
+            self.n_bytes += len(value) - self._sizes.pop(key, 0)
+            self._sizes[key] = len(value)
+            while self.max_bytes is not None and self.n_bytes > self.max_bytes and len(self._sizes) > 1:
+                old_key, size = self._sizes.popitem(last=False)
+                self.n_bytes -= size
+                self._close_map(old_key)
+                try:
+                    self._path(old_key).unlink()
+                except OSError:
+                    pass
+
+    def close(self) -> None:
+        with self._lock:
+            for key in list(self._maps):
+                self._close_map(key)
+
+    def _close_map(self, key: str) -> None:
+        map_ = self._maps.pop(key, None)
+        if map_ is not None:
+            try:
+                map_.close()
+            except BufferError:
+                # A caller still holds a view. The map is closed when the view is released.
+                pass
+
+
+class TieredCache:
+    """
+    A cache with an in-memory tier and an optional persistent tier. Values found only in the persistent tier are
+    copied to the in-memory tier unless :param:`promote` is :obj:`False`, e.g. when the persistent tier returns
+    memory-mapped values which need not be held in memory.
+
+    Args:
+        memory (:obj:`LRUCache`, `optional`): an in-memory tier. Defaults to :obj:`LRUCache()`.
+        disk (:obj:`Union[SqliteCache, MmapFileCache]`, `optional`): a persistent tier.
+        serialize (:obj:`Callable[[Any], bytes]`, `optional`): a function converting values to bytes for
+            :param:`disk`. Defaults to identity.
+        deserialize (:obj:`Callable[[bytes], Any]`, `optional`): a function inverse to :param:`serialize`.
+        promote (:obj:`bool`, defaults to :obj:`True`): whether to copy persistent tier hits to :param:`memory`.
+    """
+    def __init__(
+        self,
+        memory: Optional[LRUCache] = None,
+        disk: Optional[Union[SqliteCache, MmapFileCache]] = None,
+        serialize: Optional[Callable[[Any], bytes]] = None,
+        deserialize: Optional[Callable[[bytes], Any]] = None,
+        promote: bool = True,
+    ) -> None:
+        self.memory = LRUCache() if memory is None else memory
+        self.disk = disk
+        self.serialize = (lambda x: x) if serialize is None else serialize
+        self.deserialize = (lambda x: x) if deserialize is None else deserialize
+        self.promote = promote
+        self.stats = CacheStats()
+
+    def get(self, key: str) -> Any:
+        """Returns a value for :param:`key` or :data:`MISSING`. Updates :attr:`stats`."""
+        value = self.memory.get(key)
+        if value is not MISSING:
+            self.stats.add(memory_hits=1)
+            return value
+        if self.disk is not None:
+            data, age = self.disk.get_with_age(key)
+            if data is not MISSING:
+                value = self.deserialize(data)
+                if self.promote:
+                    # A promoted entry expires when it would have expired had it stayed in memory since it was written.
+                    self.memory.put(key, value, age or 0.0)
+                self.stats.add(disk_hits=1)
+                return value
+        self.stats.add(misses=1)
+        return MISSING
+
+    def put(self, key: str, value: Any) -> None:
+        self.memory.put(key, value)
+        if self.disk is not None:
+            self.disk.put(key, self.serialize(value))
+
+    def close(self) -> None:
+        if self.disk is not None:
+            self.disk.close()
+
+
+def cached_batch_call(
+    cache: TieredCache,
+    keys: List[str],
+    inputs: List[Any],
+    request_func: Callable[[List[Any], bool], Any],
+    split_response: Callable[[Any], List[Any]],
+    build_response: Callable[[List[Any]], Any],
+    future: bool,
+) -> Any:
+    """
+    Looks up a result for every element of :param:`inputs` in :param:`cache` and sends only inputs which are missing
+    in the cache to a server. Every distinct key is sent once even if it repeats in :param:`keys`.
+
+    Args:
+        cache (:obj:`TieredCache`): a cache of results.
+        keys (:obj:`List[str]`): cache keys of :param:`inputs`.
+        inputs (:obj:`List[Any]`): inputs of a batch request.
+        request_func (:obj:`Callable[[List[Any], bool], Any]`): a function which accepts missing inputs and a value
+            of ``future`` parameter and sends a request.
+        split_response (:obj:`Callable[[Any], List[Any]]`): a function which splits a response into results for
+            every input of a request.
+        build_response (:obj:`Callable[[List[Any]], Any]`): a function which builds a response from results for
+            :param:`inputs`.
+        future (:obj:`bool`): whether to return a :class:`concurrent.futures.Future` instead of a response.
+
+    Returns:
+        :obj:`Any`: a response built with :param:`build_response` or a future object of the response. Cancelling the
+        future object cancels a request sent to a server.
+    """
+    values = [cache.get(key) for key in keys]
+    miss_inputs_by_key: Dict[str, Any] = {}
+    for key, input_, value in zip(keys, inputs, values):
+        if value is MISSING and key not in miss_inputs_by_key:
+            miss_inputs_by_key[key] = input_
+    miss_keys, miss_inputs = list(miss_inputs_by_key), list(miss_inputs_by_key.values())
+    cache.stats.add(deduplicated=sum(v is MISSING for v in values) - len(miss_keys))
+
+    def finish(response: Any) -> Any:
+        if response is not None:
+            miss_values = split_response(response)
+            if len(miss_values) != len(miss_keys):
+                raise ValueError(f"Expected {len(miss_keys)} results whereas {len(miss_values)} were returned.")
+            received = dict(zip(miss_keys, miss_values))
+            for key, value in received.items():
+                cache.put(key, value)
+            for i, key in enumerate(keys):
+                if values[i] is MISSING:
+                    values[i] = received[key]
+        return build_response(values)
+
+    if not future:
+        return finish(request_func(miss_inputs, False) if miss_inputs else None)
+    result = Future()
+    if not miss_inputs:
+        result.set_result(finish(None))
+        return result
+
+    def on_done(response_future: Any) -> None:
+        # After this call `result` cannot be cancelled anymore.
+        if not result.set_running_or_notify_cancel():
+            return
+        try:
+            result.set_result(finish(response_future.result()))
+        except Exception as e:
+            result.set_exception(e)
+
+    def on_result_done(result_: Future) -> None:
+        if result_.cancelled():
+            response_future.cancel()
+
+    response_future = request_func(miss_inputs, True)
+    result.add_done_callback(on_result_done)
+    response_future.add_done_callback(on_done)
+    return result
@@ -0,0 +1,183 @@
+# SPDX-FileCopyrightText: Copyright (c) 2022 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple, Union
+
+from riva.client.playback import RingBuffer
+
+CAPTURE_OVERFLOW_POLICIES = ['drop_oldest', 'block', 'error']
+
+
+class CaptureBuffer:
+    """
+    Collects captured audio, e.g. from a recording callback, in a preallocated :class:`riva.client.playback.RingBuffer`
+    holding up to :param:`buffer_seconds` of audio, and hands it out in chunks of bounded duration.
+
+    :meth:`read` waits until at least :param:`min_chunk_seconds` of audio are buffered and returns at most
+    :param:`max_chunk_seconds` of audio, so a consumer which falls behind catches up with several chunks of bounded
+    size instead of one huge chunk. Every chunk comes with a capture time of its first frame in
+    :func:`time.monotonic` seconds, which can be used to measure end-to-end latency.
+
+    If a write does not fit into the buffer, then an overrun is counted and, depending on :param:`overflow`:
+
+    - ``"drop_oldest"``: the oldest buffered audio is dropped to make space, so the buffer keeps the latest audio;
+    - ``"block"``: the write waits until there is space. Blocking a recording callback may make a device drop audio;
+    - ``"error"``: the data is dropped, and :meth:`read` raises :obj:`RuntimeError`.
+
+    Args:
+        sampwidth (:obj:`int`): a number of bytes in a sample.
+        nchannels (:obj:`int`): a number of channels.
+        framerate (:obj:`int`): a number of frames per second.
+        buffer_seconds (:obj:`float`, defaults to :obj:`5.0`): a capacity of the buffer.
+        max_chunk_seconds (:obj:`float`, defaults to :obj:`0.5`): a maximum duration of a chunk returned by
+            :meth:`read`.
+        min_chunk_seconds (:obj:`float`, defaults to :obj:`0.0`): a minimum duration of a chunk returned by
+            :meth:`read` unless the buffer is closed. If :obj:`0.0`, then a chunk is returned as soon as a frame is
+            available.
+        overflow (:obj:`str`, defaults to :obj:`"drop_oldest"`): one of :data:`CAPTURE_OVERFLOW_POLICIES`.
+    """
+    def __init__(
+        self,
+        sampwidth: int,
+        nchannels: int,
+        framerate: int,
+        buffer_seconds: float = 5.0,
+        max_chunk_seconds: float = 0.5,
+        min_chunk_seconds: float = 0.0,
+        overflow: str = 'drop_oldest',
+    ) -> None:
+        if overflow not in CAPTURE_OVERFLOW_POLICIES:
+            raise ValueError(
+                f"Not allowed value '{overflow}' of parameter `overflow`. Allowed values are "
+                f"{CAPTURE_OVERFLOW_POLICIES}"
+            )
+        if not 0 <= min_chunk_seconds <= max_chunk_seconds <= buffer_seconds:
+            raise ValueError(
+                f"Parameters have to satisfy 0 <= `min_chunk_seconds` <= `max_chunk_seconds` <= `buffer_seconds` "
+                f"whereas `min_chunk_seconds={min_chunk_seconds}`, `max_chunk_seconds={max_chunk_seconds}` and "
+                f"`buffer_seconds={buffer_seconds}` were given."
+            )
+        self.frame_size = sampwidth * nchannels
+        self.framerate = framerate
+        self.overflow = overflow
+        self.max_chunk_bytes = max(int(max_chunk_seconds * framerate), 1) * self.frame_size
+        self.min_chunk_bytes = max(int(min_chunk_seconds * framerate), 1) * self.frame_size
+        capacity = max(int(buffer_seconds * framerate) * self.frame_size, self.max_chunk_bytes)
+        self._buffer = RingBuffer(capacity)
+        self._chunk = memoryview(bytearray(self.max_chunk_bytes))
+        # Stream offsets and capture times of written blocks which are still in the buffer.
+        self._blocks: Deque[Tuple[int, float]] = deque()
+        self._read_offset = 0
+        self._write_offset = 0
+        self._overflowed = False
+        self.closed = False
+        self.overruns = 0
+        self.dropped_bytes = 0
+        self.captured_bytes = 0
+
+    @property
+    def buffered_seconds(self) -> float:
+        return len(self._buffer) / self.frame_size / self.framerate
+
+    @property
+    def stats(self) -> Dict[str, Union[int, float]]:
+        return {
+            'overruns': self.overruns,
+            'dropped_seconds': self.dropped_bytes / self.frame_size / self.framerate,
+            'captured_seconds': self.captured_bytes / self.frame_size / self.framerate,
+            'buffered_seconds': self.buffered_seconds,
+        }
+
+    def write(self, data: bytes, capture_time: Optional[float] = None) -> None:
+        """
+        Adds :param:`data` captured at :param:`capture_time`. If :param:`capture_time` is :obj:`None`, then the data
+        is assumed to end now.
+        """
+        data = memoryview(data).cast('B')
+        if capture_time is None:
+            capture_time = time.monotonic() - len(data) / self.frame_size / self.framerate
+        buffer = self._buffer
+        with buffer.lock:
+            if self.closed:
+                return
+            self.captured_bytes += len(data)
+            if len(data) > buffer.free:
+                self.overruns += 1
+                if self.overflow == 'drop_oldest':
+                    if len(data) > buffer.capacity:
+                        skipped = len(data) - buffer.capacity
+                        skipped -= skipped % self.frame_size
+                        capture_time += skipped / self.frame_size / self.framerate
+                        self.dropped_bytes += skipped
+                        data = data[skipped:]
+                    self._discard(len(data) - buffer.free)
+                elif self.overflow == 'error':
+                    self._overflowed = True
+                    self.dropped_bytes += len(data)
+                    buffer.changed.notify_all()
+                    return
+            if len(data):
+                self._blocks.append((self._write_offset, capture_time))
+            written = 0
+            while True:
+                written += buffer.write(data[written:])
+                if written == len(data) or self.closed:
+                    break
+                buffer.changed.wait()
+            self._write_offset += written
+
+    def read(self) -> Optional[Tuple[bytes, float]]:
+        """
+        Returns a chunk of audio and a capture time of its first frame, or :obj:`None` if the buffer is closed and
+        empty.
+
+        Raises:
+            :obj:`RuntimeError`: if audio was dropped and :attr:`overflow` is ``"error"``.
+        """
+        buffer = self._buffer
+        with buffer.lock:
+            while True:
+                if self._overflowed:
+                    raise RuntimeError(
+                        f"Captured audio was dropped because a consumer fell more than "
+                        f"{buffer.capacity / self.frame_size / self.framerate:.2f} s behind."
+                    )
+                available = len(buffer)
+                if available >= self.min_chunk_bytes or (self.closed and available):
+                    break
+                if self.closed:
+                    return None
+                buffer.changed.wait()
+            if not self.closed:
+                available -= available % self.frame_size
+            capture_time = self._capture_time(self._read_offset)
+            n = buffer.read_into(self._chunk[: min(self.max_chunk_bytes, available)])
+            self._advance(n)
+            return bytes(self._chunk[:n]), capture_time
+
+    def close(self) -> None:
+        """Stops accepting audio. Buffered audio can still be read."""
+        with self._buffer.lock:
+            self.closed = True
+            self._buffer.changed.notify_all()
+
+    def _discard(self, n: int) -> None:
+        n += -n % self.frame_size
+        n = self._buffer.discard(n)
+        self.dropped_bytes += n
+        self._advance(n)
+
+    def _advance(self, n: int) -> None:
+        self._read_offset += n
+        self._drop_read_blocks()
+
+    def _drop_read_blocks(self) -> None:
+        while len(self._blocks) > 1 and self._blocks[1][0] <= self._read_offset:
+            self._blocks.popleft()
+
+    def _capture_time(self, offset: int) -> float:
+        self._drop_read_blocks()
+        block_offset, block_time = self._blocks[0]
+        return block_time + (offset - block_offset) / self.frame_size / self.framerate
@@ -0,0 +1,203 @@
+# SPDX-FileCopyrightText: Copyright (c) 2022 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import riva.client.proto.riva_nlp_pb2 as rnlp
+from riva.client.nlp import NLPService, extract_all_transformed_texts
+
+_CLOSE = object()
+
+
+class CoalescerStats:
+    """Thread-safe batch size and queueing delay counters of :class:`RequestCoalescer`."""
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.n_items = 0
+        self.n_batches = 0
+        self.max_batch_size = 0
+        self.total_queueing_delay = 0.0
+        self.max_queueing_delay = 0.0
+
+    def add_batch(self, queueing_delays: List[float]) -> None:
+        with self._lock:
+            self.n_items += len(queueing_delays)
+            self.n_batches += 1
+            self.max_batch_size = max(self.max_batch_size, len(queueing_delays))
+            self.total_queueing_delay += sum(queueing_delays)
+            self.max_queueing_delay = max(self.max_queueing_delay, max(queueing_delays))
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.n_items / self.n_batches if self.n_batches else 0.0
+
+    @property
+    def mean_queueing_delay(self) -> float:
+        return self.total_queueing_delay / self.n_items if self.n_items else 0.0
+
+    def as_dict(self) -> Dict[str, Union[int, float]]:
+        return {
+            'n_items': self.n_items,
+            'n_batches': self.n_batches,
+            'mean_batch_size': self.mean_batch_size,
+            'max_batch_size': self.max_batch_size,
+            'mean_queueing_delay': self.mean_queueing_delay,
+            'max_queueing_delay': self.max_queueing_delay,
+        }
+
+
+class _PendingItem:
+    __slots__ = ('item', 'future', 'submitted')
+
+    def __init__(self, item: Any) -> None:
+        self.item = item
+        self.future = Future()
+        self.submitted = time.monotonic()
+
+
+class RequestCoalescer:
+    """
+    Merges items submitted at about the same time from many threads or coroutines into one batched request.
+
+    A batch is sent when it contains :param:`max_batch_size` items or when :param:`max_delay` seconds passed since
+    its first item was submitted. While up to :param:`max_concurrent_batches` batches are being processed, new items
+    keep being collected, so batches grow under load. Each caller receives the result for its own item.
+
+    Args:
+        process_batch (:obj:`Callable[[List[Any]], List[Any]]`): a function which processes a batch of items
+            and returns one result per item in the same order.
+        max_batch_size (:obj:`int`, defaults to :obj:`32`): a maximum number of items in a batch.
+        max_delay (:obj:`float`, defaults to :obj:`0.002`): a maximum time in seconds an item waits for other items.
+        max_concurrent_batches (:obj:`int`, defaults to :obj:`4`): a maximum number of batches processed
+            simultaneously.
+    """
+    def __init__(
+        self,
+        process_batch: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 32,
+        max_delay: float = 0.002,
+        max_concurrent_batches: int = 4,
+    ) -> None:
+        if max_batch_size < 1:
+            raise ValueError(f"Parameter `max_batch_size` has to be positive whereas `{max_batch_size}` was given.")
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.stats = CoalescerStats()
+        self._queue: queue.Queue = queue.Queue()
+        self._slots = threading.Semaphore(max_concurrent_batches)
+        self._executor = ThreadPoolExecutor(max_concurrent_batches)
+        self._closed = False
+        # Makes checking `_closed` and queueing atomic, so no item is queued after `_CLOSE`.
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._collect, daemon=True)
+        self._thread.start()
+
+    def submit(self, item: Any) -> Future:
+        """Adds :param:`item` to a batch and returns a future with a result for :param:`item`."""
+        pending = _PendingItem(item)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Cannot submit to a closed coalescer.")
+            self._queue.put(pending)
+        return pending.future
+
+    def __call__(self, item: Any, timeout: Optional[float] = None) -> Any:
+        """Returns a result for :param:`item` blocking until a batch containing :param:`item` is processed."""
+        return self.submit(item).result(timeout)
+
+    async def process_async(self, item: Any) -> Any:
+        """Returns a result for :param:`item` without blocking an event loop."""
+        return await asyncio.wrap_future(self.submit(item))
+
+    def close(self) -> None:
+        """Sends remaining items and waits until all batches are processed."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_CLOSE)
+        self._thread.join()
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> 'RequestCoalescer':
+        return self
+
+    def __exit__(self, type_, value, traceback) -> None:
+        self.close()
+
+    def _collect(self) -> None:
+        closing = False
+        while not closing:
+            pending = self._queue.get()
+            if pending is _CLOSE:
+                break
+            batch = [pending]
+            deadline = pending.submitted + self.max_delay
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                try:
+                    pending = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if pending is _CLOSE:
+                    closing = True
+                    break
+                batch.append(pending)
+            self._slots.acquire()
+            now = time.monotonic()
+            self.stats.add_batch([now - p.submitted for p in batch])
+            self._executor.submit(self._process, batch)
+        while True:
+            try:
+                pending = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if pending is not _CLOSE:
+                pending.future.set_exception(RuntimeError("Coalescer was closed before the item was processed."))
+
+    def _process(self, batch: List[_PendingItem]) -> None:
+        try:
+            results = self.process_batch([p.item for p in batch])
+            if len(results) != len(batch):
+                raise ValueError(f"Expected {len(batch)} results whereas {len(results)} results were returned.")
+            for p, result in zip(batch, results):
+                p.future.set_result(result)
+        except Exception as e:
+            for p in batch:
+                if not p.future.done():
+                    p.future.set_exception(e)
+        finally:
+            self._slots.release()
+
+
+def punctuate_text_coalescer(
+    nlp_service: NLPService, model_name: Optional[str] = None, language_code: str = 'en-US', **kwargs
+) -> RequestCoalescer:
+    """
+    Returns a :class:`RequestCoalescer` which merges texts into :meth:`NLPService.punctuate_text` requests. Results
+    are punctuated texts. Keyword arguments are passed to :class:`RequestCoalescer`.
+    """
+    return RequestCoalescer(
+        lambda texts: extract_all_transformed_texts(nlp_service.punctuate_text(texts, model_name, language_code)),
+        **kwargs,
+    )
+
+
+def classify_text_coalescer(
+    nlp_service: NLPService, model_name: str, language_code: str = 'en-US', **kwargs
+) -> RequestCoalescer:
+    """
+    Returns a :class:`RequestCoalescer` which merges texts into :meth:`NLPService.classify_text` requests. Results are
+    :class:`riva.client.proto.riva_nlp_pb2.ClassificationResult` messages. Keyword arguments are passed to
+    :class:`RequestCoalescer`.
+    """
+    def process_batch(texts: List[str]) -> List[rnlp.ClassificationResult]:
+        return list(nlp_service.classify_text(texts, model_name, language_code).results)
+
+    return RequestCoalescer(process_batch, **kwargs)
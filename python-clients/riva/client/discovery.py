@@ -0,0 +1,289 @@
+# SPDX-FileCopyrightText: Copyright (c) 2022 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple, Union
+
+import riva.client.proto.riva_asr_pb2 as rasr
+import riva.client.proto.riva_asr_pb2_grpc as rasr_srv
+import riva.client.proto.riva_nmt_pb2 as riva_nmt
+import riva.client.proto.riva_nmt_pb2_grpc as riva_nmt_srv
+import riva.client.proto.riva_tts_pb2 as rtts
+import riva.client.proto.riva_tts_pb2_grpc as rtts_srv
+from riva.client.auth import Auth
+from riva.client.cache import MISSING, SqliteCache
+
+TIMESTAMP = struct.Struct('<d')
+
+
+def _split_list(value: str) -> List[str]:
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+class ASRCapabilities:
+    """
+    Speech recognition models of a server indexed by language. Built from a
+    :class:`riva.client.proto.riva_asr_pb2.RivaSpeechRecognitionConfigResponse`.
+    """
+    def __init__(self, response: rasr.RivaSpeechRecognitionConfigResponse) -> None:
+        self.response = response
+        # language code -> model type ("online" or "offline") -> model names
+        self.models_by_language: Dict[str, Dict[str, List[str]]] = {}
+        self.model_names: Set[str] = set()
+        for model_config in response.model_config:
+            self.model_names.add(model_config.model_name)
+            model_type = model_config.parameters.get('type', '')
+            for language_code in _split_list(model_config.parameters.get('language_code', '')):
+                models = self.models_by_language.setdefault(language_code, {}).setdefault(model_type, [])
+                if model_config.model_name not in models:
+                    models.append(model_config.model_name)
+
+    @property
+    def languages(self) -> List[str]:
+        return sorted(self.models_by_language)
+
+    def models(self, language_code: str, model_type: Optional[str] = None) -> List[str]:
+        """Returns names of models for :param:`language_code`. If :param:`model_type` is ``"online"`` or
+        ``"offline"``, then only streaming or only offline models are returned."""
+        models_by_type = self.models_by_language.get(language_code, {})
+        if model_type is not None:
+            return list(models_by_type.get(model_type, []))
+        return [model for models in models_by_type.values() for model in models]
+
+    def validate(self, language_code: str, model: Optional[str] = None, model_type: Optional[str] = None) -> None:
+        """Raises :obj:`ValueError` if the server has no model for :param:`language_code` or if :param:`model` is
+        given and does not support :param:`language_code`."""
+        models = self.models(language_code, model_type)
+        if not models:
+            raise ValueError(
+                f"No {model_type + ' ' if model_type else ''}ASR model for language `{language_code}`. Available "
+                f"languages are {self.languages}."
+            )
+        if model and model not in models:
+            raise ValueError(f"ASR model `{model}` does not support `{language_code}`. Available models are {models}.")
+
+
+class TTSCapabilities:
+    """
+    Speech synthesis voices of a server indexed by language and by voice. Built from a
+    :class:`riva.client.proto.riva_tts_pb2.RivaSynthesisConfigResponse`. Full voice names are ``<voice>.<subvoice>``.
+    A voice may serve several languages, so :attr:`voice_languages` maps a voice name to a set of language codes.
+    """
+    def __init__(self, response: rtts.RivaSynthesisConfigResponse) -> None:
+        self.response = response
+        self.voices_by_language: Dict[str, List[str]] = {}
+        self.subvoices_by_voice: Dict[str, List[str]] = {}
+        # full and base voice names -> language codes
+        self.voice_languages: Dict[str, Set[str]] = {}
+        for model_config in response.model_config:
+            language_code = model_config.parameters.get('language_code', '')
+            voice_name = model_config.parameters.get('voice_name', model_config.model_name)
+            subvoices = [voice.split(':')[0] for voice in _split_list(model_config.parameters.get('subvoices', ''))]
+            known_subvoices = self.subvoices_by_voice.setdefault(voice_name, [])
+            known_subvoices.extend(subvoice for subvoice in subvoices if subvoice not in known_subvoices)
+            self.voice_languages.setdefault(voice_name, set()).add(language_code)
+            voices = self.voices_by_language.setdefault(language_code, [])
+            for subvoice in subvoices:
+                full_voice_name = f"{voice_name}.{subvoice}"
+                if full_voice_name not in voices:
+                    voices.append(full_voice_name)
+                self.voice_languages.setdefault(full_voice_name, set()).add(language_code)
+
+    @property
+    def languages(self) -> List[str]:
+        return sorted(self.voices_by_language)
+
+    def voices(self, language_code: str) -> List[str]:
+        return list(self.voices_by_language.get(language_code, []))
+
+    def validate(self, language_code: str, voice_name: Optional[str] = None) -> None:
+        """Raises :obj:`ValueError` if the server has no voice for :param:`language_code` or if :param:`voice_name` is
+        given and is not a voice of :param:`language_code`."""
+        if language_code not in self.voices_by_language:
+            raise ValueError(f"No TTS voice for language `{language_code}`. Available languages are {self.languages}.")
+        if voice_name and language_code not in self.voice_languages.get(voice_name, set()):
+            raise ValueError(
+                f"Voice `{voice_name}` is not available for `{language_code}`. Available voices are "
+                f"{self.voices(language_code)}."
+            )
+
+
+class NMTCapabilities:
+    """
+    Translation models of a server indexed by language pair. Built from a
+    :class:`riva.client.proto.riva_nmt_pb2.AvailableLanguageResponse`. A model supports every pair of its source
+    and target languages, including a pair of a language with itself.
+    """
+    def __init__(self, response: riva_nmt.AvailableLanguageResponse) -> None:
+        self.response = response
+        self.models_by_pair: Dict[Tuple[str, str], List[str]] = {}
+        for model, pair in response.languages.items():
+            for source_language in pair.src_lang:
+                for target_language in pair.tgt_lang:
+                    self.models_by_pair.setdefault((source_language, target_language), []).append(model)
+
+    @property
+    def language_pairs(self) -> List[Tuple[str, str]]:
+        return sorted(self.models_by_pair)
+
+    def models(self, source_language: str, target_language: str) -> List[str]:
+        return list(self.models_by_pair.get((source_language, target_language), []))
+
+    def validate(self, source_language: str, target_language: str, model: Optional[str] = None) -> None:
+        """Raises :obj:`ValueError` if no model translates from :param:`source_language` to :param:`target_language`
+        or if :param:`model` is given and does not."""
+        models = self.models(source_language, target_language)
+        if not models:
+            raise ValueError(f"No NMT model translates from `{source_language}` to `{target_language}`.")
+        if model and model not in models:
+            raise ValueError(
+                f"NMT model `{model}` does not translate from `{source_language}` to `{target_language}`. Available "
+                f"models are {models}."
+            )
+
+
+Capabilities = Union[ASRCapabilities, TTSCapabilities, NMTCapabilities]
+
+
+class CapabilityDiscovery:
+    """
+    Fetches models and voices of a server once and keeps them in memory and, if :param:`cache_dir` is given, in a
+    SQLite database shared by processes, so that requests can be validated locally without a config request at
+    every startup. Entries are keyed by server URI.
+
+    Capabilities older than :param:`ttl` seconds are fetched again before being returned. Capabilities older than
+    ``refresh_ahead * ttl`` seconds are returned immediately and are refreshed on a background thread, so callers do
+    not wait for a server after the first fetch.
+
+    Args:
+        auth (:obj:`riva.client.auth.Auth`): an instance of :class:`riva.client.auth.Auth`.
+        cache_dir (:obj:`Union[str, os.PathLike]`, `optional`): a directory of the persistent cache.
+        ttl (:obj:`float`, defaults to :obj:`3600.0`): a lifetime of fetched capabilities in seconds.
+        refresh_ahead (:obj:`float`, defaults to :obj:`0.8`): a fraction of :param:`ttl` after which capabilities
+            are refreshed in background. If :obj:`1.0`, then there is no background refresh.
+    """
+    def __init__(
+        self,
+        auth: Auth,
+        cache_dir: Optional[Union[str, os.PathLike]] = None,
+        ttl: float = 3600.0,
+        refresh_ahead: float = 0.8,
+    ) -> None:
+        if ttl <= 0:
+            raise ValueError(f"Parameter `ttl` has to be positive whereas `ttl={ttl}` was given.")
+        if not 0 < refresh_ahead <= 1:
+            raise ValueError(
+                f"Parameter `refresh_ahead` has to be in range (0, 1] whereas `refresh_ahead={refresh_ahead}` was "
+                f"given."
+            )
+        self.auth = auth
+        self.ttl = ttl
+        self.refresh_ahead = refresh_ahead
+        self.disk = None
+        if cache_dir is not None:
+            self.disk = SqliteCache(Path(cache_dir) / 'capabilities.sqlite', table='capabilities')
+        self.fetchers: Dict[str, Tuple[Callable[[], bytes], Callable[[bytes], Capabilities]]] = {
+            'asr': (
+                self._fetch_asr,
+                lambda data: ASRCapabilities(rasr.RivaSpeechRecognitionConfigResponse.FromString(data)),
+            ),
+            'tts': (
+                self._fetch_tts,
+                lambda data: TTSCapabilities(rtts.RivaSynthesisConfigResponse.FromString(data)),
+            ),
+            'nmt': (
+                self._fetch_nmt,
+                lambda data: NMTCapabilities(riva_nmt.AvailableLanguageResponse.FromString(data)),
+            ),
+        }
+        self._memory: Dict[str, Tuple[float, Capabilities]] = {}
+        self._refreshing: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def _fetch_asr(self) -> bytes:
+        stub = rasr_srv.RivaSpeechRecognitionStub(self.auth.channel)
+        return stub.GetRivaSpeechRecognitionConfig(
+            rasr.RivaSpeechRecognitionConfigRequest(), metadata=self.auth.get_auth_metadata()
+        ).SerializeToString()
+
+    def _fetch_tts(self) -> bytes:
+        stub = rtts_srv.RivaSpeechSynthesisStub(self.auth.channel)
+        return stub.GetRivaSynthesisConfig(
+            rtts.RivaSynthesisConfigRequest(), metadata=self.auth.get_auth_metadata()
+        ).SerializeToString()
+
+    def _fetch_nmt(self) -> bytes:
+        stub = riva_nmt_srv.RivaTranslationStub(self.auth.channel)
+        return stub.ListSupportedLanguagePairs(
+            riva_nmt.AvailableLanguageRequest(), metadata=self.auth.get_auth_metadata()
+        ).SerializeToString()
+
+    def _disk_key(self, kind: str) -> str:
+        return f"{self.auth.uri}|{kind}"
+
+    def _fetch(self, kind: str) -> Tuple[float, Capabilities]:
+        fetch, parse = self.fetchers[kind]
+        data = fetch()
+        entry = (time.time(), parse(data))
+        with self._lock:
+            self._memory[kind] = entry
+        if self.disk is not None:
+            self.disk.put(self._disk_key(kind), TIMESTAMP.pack(entry[0]) + data)
+        return entry
+
+    def _refresh(self, kind: str) -> None:
+        try:
+            self._fetch(kind)
+        except Exception:
+            # Stale capabilities are kept until they expire and are fetched synchronously.
+            pass
+        finally:
+            with self._lock:
+                self._refreshing.discard(kind)
+
+    def get(self, kind: str) -> Capabilities:
+        """Returns capabilities of kind :param:`kind` which is ``"asr"``, ``"tts"`` or ``"nmt"``."""
+        if kind not in self.fetchers:
+            raise ValueError(
+                f"Not allowed value '{kind}' of parameter `kind`. Allowed values are {list(self.fetchers)}"
+            )
+        with self._lock:
+            entry = self._memory.get(kind)
+        if entry is None and self.disk is not None:
+            value = self.disk.get(self._disk_key(kind))
+            if value is not MISSING:
+                entry = (TIMESTAMP.unpack_from(value)[0], self.fetchers[kind][1](value[TIMESTAMP.size :]))
+                with self._lock:
+                    self._memory.setdefault(kind, entry)
+        age = None if entry is None else time.time() - entry[0]
+        if age is None or age >= self.ttl:
+            return self._fetch(kind)[1]
+        if age >= self.refresh_ahead * self.ttl:
+            with self._lock:
+                start_refresh = kind not in self._refreshing
+                self._refreshing.add(kind)
+            if start_refresh:
+                threading.Thread(target=self._refresh, args=(kind,), daemon=True).start()
+        return entry[1]
+
+    def asr(self) -> ASRCapabilities:
+        return self.get('asr')
+
+    def tts(self) -> TTSCapabilities:
+        return self.get('tts')
+
+    def nmt(self) -> NMTCapabilities:
+        return self.get('nmt')
+
+    def invalidate(self) -> None:
+        """Drops capabilities in memory, so they are read from disk or fetched on next access."""
+        with self._lock:
+            self._memory.clear()
+
+    def close(self) -> None:
+        if self.disk is not None:
+            self.disk.close()
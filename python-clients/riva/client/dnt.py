@@ -0,0 +1,132 @@
+# SPDX-FileCopyrightText: Copyright (c) 2022 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import hashlib
+import os
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+
+def dnt_phrases_digest(dnt_phrases_dict: Optional[Union[dict, 'DNTDictionary']]) -> str:
+    """Returns a digest of a do not translate dictionary which does not depend on an order of entries."""
+    if isinstance(dnt_phrases_dict, DNTDictionary):
+        return dnt_phrases_dict.digest
+    if not dnt_phrases_dict:
+        return ''
+    digest = hashlib.sha256()
+    for key, value in sorted((str(k), str(v)) for k, v in dnt_phrases_dict.items()):
+        digest.update(f'{key}\x1f{value}\x1e'.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def read_dnt_phrases_file(path: Union[str, os.PathLike]) -> Dict[str, str]:
+    """
+    Reads a do not translate dictionary from a file where every line is either a phrase which is kept as is or
+    ``<phrase>##<translation>``. Empty lines are skipped.
+    """
+    dnt_phrases_dict = {}
+    with Path(path).expanduser().open(encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            key, _, value = line.partition('##')
+            key = key.strip()
+            if key:
+                dnt_phrases_dict[key] = value.strip()
+    return dnt_phrases_dict
+
+
+class DNTDictionary:
+    """
+    A do not translate dictionary compiled into an Aho-Corasick automaton. :meth:`match` finds in one pass over texts
+    all phrases which occur in the texts, so a request carries only phrases relevant to its batch instead of a whole
+    dictionary. Compile a dictionary once and pass it as ``dnt_phrases_dict`` to
+    :meth:`riva.client.NeuralMachineTranslationClient.translate` or
+    :meth:`riva.client.NeuralMachineTranslationClient.translate_batch`.
+
+    Phrases are matched case-insensitively anywhere in texts, e.g. ``GPU`` in ``GPUs``, so a request carries every
+    phrase a server could match. If :param:`whole_words` is :obj:`True`, then a phrase matches only if it is not
+    preceded or followed by a letter or a digit, which sends fewer phrases but may leave out a phrase a server would
+    have applied.
+
+    Args:
+        phrases (:obj:`Dict[str, str]`): a mapping from phrases to their translations. An empty translation means
+            that a phrase is kept as is.
+        whole_words (:obj:`bool`, defaults to :obj:`False`): whether phrases have to match whole words.
+    """
+    def __init__(self, phrases: Dict[str, str], whole_words: bool = False) -> None:
+        self.phrases = dict(phrases)
+        self.whole_words = whole_words
+        self.digest = dnt_phrases_digest(self.phrases)
+        self._keys: List[str] = []
+        self._lengths: List[int] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._outputs: List[List[int]] = [[]]
+        for key in self.phrases:
+            pattern = key.lower()
+            if not pattern:
+                continue
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._outputs.append([])
+                state = next_state
+            self._outputs[state].append(len(self._keys))
+            self._keys.append(key)
+            self._lengths.append(len(pattern))
+        self._fail = [0] * len(self._goto)
+        self._output_links = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(char, 0)
+                if fail == next_state:
+                    fail = 0
+                self._fail[next_state] = fail
+                # The nearest state on the failure chain where a phrase ends.
+                self._output_links[next_state] = fail if self._outputs[fail] else self._output_links[fail]
+
+    @classmethod
+    def from_file(cls, path: Union[str, os.PathLike], whole_words: bool = False) -> 'DNTDictionary':
+        """Compiles a dictionary from a file in a format described in :func:`read_dnt_phrases_file`."""
+        return cls(read_dnt_phrases_file(path), whole_words)
+
+    def __len__(self) -> int:
+        return len(self.phrases)
+
+    def _is_boundary(self, text: str, start: int, end: int) -> bool:
+        return (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum())
+
+    def match(self, texts: Iterable[str]) -> Dict[str, str]:
+        """Returns entries of the dictionary whose phrases occur in at least one of :param:`texts`."""
+        found = set()
+        goto, fail, outputs, output_links = self._goto, self._fail, self._outputs, self._output_links
+        for text in texts:
+            text = text.lower()
+            state = 0
+            for i, char in enumerate(text):
+                while state and char not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(char, 0)
+                output_state = state if outputs[state] else output_links[state]
+                while output_state:
+                    for key_index in outputs[output_state]:
+                        if key_index in found:
+                            continue
+                        if not self.whole_words or self._is_boundary(text, i + 1 - self._lengths[key_index], i + 1):
+                            found.add(key_index)
+                    output_state = output_links[output_state]
+            if len(found) == len(self._keys):
+                break
+        return {self._keys[i]: self.phrases[self._keys[i]] for i in sorted(found)}
@@ -0,0 +1,141 @@
+# SPDX-FileCopyrightText: Copyright (c) 2022 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import re
+from typing import Dict, List, Optional, Sequence, Union
+
+from riva.client.async_utils import ordered_async_results
+from riva.client.batching import plan_length_bucketed_batches
+from riva.client.dnt import DNTDictionary
+from riva.client.nmt import SENTENCE_SEPARATOR_PATTERN, NeuralMachineTranslationClient
+
+BLOCK_TAGS = [
+    'address', 'article', 'aside', 'blockquote', 'br', 'dd', 'div', 'dl', 'dt', 'figcaption', 'figure', 'footer',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li', 'main', 'nav', 'ol', 'p', 'pre', 'section', 'table',
+    'tbody', 'td', 'tfoot', 'th', 'thead', 'tr', 'ul',
+]
+# Block-level tags and line breaks end sentences. Inline tags like <b> stay inside sentences.
+MARKUP_PATTERN = re.compile(rf'</?(?:{"|".join(BLOCK_TAGS)})(?:\s[^<>]*)?/?>|[ \t]*\n\s*', re.IGNORECASE)
+LINE_BREAK_PATTERN = re.compile(r'[ \t]*\n\s*')
+
+
+class DocumentSegments:
+    """
+    A document cut into pieces. Pieces at :attr:`segment_indices` are sentences which are translated, other pieces
+    are line breaks, blank lines between paragraphs, block-level markup tags and whitespace around sentences which are
+    kept as is. Concatenated pieces give the original document.
+    """
+    def __init__(self, pieces: List[str], segment_indices: List[int]) -> None:
+        self.pieces = pieces
+        self.segment_indices = segment_indices
+
+    @property
+    def segments(self) -> List[str]:
+        return [self.pieces[i] for i in self.segment_indices]
+
+    def assemble(self, translations: Dict[str, str]) -> str:
+        """Returns the document where every sentence is replaced with its translation from :param:`translations`."""
+        pieces = list(self.pieces)
+        for i in self.segment_indices:
+            pieces[i] = translations[pieces[i]]
+        return ''.join(pieces)
+
+
+def segment_document(text: str, markup: bool = True) -> DocumentSegments:
+    """
+    Cuts :param:`text` into sentences keeping paragraphs, line breaks and, if :param:`markup` is :obj:`True`,
+    block-level tags like ``<p>`` or ``<br/>`` from :data:`BLOCK_TAGS` outside of sentences. Inline tags like ``<b>``
+    are kept inside sentences, so a sentence is translated as a whole and a model can move the tags with the words
+    they wrap. Sentences end with ``.``, ``!``, ``?`` or ``…`` followed by whitespace.
+    """
+    pieces: List[str] = []
+    segment_indices: List[int] = []
+    pattern = MARKUP_PATTERN if markup else LINE_BREAK_PATTERN
+    position = 0
+    for match in list(pattern.finditer(text)) + [None]:
+        end = len(text) if match is None else match.start()
+        run = text[position:end]
+        core = run.strip()
+        if core:
+            start = run.index(core)
+            pieces.append(run[:start])
+            for i, piece in enumerate(SENTENCE_SEPARATOR_PATTERN.split(core)):
+                if i % 2 == 0:
+                    segment_indices.append(len(pieces))
+                pieces.append(piece)
+            pieces.append(run[start + len(core) :])
+        else:
+            pieces.append(run)
+        if match is not None:
+            pieces.append(match.group())
+            position = match.end()
+    return DocumentSegments(pieces, segment_indices)
+
+
+def translate_documents(
+    client: NeuralMachineTranslationClient,
+    documents: Sequence[str],
+    model: str,
+    source_language: str,
+    target_language: str,
+    max_batch_size: int = 8,
+    max_batch_tokens: Optional[int] = None,
+    max_in_flight: int = 4,
+    markup: bool = True,
+    dnt_phrases_dict: Optional[Union[dict, DNTDictionary]] = None,
+    max_len_variation: Optional[str] = None,
+) -> List[str]:
+    """
+    Translates documents of any length. Documents are cut into sentences with :func:`segment_document`, so
+    paragraphs, line breaks and markup are preserved and no request exceeds model limits because of a long document.
+    Every distinct sentence is translated once even if it repeats within or across documents. Sentences are grouped
+    into batches of similar length with :func:`riva.client.batching.plan_length_bucketed_batches` and up to
+    :param:`max_in_flight` batches are translated simultaneously. Translations are put back in place, so results do
+    not depend on batching and concurrency.
+
+    Args:
+        client (:obj:`riva.client.NeuralMachineTranslationClient`): a client which sends requests. A
+            :class:`riva.client.CachingNeuralMachineTranslationClient` reuses translations of previous documents.
+        documents (:obj:`Sequence[str]`): documents to translate.
+        model, source_language, target_language, dnt_phrases_dict, max_len_variation: same as in
+            :meth:`riva.client.NeuralMachineTranslationClient.translate`.
+        max_batch_size (:obj:`int`, defaults to :obj:`8`): a maximum number of sentences in one request.
+        max_batch_tokens (:obj:`int`, `optional`): a maximum number of tokens in a padded batch.
+        max_in_flight (:obj:`int`, defaults to :obj:`4`): a maximum number of requests processed simultaneously.
+        markup (:obj:`bool`, defaults to :obj:`True`): whether to keep block-level tags like ``<p>`` untranslated.
+
+    Returns:
+        :obj:`List[str]`: translated documents in the order of :param:`documents`.
+    """
+    segmented = [segment_document(document, markup) for document in documents]
+    sentences = list(dict.fromkeys(sentence for segments in segmented for sentence in segments.segments))
+    plan = plan_length_bucketed_batches(sentences, max_batch_size, max_batch_tokens)
+    responses = ordered_async_results(
+        plan.batch_inputs(sentences),
+        lambda batch: client.translate(
+            batch,
+            model,
+            source_language,
+            target_language,
+            future=True,
+            dnt_phrases_dict=dnt_phrases_dict,
+            max_len_variation=max_len_variation,
+        ),
+        max_in_flight,
+    )
+    translations = [translation.text for response in responses for translation in response.translations]
+    translations_by_sentence = dict(zip(sentences, plan.restore_order(translations)))
+    return [segments.assemble(translations_by_sentence) for segments in segmented]
+
+
+def translate_document(
+    client: NeuralMachineTranslationClient,
+    document: str,
+    model: str,
+    source_language: str,
+    target_language: str,
+    **kwargs,
+) -> str:
+    """Translates one document with :func:`translate_documents`. Keyword arguments are passed to
+    :func:`translate_documents`."""
+    return translate_documents(client, [document], model, source_language, target_language, **kwargs)[0]
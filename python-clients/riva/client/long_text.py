@@ -0,0 +1,233 @@
+# SPDX-FileCopyrightText: Copyright (c) 2022 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import re
+from typing import List, Optional, Tuple
+
+from riva.client.nlp import NLPService, classify_tokens_batch, punctuate_text_batch, transform_text_batch
+
+TOKEN_PATTERN = re.compile(r'\S+')
+
+
+class TextWindow:
+    """
+    A window of whitespace separated tokens of a long text. Neighboring windows overlap and every window owns
+    tokens from the middle of its overlap with a previous window to the middle of its overlap with a next window.
+    Results for owned tokens are taken from the window, so every token of a text is owned by exactly one window and
+    the tokens a model sees near window borders, where context is cut, are discarded.
+
+    Token positions are relative to the window and character positions are relative to the whole text.
+    """
+    __slots__ = ('text_index', 'start', 'end', 'n_tokens', 'own_token_start', 'own_token_end', 'own_start', 'own_end')
+
+    def __init__(
+        self,
+        text_index: int,
+        start: int,
+        end: int,
+        n_tokens: int,
+        own_token_start: int,
+        own_token_end: int,
+        own_start: int,
+        own_end: int,
+    ) -> None:
+        self.text_index = text_index
+        self.start = start
+        self.end = end
+        self.n_tokens = n_tokens
+        self.own_token_start = own_token_start
+        self.own_token_end = own_token_end
+        self.own_start = own_start
+        self.own_end = own_end
+
+    def __repr__(self) -> str:
+        return (
+            f"TextWindow(text_index={self.text_index}, start={self.start}, end={self.end}, "
+            f"own_start={self.own_start}, own_end={self.own_end})"
+        )
+
+
+def split_into_windows(
+    text: str, window_tokens: int = 256, overlap_tokens: int = 32, text_index: int = 0
+) -> List[TextWindow]:
+    """
+    Splits :param:`text` into windows of :param:`window_tokens` whitespace separated tokens. Neighboring windows share
+    :param:`overlap_tokens` tokens. A text which fits into one window is not split. A text without tokens gives no
+    windows.
+    """
+    if not 0 <= overlap_tokens < window_tokens:
+        raise ValueError(
+            f"Parameter `overlap_tokens` has to be not negative and less than `window_tokens` whereas "
+            f"`overlap_tokens={overlap_tokens}` and `window_tokens={window_tokens}` were given."
+        )
+    spans = [m.span() for m in TOKEN_PATTERN.finditer(text)]
+    n = len(spans)
+    if n == 0:
+        return []
+    step = window_tokens - overlap_tokens
+    token_ranges = [(0, min(window_tokens, n))]
+    while token_ranges[-1][1] < n:
+        start = token_ranges[-1][0] + step
+        token_ranges.append((start, min(start + window_tokens, n)))
+    # A boundary between owned parts of neighboring windows is in the middle of their overlap.
+    boundaries = [0]
+    for (_, prev_end), (start, _) in zip(token_ranges[:-1], token_ranges[1:]):
+        boundaries.append(start + (prev_end - start) // 2)
+    boundaries.append(n)
+    windows = []
+    for k, (start, end) in enumerate(token_ranges):
+        own_token_start, own_token_end = boundaries[k], boundaries[k + 1]
+        windows.append(
+            TextWindow(
+                text_index,
+                spans[start][0],
+                spans[end - 1][1],
+                end - start,
+                own_token_start - start,
+                own_token_end - start,
+                0 if k == 0 else spans[own_token_start][0],
+                len(text) if k == len(token_ranges) - 1 else spans[own_token_end][0],
+            )
+        )
+    return windows
+
+
+def split_texts_into_windows(
+    input_strings: List[str], window_tokens: int = 256, overlap_tokens: int = 32
+) -> Tuple[List[TextWindow], List[str]]:
+    """Returns windows of all :param:`input_strings` and texts of the windows."""
+    windows = []
+    for i, text in enumerate(input_strings):
+        windows += split_into_windows(text, window_tokens, overlap_tokens, text_index=i)
+    return windows, [input_strings[w.text_index][w.start : w.end] for w in windows]
+
+
+def _owned_token_range(window: TextWindow, n_output_tokens: int) -> Tuple[int, int]:
+    # A model may change a number of tokens, e.g. in text normalization. Then owned tokens are found proportionally.
+    if n_output_tokens == window.n_tokens:
+        return window.own_token_start, window.own_token_end
+    return (
+        round(window.own_token_start * n_output_tokens / window.n_tokens),
+        round(window.own_token_end * n_output_tokens / window.n_tokens),
+    )
+
+
+def merge_transformed_windows(n_texts: int, windows: List[TextWindow], outputs: List[str]) -> List[str]:
+    """Joins owned tokens of transformed window texts :param:`outputs` into :param:`n_texts` texts."""
+    parts: List[List[str]] = [[] for _ in range(n_texts)]
+    for window, output in zip(windows, outputs):
+        tokens = output.split()
+        start, end = _owned_token_range(window, len(tokens))
+        parts[window.text_index] += tokens[start:end]
+    return [' '.join(p) for p in parts]
+
+
+def merge_token_classification_windows(
+    n_texts: int,
+    windows: List[TextWindow],
+    predictions: Tuple[List[List[str]], List[List[str]], List[List[float]], List[List[int]], List[List[int]]],
+) -> Tuple[List[List[str]], List[List[str]], List[List[float]], List[List[int]], List[List[int]]]:
+    """
+    Merges token classification :param:`predictions` for windows, e.g. returned by
+    :func:`riva.client.nlp.classify_tokens_batch`, into predictions for :param:`n_texts` texts. Character offsets are
+    shifted to positions in whole texts and a token is kept only if it starts in a part of a text owned by its
+    window. Tokens without offsets are kept if their position is in owned tokens of their window.
+    """
+    merged = tuple([[] for _ in range(n_texts)] for _ in range(5))
+    for window, tokens, labels, scores, starts, ends in zip(windows, *predictions):
+        own_token_start, own_token_end = _owned_token_range(window, len(tokens))
+        for j, (token, label, score, start, end) in enumerate(zip(tokens, labels, scores, starts, ends)):
+            if start >= 0:
+                start, end = start + window.start, end + window.start
+                if not window.own_start <= start < window.own_end:
+                    continue
+            elif not own_token_start <= j < own_token_end:
+                continue
+            for values, value in zip(merged, (token, label, score, start, end)):
+                values[window.text_index].append(value)
+    return merged
+
+
+def punctuate_long_texts(
+    nlp_service: NLPService,
+    input_strings: List[str],
+    model_name: Optional[str] = None,
+    language_code: str = 'en-US',
+    window_tokens: int = 256,
+    overlap_tokens: int = 32,
+    batch_size: int = 8,
+    max_async_requests_to_queue: int = 4,
+) -> List[str]:
+    """
+    Restores punctuation and capitalization in texts of any length. Texts are split into overlapping windows with
+    :func:`split_into_windows`, windows of all texts are sent in concurrent batched requests and punctuated windows are
+    joined back. Whitespace of punctuated texts is normalized.
+
+    Args:
+        nlp_service (:obj:`NLPService`): a service which sends requests.
+        input_strings (:obj:`List[str]`): texts to punctuate.
+        model_name (:obj:`str`, `optional`): a name of a punctuation model.
+        language_code (:obj:`str`, defaults to :obj:`"en-US"`): a language of input texts.
+        window_tokens (:obj:`int`, defaults to :obj:`256`): a maximum number of whitespace separated tokens in a
+            window. It has to fit into a sequence length of a model.
+        overlap_tokens (:obj:`int`, defaults to :obj:`32`): a number of tokens shared by neighboring windows. Half of
+            an overlap on each side of a window is discarded, so punctuation near window borders comes from a window
+            which sees context on both sides.
+        batch_size (:obj:`int`, defaults to :obj:`8`): a number of windows in one request.
+        max_async_requests_to_queue (:obj:`int`, defaults to :obj:`4`): a number of requests kept in flight.
+
+    Returns:
+        :obj:`List[str]`: punctuated texts.
+    """
+    windows, window_texts = split_texts_into_windows(input_strings, window_tokens, overlap_tokens)
+    outputs = punctuate_text_batch(
+        nlp_service, window_texts, batch_size, model_name, language_code, max_async_requests_to_queue
+    )
+    return merge_transformed_windows(len(input_strings), windows, outputs)
+
+
+def transform_long_texts(
+    nlp_service: NLPService,
+    input_strings: List[str],
+    model_name: str,
+    language_code: str = 'en-US',
+    window_tokens: int = 256,
+    overlap_tokens: int = 32,
+    batch_size: int = 8,
+    max_async_requests_to_queue: int = 4,
+) -> List[str]:
+    """
+    Transforms texts of any length with :meth:`NLPService.transform_text` in the same way as
+    :func:`punctuate_long_texts` punctuates texts.
+    """
+    windows, window_texts = split_texts_into_windows(input_strings, window_tokens, overlap_tokens)
+    outputs = transform_text_batch(
+        nlp_service, window_texts, model_name, batch_size, language_code, max_async_requests_to_queue
+    )
+    return merge_transformed_windows(len(input_strings), windows, outputs)
+
+
+def classify_tokens_long_texts(
+    nlp_service: NLPService,
+    input_strings: List[str],
+    model_name: str,
+    language_code: str = 'en-US',
+    window_tokens: int = 256,
+    overlap_tokens: int = 32,
+    batch_size: int = 8,
+    max_async_requests_to_queue: int = 4,
+) -> Tuple[List[List[str]], List[List[str]], List[List[float]], List[List[int]], List[List[int]]]:
+    """
+    Classifies tokens of texts of any length. Windows are processed as in :func:`punctuate_long_texts` and merged with
+    :func:`merge_token_classification_windows`.
+
+    Returns:
+        :obj:`Tuple[List[List[str]], List[List[str]], List[List[float]], List[List[int]], List[List[int]]]`: tokens,
+        the most probable labels, their scores, and start and end character offsets in input texts for every text of
+        :param:`input_strings` in the same format as :func:`riva.client.nlp.classify_tokens_batch` returns.
+    """
+    windows, window_texts = split_texts_into_windows(input_strings, window_tokens, overlap_tokens)
+    predictions = classify_tokens_batch(
+        nlp_service, window_texts, model_name, batch_size, language_code, max_async_requests_to_queue
+    )
+    return merge_token_classification_windows(len(input_strings), windows, predictions)
@@ -0,0 +1,156 @@
+# SPDX-FileCopyrightText: Copyright (c) 2022 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import threading
+from functools import partial
+from typing import Dict, Generator, Iterable, List, Optional, Tuple, Union
+
+import riva.client.proto.riva_asr_pb2 as rasr
+from riva.client.asr import ASRService
+from riva.client.async_utils import merge_iterables
+from riva.client.audio_buffer import AudioBuffer
+from riva.client.speech_translation import AudioTee
+
+
+class ChannelSegment:
+    """A final transcript of channel :attr:`channel` spanning from :attr:`start_time` to :attr:`end_time` seconds."""
+    __slots__ = ('channel', 'transcript', 'start_time', 'end_time')
+
+    def __init__(self, channel: int, transcript: str, start_time: float, end_time: float) -> None:
+        self.channel = channel
+        self.transcript = transcript
+        self.start_time = start_time
+        self.end_time = end_time
+
+    def __repr__(self) -> str:
+        return (
+            f"ChannelSegment(channel={self.channel}, transcript={self.transcript!r}, start_time={self.start_time}, "
+            f"end_time={self.end_time})"
+        )
+
+
+class MultiChannelRecognizer:
+    """
+    Recognizes every channel of multichannel audio, e.g. an agent and a customer in a stereo call recording, in its
+    own streaming request. All requests share one gRPC channel of :param:`asr_service` and run concurrently.
+    Recognizing channels separately attributes speech to speakers without server-side diarization.
+
+    Audio has to be interleaved PCM with :param:`nchannels` channels and :param:`sampwidth` bytes per sample. An
+    :class:`riva.client.AudioBuffer` is deinterleaved at once with :meth:`riva.client.AudioBuffer.split_channels`.
+    Other audio sources are read once and every chunk is deinterleaved when it is read.
+
+    Args:
+        asr_service (:obj:`riva.client.ASRService`): a service which sends requests.
+        streaming_config (:obj:`riva.client.StreamingRecognitionConfig`): a config of requests. Its channel count is
+            replaced with 1.
+        nchannels (:obj:`int`): a number of channels.
+        sampwidth (:obj:`int`, defaults to :obj:`2`): a number of bytes in a sample.
+        max_buffered_chunks (:obj:`int`, defaults to :obj:`64`): a maximum number of chunks waiting to be sent in one
+            request and a maximum number of responses waiting to be yielded.
+    """
+    def __init__(
+        self,
+        asr_service: ASRService,
+        streaming_config: rasr.StreamingRecognitionConfig,
+        nchannels: int,
+        sampwidth: int = 2,
+        max_buffered_chunks: int = 64,
+    ) -> None:
+        if nchannels < 1:
+            raise ValueError(f"Parameter `nchannels` has to be positive whereas `{nchannels}` was given.")
+        self.asr_service = asr_service
+        self.streaming_config = rasr.StreamingRecognitionConfig()
+        self.streaming_config.CopyFrom(streaming_config)
+        self.streaming_config.config.audio_channel_count = 1
+        self.nchannels = nchannels
+        self.sampwidth = sampwidth
+        self.max_buffered_chunks = max_buffered_chunks
+
+    def generate(
+        self, audio_chunks: Union[Iterable[Union[bytes, AudioBuffer]], AudioBuffer], chunk_n_frames: int = 1600
+    ) -> Generator[Tuple[int, rasr.StreamingRecognizeResponse], None, None]:
+        """
+        Yields ``(channel, response)`` pairs as responses of all channels arrive. If :param:`audio_chunks` is an
+        :class:`riva.client.AudioBuffer`, then every channel is sent in chunks of :param:`chunk_n_frames` frames.
+        If a request or reading of audio fails, then the error is raised. Closing the generator stops all requests.
+        """
+        tee = None
+        if isinstance(audio_chunks, AudioBuffer):
+            if audio_chunks.nchannels != self.nchannels or audio_chunks.sampwidth != self.sampwidth:
+                raise ValueError(
+                    f"Audio has to have {self.nchannels} channels and sample width {self.sampwidth} whereas "
+                    f"{audio_chunks!r} was given."
+                )
+            channels = [channel.chunks(chunk_n_frames) for channel in audio_chunks.split_channels()]
+        else:
+            tee = AudioTee(audio_chunks, self.nchannels, self.max_buffered_chunks, split=self.split)
+            channels = [None] * self.nchannels
+            tee.start()
+        try:
+            yield from merge_iterables(
+                [partial(self._recognize, tee, i, chunks) for i, chunks in enumerate(channels)],
+                self.max_buffered_chunks,
+            )
+            if tee is not None and tee.error is not None:
+                raise tee.error
+        finally:
+            if tee is not None:
+                tee.close()
+
+    def transcribe(
+        self, audio_chunks: Union[Iterable[Union[bytes, AudioBuffer]], AudioBuffer], chunk_n_frames: int = 1600
+    ) -> List[ChannelSegment]:
+        """
+        Returns final transcripts of all channels on one timeline sorted by start time. Times are taken from word
+        time offsets if ``enable_word_time_offsets`` is set in a config, and from ``audio_processed`` of results
+        otherwise.
+        """
+        segments = []
+        channel_ends: Dict[int, float] = {}
+        for channel, response in self.generate(audio_chunks, chunk_n_frames):
+            for result in response.results:
+                if not result.is_final or not result.alternatives:
+                    continue
+                alternative = result.alternatives[0]
+                if not alternative.transcript.strip():
+                    continue
+                start_time = channel_ends.get(channel, 0.0)
+                end_time = max(result.audio_processed, start_time)
+                if alternative.words:
+                    start_time = alternative.words[0].start_time / 1000
+                    end_time = alternative.words[-1].end_time / 1000
+                channel_ends[channel] = max(result.audio_processed, end_time)
+                segments.append(ChannelSegment(channel, alternative.transcript.strip(), start_time, end_time))
+        segments.sort(key=lambda segment: (segment.start_time, segment.channel))
+        return segments
+
+    def split(self, chunk: bytes) -> List[bytes]:
+        """Deinterleaves :param:`chunk` into one chunk per channel."""
+        return [
+            channel.tobytes()
+            for channel in AudioBuffer(chunk, 1, self.nchannels, self.sampwidth).split_channels()
+        ]
+
+    def _recognize(
+        self,
+        tee: Optional[AudioTee],
+        channel: int,
+        audio_chunks: Optional[Iterable[AudioBuffer]],
+        stop: threading.Event,
+    ) -> Generator[rasr.StreamingRecognizeResponse, None, None]:
+        if tee is not None:
+            audio_chunks = tee.consumer(channel, stop)
+
+        def chunks() -> Generator[Union[bytes, AudioBuffer], None, None]:
+            # Ending the request stream on stop lets a server close the response stream.
+            for chunk in audio_chunks:
+                if stop.is_set():
+                    return
+                yield chunk
+
+        try:
+            yield from self.asr_service.streaming_response_generator(chunks(), self.streaming_config)
+        finally:
+            if tee is not None:
+                # A finished request must not hold back reading of other channels.
+                tee.detach(channel)
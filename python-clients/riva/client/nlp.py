@@ -1,7 +1,12 @@
 # SPDX-FileCopyrightText: Copyright (c) 2022 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
 # SPDX-License-Identifier: MIT
 
-from typing import Any, Callable, Dict, Generator, List, Optional, Tuple, Union
+import hashlib
+import os
+from array import array
+from concurrent.futures import Future
+from itertools import islice
+from typing import Any, Callable, Dict, Generator, Iterable, List, Optional, Tuple, Union
 
 from google.protobuf.message import Message
 from grpc._channel import _MultiThreadedRendezvous
@@ -9,6 +14,9 @@ from grpc._channel import _MultiThreadedRendezvous
 import riva.client.proto.riva_nlp_pb2 as rnlp
 import riva.client.proto.riva_nlp_pb2_grpc as rnlp_srv
 from riva.client import Auth
+from riva.client.async_utils import ordered_async_results
+from riva.client.batching import BatchPlan
+from riva.client.cache import CacheStats, LRUCache, SqliteCache, TieredCache, cached_batch_call
 
 
 def extract_all_text_classes_and_confidences(
@@ -65,6 +73,146 @@ def extract_most_probable_token_classification_predictions(
     )
 
 
+class TokenClassificationSentence:
+    """
+    A lazy view of token classification results for one input text of :class:`TokenClassificationResults`.
+    Fields are read from the parent arrays only when accessed.
+    """
+    __slots__ = ('_results', '_start', '_stop')
+
+    def __init__(self, results: 'TokenClassificationResults', start: int, stop: int) -> None:
+        self._results = results
+        self._start = start
+        self._stop = stop
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    @property
+    def tokens(self) -> List[str]:
+        return self._results.tokens[self._start : self._stop]
+
+    @property
+    def label_ids(self) -> array:
+        return self._results.label_ids[self._start : self._stop]
+
+    @property
+    def labels(self) -> List[Optional[str]]:
+        return [self._results.label_name(i) for i in self.label_ids]
+
+    @property
+    def scores(self) -> array:
+        return self._results.scores[self._start : self._stop]
+
+    @property
+    def starts(self) -> array:
+        return self._results.starts[self._start : self._stop]
+
+    @property
+    def ends(self) -> array:
+        return self._results.ends[self._start : self._stop]
+
+
+class TokenClassificationResults:
+    """
+    Most probable token classification predictions for many input texts stored in flat arrays. Tokens of input text
+    ``i`` occupy positions from ``offsets[i]`` to ``offsets[i + 1]`` of :attr:`tokens`, :attr:`label_ids`,
+    :attr:`scores`, :attr:`starts` and :attr:`ends`. Label ids are indices in :attr:`label_vocabulary`; ``-1`` means
+    that a server returned no label for a token.
+
+    Indexing returns a lazy :class:`TokenClassificationSentence`, and :meth:`to_tuples` returns the same lists as
+    :func:`extract_most_probable_token_classification_predictions`.
+    """
+    def __init__(self) -> None:
+        self.label_vocabulary: List[str] = []
+        self._label_index: Dict[str, int] = {}
+        self.tokens: List[str] = []
+        self.label_ids = array('i')
+        self.scores = array('f')
+        self.starts = array('q')
+        self.ends = array('q')
+        self.offsets = array('q', [0])
+
+    @classmethod
+    def from_responses(cls, responses: Iterable[rnlp.TokenClassResponse]) -> 'TokenClassificationResults':
+        results = cls()
+        for response in responses:
+            results.add_response(response)
+        return results
+
+    def label_id(self, label: str) -> int:
+        i = self._label_index.get(label)
+        if i is None:
+            i = len(self.label_vocabulary)
+            self._label_index[label] = i
+            self.label_vocabulary.append(label)
+        return i
+
+    def label_name(self, label_id: int) -> Optional[str]:
+        return None if label_id < 0 else self.label_vocabulary[label_id]
+
+    def add_response(self, response: rnlp.TokenClassResponse) -> None:
+        for batch_elem_result in response.results:
+            for token_result in batch_elem_result.results:
+                self.tokens.append(token_result.token)
+                if token_result.label:
+                    self.label_ids.append(self.label_id(token_result.label[0].class_name))
+                    self.scores.append(token_result.label[0].score)
+                else:
+                    self.label_ids.append(-1)
+                    self.scores.append(0.0)
+                if token_result.span:
+                    self.starts.append(token_result.span[0].start)
+                    self.ends.append(token_result.span[0].end)
+                else:
+                    self.starts.append(-1)
+                    self.ends.append(-1)
+            self.offsets.append(len(self.tokens))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> TokenClassificationSentence:
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(f"Index {i} is out of range for {len(self)} input texts.")
+        return TokenClassificationSentence(self, self.offsets[i], self.offsets[i + 1])
+
+    def __iter__(self) -> Generator[TokenClassificationSentence, None, None]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def take(self, indices: Iterable[int]) -> 'TokenClassificationResults':
+        """Returns results for input texts :param:`indices` in the given order."""
+        results = TokenClassificationResults()
+        results.label_vocabulary = list(self.label_vocabulary)
+        results._label_index = dict(self._label_index)
+        for i in indices:
+            start, stop = self.offsets[i], self.offsets[i + 1]
+            results.tokens += self.tokens[start:stop]
+            results.label_ids += self.label_ids[start:stop]
+            results.scores += self.scores[start:stop]
+            results.starts += self.starts[start:stop]
+            results.ends += self.ends[start:stop]
+            results.offsets.append(len(results.tokens))
+        return results
+
+    def to_tuples(
+        self
+    ) -> Tuple[List[List[str]], List[List[str]], List[List[float]], List[List[int]], List[List[int]]]:
+        labels = [self.label_name(i) for i in self.label_ids]
+        scores, starts, ends = self.scores.tolist(), self.starts.tolist(), self.ends.tolist()
+        bounds = list(zip(self.offsets[:-1], self.offsets[1:]))
+        return (
+            [self.tokens[a:b] for a, b in bounds],
+            [labels[a:b] for a, b in bounds],
+            [scores[a:b] for a, b in bounds],
+            [starts[a:b] for a, b in bounds],
+            [ends[a:b] for a, b in bounds],
+        )
+
+
 def extract_all_transformed_texts(response: rnlp.TextTransformResponse) -> List[str]:
     return [t for t in response.text]
 
@@ -312,25 +460,30 @@ def batch_generator(examples: List[Any], batch_size: int) -> Generator[List[Any]
         yield examples[i : i + batch_size]
 
 
-def process_batches_async(
-    b_gen: Generator[List[Any], None, None],
-    process_func: Callable[..., _MultiThreadedRendezvous],
-    kwargs_except_future_and_input: Dict[str, Any],
-    max_async_requests_to_queue: int,
-) -> List[Message]:
-    responses = []
-    n_req = max_async_requests_to_queue
-    while n_req == max_async_requests_to_queue:
-        n_req = 0
-        futures = []
-        for batch in b_gen:
-            futures.append(process_func(input_strings=batch, **kwargs_except_future_and_input, future=True))
-            n_req += 1
-            if n_req == max_async_requests_to_queue:
-                break
-        for f in futures:
-            responses.append(f.result())
-    return responses
+def iterable_batch_generator(examples: Iterable[Any], batch_size: int) -> Generator[List[Any], None, None]:
+    """Yields batches of :param:`batch_size` elements taking elements from :param:`examples` lazily."""
+    examples = iter(examples)
+    while True:
+        batch = list(islice(examples, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def plan_batches(
+    input_strings: List[str], batch_size: int, batch_plan: Optional[BatchPlan] = None
+) -> Generator[List[str], None, None]:
+    if batch_plan is None:
+        return batch_generator(input_strings, batch_size)
+    if len(batch_plan.lengths) != len(input_strings):
+        raise ValueError(
+            f"`batch_plan` is made for {len(batch_plan.lengths)} inputs whereas {len(input_strings)} inputs were given."
+        )
+    return batch_plan.batch_inputs(input_strings)
+
+
+def restore_order(results: List[Any], batch_plan: Optional[BatchPlan] = None) -> List[Any]:
+    return results if batch_plan is None else batch_plan.restore_order(results)
 
 
 def check_max_async_requests_to_queue(max_async_requests_to_queue: int) -> None:
@@ -341,6 +494,51 @@ def check_max_async_requests_to_queue(max_async_requests_to_queue: int) -> None:
         )
 
 
+def generate_responses(
+    request_inputs: Iterable[Any],
+    request_func: Callable[[Any, bool], Union[Message, _MultiThreadedRendezvous]],
+    max_async_requests_to_queue: int = 0,
+) -> Generator[Message, None, None]:
+    """
+    Sends a request for every element of :param:`request_inputs` and yields responses in the order of
+    :param:`request_inputs`.
+
+    Args:
+        request_inputs (:obj:`Iterable[Any]`): inputs of requests, e.g. batches of strings.
+        request_func (:obj:`Callable[[Any, bool], Any]`): a function which accepts a request input and a value of
+            ``future`` parameter and calls one of :class:`NLPService` methods.
+        max_async_requests_to_queue (:obj:`int`, defaults to :obj:`0`): a number of requests which are kept in
+            flight simultaneously. A new request is sent as soon as any of requests in flight is finished.
+            If :obj:`0`, then requests are sent one by one.
+
+    Yields:
+        :obj:`google.protobuf.message.Message`: responses in the order of :param:`request_inputs`.
+    """
+    check_max_async_requests_to_queue(max_async_requests_to_queue)
+    if max_async_requests_to_queue == 0:
+        for request_input in request_inputs:
+            yield request_func(request_input, False)
+    else:
+        yield from ordered_async_results(
+            request_inputs, lambda request_input: request_func(request_input, True), max_async_requests_to_queue
+        )
+
+
+def process_batches_async(
+    b_gen: Generator[List[Any], None, None],
+    process_func: Callable[..., _MultiThreadedRendezvous],
+    kwargs_except_future_and_input: Dict[str, Any],
+    max_async_requests_to_queue: int,
+) -> List[Message]:
+    return list(
+        ordered_async_results(
+            b_gen,
+            lambda batch: process_func(input_strings=batch, **kwargs_except_future_and_input, future=True),
+            max_async_requests_to_queue,
+        )
+    )
+
+
 def classify_text_batch(
     nlp_service: NLPService,
     input_strings: List[str],
@@ -348,25 +546,20 @@ def classify_text_batch(
     batch_size: int,
     language_code: str = 'en-US',
     max_async_requests_to_queue: int = 0,
+    batch_plan: Optional[BatchPlan] = None,
 ) -> Tuple[List[str], List[float]]:
     check_max_async_requests_to_queue(max_async_requests_to_queue)
-    if max_async_requests_to_queue == 0:
-        responses = []
-        for batch in batch_generator(input_strings, batch_size):
-            responses.append(nlp_service.classify_text(batch, model_name, language_code))
-    else:
-        responses = process_batches_async(
-            batch_generator(input_strings, batch_size),
-            nlp_service.classify_text,
-            {'model_name': model_name, 'language_code': language_code},
-            max_async_requests_to_queue,
-        )
+    responses = generate_responses(
+        plan_batches(input_strings, batch_size, batch_plan),
+        lambda batch, future: nlp_service.classify_text(batch, model_name, language_code, future=future),
+        max_async_requests_to_queue,
+    )
     classes, confidences = [], []
     for response in responses:
         b_classes, b_confidences = extract_most_probable_text_class_and_confidence(response)
         classes += b_classes
         confidences += b_confidences
-    return classes, confidences
+    return restore_order(classes, batch_plan), restore_order(confidences, batch_plan)
 
 
 def classify_tokens_batch(
@@ -376,27 +569,304 @@ def classify_tokens_batch(
     batch_size: int,
     language_code: str = 'en-US',
     max_async_requests_to_queue: int = 0,
-) -> Tuple[List[List[str]], List[List[str]], List[List[float]], List[List[int]], List[List[int]]]:
+    batch_plan: Optional[BatchPlan] = None,
+    columnar: bool = False,
+) -> Union[
+    Tuple[List[List[str]], List[List[str]], List[List[float]], List[List[int]], List[List[int]]],
+    TokenClassificationResults,
+]:
     check_max_async_requests_to_queue(max_async_requests_to_queue)
-    if max_async_requests_to_queue == 0:
-        responses = []
-        for batch in batch_generator(input_strings, batch_size):
-            responses.append(
-                nlp_service.classify_tokens(input_strings=batch, model_name=model_name, language_code=language_code)
-            )
-    else:
-        responses = process_batches_async(
-            batch_generator(input_strings, batch_size),
-            nlp_service.classify_tokens,
-            {'model_name': model_name, 'language_code': language_code},
+    responses = generate_responses(
+        plan_batches(input_strings, batch_size, batch_plan),
+        lambda batch, future: nlp_service.classify_tokens(
+            input_strings=batch, model_name=model_name, language_code=language_code, future=future
+        ),
+        max_async_requests_to_queue,
+    )
+    results = TokenClassificationResults.from_responses(responses)
+    if batch_plan is not None:
+        results = results.take(restore_order(list(range(len(results))), batch_plan))
+    return results if columnar else results.to_tuples()
+
+
+def iter_classify_text_batch(
+    nlp_service: NLPService,
+    input_strings: Iterable[str],
+    model_name: str,
+    batch_size: int,
+    language_code: str = 'en-US',
+    max_async_requests_to_queue: int = 0,
+) -> Generator[Tuple[str, float], None, None]:
+    """
+    Classifies texts from :param:`input_strings` and yields the most probable class and its confidence for every text
+    in the order of :param:`input_strings`.
+
+    :param:`input_strings` can be any iterable, e.g. a file object or a generator reading a queue. Texts are read
+    only when there is room for a new request, so at most about ``2 * max_async_requests_to_queue + 1`` batches
+    are held in memory and a slow consumer of results stops reading of input.
+
+    Args:
+        nlp_service (:obj:`NLPService`): a service which sends requests.
+        input_strings (:obj:`Iterable[str]`): texts to classify.
+        model_name (:obj:`str`): a name of a model.
+        batch_size (:obj:`int`): a number of texts in one request.
+        language_code (:obj:`str`): a language of input texts.
+        max_async_requests_to_queue (:obj:`int`, defaults to :obj:`0`): a number of requests kept in flight.
+            If :obj:`0`, then requests are sent one by one.
+
+    Yields:
+        :obj:`Tuple[str, float]`: the most probable class and its confidence.
+    """
+    check_max_async_requests_to_queue(max_async_requests_to_queue)
+    responses = generate_responses(
+        iterable_batch_generator(input_strings, batch_size),
+        lambda batch, future: nlp_service.classify_text(batch, model_name, language_code, future=future),
+        max_async_requests_to_queue,
+    )
+    for response in responses:
+        yield from zip(*extract_most_probable_text_class_and_confidence(response))
+
+
+def iter_classify_tokens_batch(
+    nlp_service: NLPService,
+    input_strings: Iterable[str],
+    model_name: str,
+    batch_size: int,
+    language_code: str = 'en-US',
+    max_async_requests_to_queue: int = 0,
+) -> Generator[Tuple[List[str], List[str], List[float], List[int], List[int]], None, None]:
+    """
+    Classifies tokens of texts from :param:`input_strings` and yields the most probable predictions for every text in
+    the order of :param:`input_strings`. Input is read lazily in the same way as in :func:`iter_classify_text_batch`.
+
+    Args:
+        nlp_service (:obj:`NLPService`): a service which sends requests.
+        input_strings (:obj:`Iterable[str]`): input texts.
+        model_name (:obj:`str`): a name of a model.
+        batch_size (:obj:`int`): a number of texts in one request.
+        language_code (:obj:`str`): a language of input texts.
+        max_async_requests_to_queue (:obj:`int`, defaults to :obj:`0`): a number of requests kept in flight.
+            If :obj:`0`, then requests are sent one by one.
+
+    Yields:
+        :obj:`Tuple[List[str], List[str], List[float], List[int], List[int]]`: tokens, token classes, confidences,
+        starts and ends of tokens for one text.
+    """
+    check_max_async_requests_to_queue(max_async_requests_to_queue)
+    responses = generate_responses(
+        iterable_batch_generator(input_strings, batch_size),
+        lambda batch, future: nlp_service.classify_tokens(
+            input_strings=batch, model_name=model_name, language_code=language_code, future=future
+        ),
+        max_async_requests_to_queue,
+    )
+    for response in responses:
+        yield from zip(*TokenClassificationResults.from_responses([response]).to_tuples())
+
+
+def transform_text_batch(
+    nlp_service: NLPService,
+    input_strings: List[str],
+    model_name: str,
+    batch_size: int,
+    language_code: str = 'en-US',
+    max_async_requests_to_queue: int = 0,
+    batch_plan: Optional[BatchPlan] = None,
+) -> List[str]:
+    check_max_async_requests_to_queue(max_async_requests_to_queue)
+    responses = generate_responses(
+        plan_batches(input_strings, batch_size, batch_plan),
+        lambda batch, future: nlp_service.transform_text(batch, model_name, language_code, future=future),
+        max_async_requests_to_queue,
+    )
+    texts = []
+    for response in responses:
+        texts += extract_all_transformed_texts(response)
+    return restore_order(texts, batch_plan)
+
+
+def punctuate_text_batch(
+    nlp_service: NLPService,
+    input_strings: List[str],
+    batch_size: int,
+    model_name: Optional[str] = None,
+    language_code: str = 'en-US',
+    max_async_requests_to_queue: int = 0,
+    batch_plan: Optional[BatchPlan] = None,
+) -> List[str]:
+    check_max_async_requests_to_queue(max_async_requests_to_queue)
+    responses = generate_responses(
+        plan_batches(input_strings, batch_size, batch_plan),
+        lambda batch, future: nlp_service.punctuate_text(batch, model_name, language_code, future=future),
+        max_async_requests_to_queue,
+    )
+    texts = []
+    for response in responses:
+        texts += extract_all_transformed_texts(response)
+    return restore_order(texts, batch_plan)
+
+
+def analyze_entities_batch(
+    nlp_service: NLPService,
+    input_strings: List[str],
+    language_code: str = 'en-US',
+    max_async_requests_to_queue: int = 0,
+) -> List[rnlp.TokenClassResponse]:
+    check_max_async_requests_to_queue(max_async_requests_to_queue)
+    return list(
+        generate_responses(
+            input_strings,
+            lambda input_string, future: nlp_service.analyze_entities(input_string, language_code, future=future),
             max_async_requests_to_queue,
         )
-    tokens, token_classes, confidences, starts, ends = [], [], [], [], []
-    for response in responses:
-        b_t, b_tc, b_conf, b_s, b_e = extract_most_probable_token_classification_predictions(response)
-        tokens += b_t
-        token_classes += b_tc
-        confidences += b_conf
-        starts += b_s
-        ends += b_e
-    return tokens, token_classes, confidences, starts, ends
+    )
+
+
+def analyze_intent_batch(
+    nlp_service: NLPService,
+    input_strings: List[str],
+    options: Optional[rnlp.AnalyzeIntentOptions] = None,
+    max_async_requests_to_queue: int = 0,
+) -> List[rnlp.AnalyzeIntentResponse]:
+    check_max_async_requests_to_queue(max_async_requests_to_queue)
+    return list(
+        generate_responses(
+            input_strings,
+            lambda input_string, future: nlp_service.analyze_intent(input_string, options, future=future),
+            max_async_requests_to_queue,
+        )
+    )
+
+
+def natural_query_batch(
+    nlp_service: NLPService,
+    queries: List[str],
+    contexts: Union[List[str], str],
+    top_n: int = 1,
+    max_async_requests_to_queue: int = 0,
+) -> List[rnlp.NaturalQueryResponse]:
+    check_max_async_requests_to_queue(max_async_requests_to_queue)
+    if isinstance(contexts, str):
+        contexts = [contexts] * len(queries)
+    if len(contexts) != len(queries):
+        raise ValueError(
+            f"Numbers of queries and contexts have to be equal whereas {len(queries)} queries and {len(contexts)} "
+            f"contexts were given."
+        )
+    return list(
+        generate_responses(
+            zip(queries, contexts),
+            lambda query_and_context, future: nlp_service.natural_query(*query_and_context, top_n=top_n, future=future),
+            max_async_requests_to_queue,
+        )
+    )
+
+
+def normalize_text(text: str) -> str:
+    return ' '.join(text.split())
+
+
+class CachingNLPService(NLPService):
+    """
+    :class:`NLPService` which caches results of :meth:`punctuate_text`, :meth:`classify_text` and
+    :meth:`analyze_intent` for every input text. Cache keys are made of a method name, a model name, a language code
+    and an input text with normalized whitespace. Only texts missing in a cache are sent to a server and every
+    distinct text is sent once even if it repeats in a batch. Other methods are not cached.
+
+    Hit and miss counters are available in :attr:`stats`.
+    """
+    def __init__(
+        self,
+        auth: Auth,
+        cache: Optional[TieredCache] = None,
+        max_entries: int = 10000,
+        ttl: Optional[float] = None,
+        disk_cache_path: Optional[Union[str, os.PathLike]] = None,
+    ) -> None:
+        """
+        Initializes an instance of the class.
+
+        Args:
+            auth (:obj:`Auth`): an instance of :class:`riva.client.auth.Auth` which is used for
+                authentication metadata generation.
+            cache (:obj:`riva.client.cache.TieredCache`, `optional`): a cache for serialized results. If provided,
+                then :param:`max_entries`, :param:`ttl` and :param:`disk_cache_path` are ignored.
+            max_entries (:obj:`int`, defaults to :obj:`10000`): a maximum number of results in memory.
+            ttl (:obj:`float`, `optional`): a number of seconds after which a cached result expires.
+            disk_cache_path (:obj:`Union[str, os.PathLike]`, `optional`): a path to a SQLite database which keeps
+                results between runs.
+        """
+        super().__init__(auth)
+        if cache is None:
+            cache = TieredCache(
+                LRUCache(max_entries, ttl),
+                None if disk_cache_path is None else SqliteCache(disk_cache_path, ttl),
+            )
+        self.cache = cache
+
+    @property
+    def stats(self) -> CacheStats:
+        return self.cache.stats
+
+    def _cached_call(
+        self,
+        keys: List[str],
+        input_strings: List[str],
+        request_func: Callable[[List[str], bool], Union[Message, _MultiThreadedRendezvous]],
+        split_response: Callable[[Message], List[bytes]],
+        build_response: Callable[[List[bytes]], Message],
+        future: bool,
+    ) -> Union[Message, Future]:
+        return cached_batch_call(self.cache, keys, input_strings, request_func, split_response, build_response, future)
+
+    def classify_text(
+        self, input_strings: Union[List[str], str], model_name: str, language_code: str = 'en-US', future: bool = False
+    ) -> Union[rnlp.TextClassResponse, Future]:
+        if isinstance(input_strings, str):
+            input_strings = [input_strings]
+        prefix = f'classify_text\x1f{model_name}\x1f{language_code}\x1f'
+        return self._cached_call(
+            [prefix + normalize_text(text) for text in input_strings],
+            input_strings,
+            lambda texts, f: super(CachingNLPService, self).classify_text(texts, model_name, language_code, future=f),
+            lambda response: [result.SerializeToString() for result in response.results],
+            lambda values: rnlp.TextClassResponse(
+                results=[rnlp.ClassificationResult.FromString(value) for value in values]
+            ),
+            future,
+        )
+
+    def punctuate_text(
+        self,
+        input_strings: Union[List[str], str],
+        model_name: Optional[str] = None,
+        language_code: str = 'en-US',
+        future: bool = False,
+    ) -> Union[rnlp.TextTransformResponse, Future]:
+        if isinstance(input_strings, str):
+            input_strings = [input_strings]
+        prefix = f'punctuate_text\x1f{model_name or ""}\x1f{language_code}\x1f'
+        return self._cached_call(
+            [prefix + normalize_text(text) for text in input_strings],
+            input_strings,
+            lambda texts, f: super(CachingNLPService, self).punctuate_text(texts, model_name, language_code, future=f),
+            lambda response: [text.encode('utf-8') for text in response.text],
+            lambda values: rnlp.TextTransformResponse(text=[value.decode('utf-8') for value in values]),
+            future,
+        )
+
+    def analyze_intent(
+        self, input_string: str, options: Optional[rnlp.AnalyzeIntentOptions] = None, future: bool = False
+    ) -> Union[rnlp.AnalyzeIntentResponse, Future]:
+        if options is None:
+            options = rnlp.AnalyzeIntentOptions()
+        options_digest = hashlib.sha256(options.SerializeToString(deterministic=True)).hexdigest()
+        key = f'analyze_intent\x1f{options.domain}:{options_digest}\x1f{options.lang}\x1f{normalize_text(input_string)}'
+        return self._cached_call(
+            [key],
+            [input_string],
+            lambda texts, f: super(CachingNLPService, self).analyze_intent(texts[0], options, future=f),
+            lambda response: [response.SerializeToString()],
+            lambda values: rnlp.AnalyzeIntentResponse.FromString(values[0]),
+            future,
+        )
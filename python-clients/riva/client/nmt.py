@@ -1,12 +1,25 @@
 # SPDX-FileCopyrightText: Copyright (c) 2022 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
 # SPDX-License-Identifier: MIT
 
-from typing import Callable, Dict, Generator, Iterable, List, Optional, TextIO, Union
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Dict, Generator, Iterable, List, Optional, TextIO, Tuple, Union
 from grpc._channel import _MultiThreadedRendezvous
 
 import riva.client.proto.riva_nmt_pb2 as riva_nmt
 import riva.client.proto.riva_nmt_pb2_grpc as riva_nmt_srv
 from riva.client import Auth
+from riva.client.async_utils import check_max_in_flight, ordered_async_results
+from riva.client.cache import MISSING, CacheStats, LRUCache, SqliteCache, TieredCache, cached_batch_call
+from riva.client.dnt import DNTDictionary, dnt_phrases_digest
+from riva.client.nlp import iterable_batch_generator
+
+SENTENCE_SEPARATOR_PATTERN = re.compile(r'((?<=[.!?…。！？])\s+)')
+
 
 def streaming_s2s_request_generator(
     audio_chunks: Iterable[bytes], streaming_config: riva_nmt.StreamingTranslateSpeechToSpeechConfig
@@ -23,6 +36,8 @@ def streaming_s2t_request_generator(
         yield riva_nmt.StreamingTranslateSpeechToTextRequest(audio_content=chunk)
 
 def add_dnt_phrases_dict(req, dnt_phrases_dict):
+    if isinstance(dnt_phrases_dict, DNTDictionary):
+        dnt_phrases_dict = dnt_phrases_dict.match(req.texts)
     dnt_phrases = None
     if dnt_phrases_dict is not None:
         dnt_phrases = [f"{key}##{value}" for key, value in dnt_phrases_dict.items()]
@@ -145,7 +160,7 @@ class NeuralMachineTranslationClient:
         source_language: str,
         target_language: str,
         future: bool = False,
-        dnt_phrases_dict: Optional[dict] = None,
+        dnt_phrases_dict: Optional[Union[dict, DNTDictionary]] = None,
         max_len_variation: Optional[str] = None,
     ) -> Union[riva_nmt.TranslateTextResponse, _MultiThreadedRendezvous]:
         """
@@ -155,6 +170,9 @@ class NeuralMachineTranslationClient:
             text (:obj:`list[str]`): input text.
             future (:obj:`bool`, defaults to :obj:`False`): whether to return an async result instead of usual
                 response. You can get a response by calling ``result()`` method of the future object.
+            dnt_phrases_dict (:obj:`Union[dict, riva.client.DNTDictionary]`, `optional`): phrases which are not
+                translated or are translated as given. If a :class:`riva.client.DNTDictionary` is passed, then only
+                phrases found in :param:`texts` are sent.
 
         Returns:
             :obj:`Union[riva.client.proto.riva_nmt_pb2.TranslateTextResponse, grpc._channel._MultiThreadedRendezvous]`:
@@ -174,6 +192,101 @@ class NeuralMachineTranslationClient:
         func = self.stub.TranslateText.future if future else self.stub.TranslateText
         return func(req, metadata=self.auth.get_auth_metadata())
 
+    def translate_batch(
+        self,
+        texts: Iterable[str],
+        model: str,
+        source_language: str,
+        target_languages: Union[str, List[str]],
+        batch_size: int = 8,
+        max_in_flight: int = 4,
+        dnt_phrases_dict: Optional[Union[dict, DNTDictionary]] = None,
+        max_len_variation: Optional[str] = None,
+        on_error: Optional[Callable[[Exception, List[str], str], None]] = None,
+    ) -> Generator[Tuple[str, Dict[str, str]], None, None]:
+        """
+        Translates texts from :param:`texts` into every language of :param:`target_languages` and yields a source text
+        and its translations in the order of :param:`texts`.
+
+        Texts are split into batches of :param:`batch_size` texts, and a request is sent for every batch and every
+        target language. Up to :param:`max_in_flight` requests are processed simultaneously and a new request is sent
+        as soon as any of them is finished, so requests of one batch for all target languages run concurrently.
+        :param:`texts` is read lazily and results are yielded as soon as all preceding results are ready, so memory
+        use does not depend on a number of texts, e.g. when :param:`texts` is a file object.
+
+        Args:
+            texts (:obj:`Iterable[str]`): input texts.
+            model (:obj:`str`): a name of a model. If empty, then the server selects a model.
+            source_language (:obj:`str`): a language of input texts.
+            target_languages (:obj:`Union[str, List[str]]`): a target language or a list of target languages. Repeated
+                languages are translated once.
+            batch_size (:obj:`int`, defaults to :obj:`8`): a number of texts in one request.
+            max_in_flight (:obj:`int`, defaults to :obj:`4`): a maximum number of requests processed simultaneously.
+            dnt_phrases_dict, max_len_variation: same as in :meth:`translate`.
+            on_error (:obj:`Callable[[Exception, List[str], str], None]`, `optional`): a function which is called with
+                an exception, texts of a batch and a target language when a request fails. If given, then translation
+                of later batches goes on and translations of the failed request are missing from yielded
+                dictionaries.
+
+        Yields:
+            :obj:`Tuple[str, Dict[str, str]]`: a source text and a dictionary which maps target languages to
+            translations. If a request failed and :param:`on_error` is not given, then its exception is raised when
+            the turn of its texts comes.
+        """
+        if isinstance(target_languages, str):
+            target_languages = [target_languages]
+        target_languages = list(dict.fromkeys(target_languages))
+        if not target_languages:
+            raise ValueError("Parameter `target_languages` has to contain at least one language.")
+        if batch_size < 1:
+            raise ValueError(f"Parameter `batch_size` has to be positive whereas `batch_size={batch_size}` was given.")
+        check_max_in_flight(max_in_flight)
+        batches = deque()
+
+        def requests() -> Generator[Tuple[List[str], str], None, None]:
+            for batch in iterable_batch_generator(texts, batch_size):
+                batches.append(batch)
+                for target_language in target_languages:
+                    yield batch, target_language
+
+        responses = ordered_async_results(
+            requests(),
+            lambda request: self.translate(
+                request[0],
+                model,
+                source_language,
+                request[1],
+                future=True,
+                dnt_phrases_dict=dnt_phrases_dict,
+                max_len_variation=max_len_variation,
+            ),
+            max_in_flight,
+            return_exceptions=on_error is not None,
+        )
+        translations = {}
+        for i, response in enumerate(responses):
+            target_language = target_languages[i % len(target_languages)]
+            if isinstance(response, Exception):
+                on_error(response, batches[0], target_language)
+            else:
+                translations[target_language] = [translation.text for translation in response.translations]
+            if i % len(target_languages) == len(target_languages) - 1:
+                for j, text in enumerate(batches.popleft()):
+                    yield text, {language: batch_translations[j] for language, batch_translations in translations.items()}
+                translations = {}
+
+    def incremental_session(
+        self,
+        model: str,
+        source_language: str,
+        target_language: str,
+        on_translation: Callable[[str, bool], None],
+        **kwargs,
+    ) -> 'IncrementalTranslationSession':
+        """Returns an :class:`IncrementalTranslationSession` which sends requests with this client. Keyword arguments
+        are passed to :class:`IncrementalTranslationSession`."""
+        return IncrementalTranslationSession(self, model, source_language, target_language, on_translation, **kwargs)
+
     def get_config(
             self,
             model: str,
@@ -182,3 +295,337 @@ class NeuralMachineTranslationClient:
         req = riva_nmt.AvailableLanguageRequest(model=model)
         func = self.stub.ListSupportedLanguagePairs.future if future else self.stub.ListSupportedLanguagePairs
         return func(req, metadata=self.auth.get_auth_metadata())
+
+
+class CachingNeuralMachineTranslationClient(NeuralMachineTranslationClient):
+    """
+    :class:`NeuralMachineTranslationClient` with a translation memory. :meth:`translate` looks up every text of a
+    batch in a cache and sends only texts missing in the cache to a server, every distinct text once. Cache keys are
+    made of a model name, source and target languages, a digest of a do not translate dictionary, a max length
+    variation and a text. :meth:`translate_batch` uses the cache too. Streaming methods are not cached.
+
+    Hit and miss counters are available in :attr:`stats`.
+    """
+    def __init__(
+        self,
+        auth: Auth,
+        cache: Optional[TieredCache] = None,
+        max_entries: int = 100000,
+        ttl: Optional[float] = None,
+        disk_cache_path: Optional[Union[str, os.PathLike]] = None,
+    ) -> None:
+        """
+        Initializes an instance of the class.
+
+        Args:
+            auth (:obj:`Auth`): an instance of :class:`riva.client.auth.Auth` which is used for
+                authentication metadata generation.
+            cache (:obj:`riva.client.cache.TieredCache`, `optional`): a cache for serialized translations. If
+                provided, then :param:`max_entries`, :param:`ttl` and :param:`disk_cache_path` are ignored.
+            max_entries (:obj:`int`, defaults to :obj:`100000`): a maximum number of translations in memory.
+            ttl (:obj:`float`, `optional`): a number of seconds after which a cached translation expires.
+            disk_cache_path (:obj:`Union[str, os.PathLike]`, `optional`): a path to a SQLite database which keeps
+                translations between runs.
+        """
+        super().__init__(auth)
+        if cache is None:
+            cache = TieredCache(
+                LRUCache(max_entries, ttl),
+                None if disk_cache_path is None else SqliteCache(disk_cache_path, ttl, table='translation_memory'),
+            )
+        self.cache = cache
+
+    @property
+    def stats(self) -> CacheStats:
+        return self.cache.stats
+
+    def translate(
+        self,
+        texts: List[str],
+        model: str,
+        source_language: str,
+        target_language: str,
+        future: bool = False,
+        dnt_phrases_dict: Optional[Union[dict, DNTDictionary]] = None,
+        max_len_variation: Optional[str] = None,
+    ) -> Union[riva_nmt.TranslateTextResponse, Future]:
+        prefix = (
+            f'translate\x1f{model}\x1f{source_language}\x1f{target_language}\x1f'
+            f'{dnt_phrases_digest(dnt_phrases_dict)}\x1f{max_len_variation or ""}\x1f'
+        )
+        return cached_batch_call(
+            self.cache,
+            [prefix + text for text in texts],
+            list(texts),
+            lambda miss_texts, f: super(CachingNeuralMachineTranslationClient, self).translate(
+                miss_texts,
+                model,
+                source_language,
+                target_language,
+                future=f,
+                dnt_phrases_dict=dnt_phrases_dict,
+                max_len_variation=max_len_variation,
+            ),
+            lambda response: [translation.SerializeToString() for translation in response.translations],
+            lambda values: riva_nmt.TranslateTextResponse(
+                translations=[riva_nmt.Translation.FromString(value) for value in values]
+            ),
+            future,
+        )
+
+
+class IncrementalTranslationSession:
+    """
+    Translates a growing transcript, e.g. interim ASR results of live captions, without translating the whole
+    transcript on every update.
+
+    A transcript passed to :meth:`update` is split into sentences. All sentences except the last one are considered
+    complete. Complete sentences are translated once and kept in a cache, so a request carries only new or changed
+    sentences. The last sentence is still growing and is translated on its own; when it changes, its in-flight
+    request is cancelled, and when it becomes complete, its in-flight request is reused. If :param:`is_final` is
+    :obj:`True`, then all sentences are complete.
+
+    Interim updates are debounced: a transcript is sent :param:`debounce` seconds after the last update, but not
+    later than :param:`max_delay` seconds after the first update which was not sent. Final updates are sent
+    immediately. Intermediate transcripts are skipped.
+
+    Whenever all sentences of the latest sent transcript are translated, :param:`on_translation` is called with a
+    translation of the transcript and a flag telling if the transcript was final. Calls are made from a background
+    thread, one at a time. Translations of superseded transcripts are not reported.
+
+    If a request or :param:`on_translation` fails, then the error is raised by a next call of :meth:`update`,
+    :meth:`flush` or :meth:`close`.
+
+    Args:
+        client (:obj:`NeuralMachineTranslationClient`): a client sending requests.
+        model, source_language, target_language, dnt_phrases_dict, max_len_variation: same as in
+            :meth:`NeuralMachineTranslationClient.translate`.
+        on_translation (:obj:`Callable[[str, bool], None]`): a function receiving translations.
+        debounce (:obj:`float`, defaults to :obj:`0.25`): a delay in seconds before an interim transcript is sent.
+        max_delay (:obj:`float`, defaults to :obj:`1.0`): a maximum delay in seconds of an interim transcript.
+        max_cached_sentences (:obj:`int`, defaults to :obj:`10000`): a maximum number of complete sentences whose
+            translations are cached.
+    """
+    def __init__(
+        self,
+        client: NeuralMachineTranslationClient,
+        model: str,
+        source_language: str,
+        target_language: str,
+        on_translation: Callable[[str, bool], None],
+        debounce: float = 0.25,
+        max_delay: float = 1.0,
+        max_cached_sentences: int = 10000,
+        dnt_phrases_dict: Optional[Union[dict, DNTDictionary]] = None,
+        max_len_variation: Optional[str] = None,
+    ) -> None:
+        if debounce < 0:
+            raise ValueError(f"Parameter `debounce` has to be non-negative whereas `debounce={debounce}` was given.")
+        if max_delay < debounce:
+            raise ValueError(
+                f"Parameter `max_delay` has to be greater than or equal to `debounce` whereas `max_delay={max_delay}` "
+                f"and `debounce={debounce}` were given."
+            )
+        self.client = client
+        self.model = model
+        self.source_language = source_language
+        self.target_language = target_language
+        self.on_translation = on_translation
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.dnt_phrases_dict = dnt_phrases_dict
+        self.max_len_variation = max_len_variation
+        self.n_requests = 0
+        self.n_sentences_sent = 0
+        self.n_cancelled = 0
+        self._cached = LRUCache(max_cached_sentences)
+        self._in_flight: Dict[str, Future] = {}
+        self._tail: Optional[Tuple[str, Future]] = None
+        # A generation, pieces and a final flag of the latest sent transcript.
+        self._target: Optional[Tuple[int, List[str], bool]] = None
+        self._generation = 0
+        self._emitted = 0
+        self._reported = 0
+        self._pending: Optional[Tuple[str, bool]] = None
+        self._first_pending = 0.0
+        self._deadline = 0.0
+        self._check = False
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self._cond = threading.Condition(threading.RLock())
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def update(self, text: str, is_final: bool = False) -> None:
+        """Replaces a transcript with :param:`text`. A final transcript is sent immediately."""
+        with self._cond:
+            self._raise_error()
+            if self._closed:
+                raise RuntimeError("Cannot update a closed session.")
+            now = time.monotonic()
+            if self._pending is None:
+                self._first_pending = now
+            self._pending = (text, is_final)
+            self._deadline = now if is_final else min(now + self.debounce, self._first_pending + self.max_delay)
+            self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Sends a pending transcript immediately and waits until its translation is reported."""
+        with self._cond:
+            if self._pending is not None:
+                self._deadline = time.monotonic()
+                self._cond.notify_all()
+            if not self._cond.wait_for(
+                lambda: self._error is not None or (self._pending is None and self._reported == self._generation),
+                timeout,
+            ):
+                raise TimeoutError(f"Translation was not finished in {timeout} seconds.")
+            self._raise_error()
+
+    def close(self) -> None:
+        """Flushes a pending transcript and stops the session."""
+        if self._closed:
+            return
+        try:
+            self.flush()
+        finally:
+            with self._cond:
+                self._closed = True
+                self._cond.notify_all()
+            self._thread.join()
+
+    def __enter__(self) -> 'IncrementalTranslationSession':
+        return self
+
+    def __exit__(self, type_, value, traceback) -> None:
+        self.close()
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._check and (self._pending is None or time.monotonic() < self._deadline):
+                    if self._closed and self._pending is None:
+                        return
+                    self._cond.wait(None if self._pending is None else self._deadline - time.monotonic())
+                if self._pending is not None and time.monotonic() >= self._deadline:
+                    text, is_final = self._pending
+                    self._pending = None
+                    try:
+                        self._send(text, is_final)
+                    except Exception as e:
+                        self._fail(e)
+                self._check = False
+                translation = self._collect_translation()
+            if translation is not None:
+                try:
+                    self.on_translation(*translation[1:])
+                except Exception as e:
+                    with self._cond:
+                        self._fail(e)
+                with self._cond:
+                    self._reported = translation[0]
+                    self._cond.notify_all()
+
+    def _send(self, text: str, is_final: bool) -> None:
+        self._generation += 1
+        pieces = SENTENCE_SEPARATOR_PATTERN.split(text.strip()) if text.strip() else []
+        sentences = pieces[::2]
+        tail = None if is_final or not sentences else sentences[-1]
+        complete = [
+            sentence
+            for sentence in dict.fromkeys(sentences if tail is None else sentences[:-1])
+            if sentence not in self._in_flight and self._cached.get(sentence) is MISSING
+        ]
+        self._target = (self._generation, pieces, is_final)
+        if self._tail is not None and self._tail[0] != tail:
+            old_tail, future = self._tail
+            self._tail = None
+            if old_tail in complete:
+                complete.remove(old_tail)
+                self._in_flight[old_tail] = future
+                future.add_done_callback(lambda f: self._on_complete_done([old_tail], f))
+            elif future.cancel():
+                self.n_cancelled += 1
+        if complete:
+            future = self._translate(complete)
+            for sentence in complete:
+                self._in_flight[sentence] = future
+            future.add_done_callback(lambda f: self._on_complete_done(complete, f))
+        if (
+            tail is not None
+            and self._tail is None
+            and tail not in self._in_flight
+            and self._cached.get(tail) is MISSING
+        ):
+            self._tail = (tail, self._translate([tail]))
+            self._tail[1].add_done_callback(self._on_tail_done)
+
+    def _translate(self, texts: List[str]) -> Future:
+        self.n_requests += 1
+        self.n_sentences_sent += len(texts)
+        return self.client.translate(
+            texts,
+            self.model,
+            self.source_language,
+            self.target_language,
+            future=True,
+            dnt_phrases_dict=self.dnt_phrases_dict,
+            max_len_variation=self.max_len_variation,
+        )
+
+    def _on_complete_done(self, sentences: List[str], future: Future) -> None:
+        with self._cond:
+            for sentence in sentences:
+                self._in_flight.pop(sentence, None)
+            if future.exception() is not None:
+                self._fail(future.exception())
+                return
+            for sentence, translation in zip(sentences, future.result().translations):
+                self._cached.put(sentence, translation.text)
+            self._check = True
+            self._cond.notify_all()
+
+    def _on_tail_done(self, future: Future) -> None:
+        if future.cancelled():
+            return
+        with self._cond:
+            if future.exception() is not None:
+                if self._tail is not None and self._tail[1] is future:
+                    # A failed sentence is sent again with a next update.
+                    self._tail = None
+                self._fail(future.exception())
+                return
+            self._check = True
+            self._cond.notify_all()
+
+    def _fail(self, error: BaseException) -> None:
+        self._error = error
+        self._emitted = self._reported = self._generation
+        self._cond.notify_all()
+
+    def _translation_of(self, sentence: str) -> Optional[str]:
+        translation = self._cached.get(sentence)
+        if translation is not MISSING:
+            return translation
+        if self._tail is not None and self._tail[0] == sentence and self._tail[1].done():
+            future = self._tail[1]
+            if not future.cancelled() and future.exception() is None:
+                return future.result().translations[0].text
+        return None
+
+    def _collect_translation(self) -> Optional[Tuple[int, str, bool]]:
+        if self._target is None or self._target[0] <= self._emitted:
+            return None
+        generation, pieces, is_final = self._target
+        translated = list(pieces)
+        for i in range(0, len(pieces), 2):
+            translated[i] = self._translation_of(pieces[i])
+            if translated[i] is None:
+                return None
+        self._emitted = generation
+        return generation, ''.join(translated), is_final
@@ -0,0 +1,274 @@
+# SPDX-FileCopyrightText: Copyright (c) 2022 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import os
+import threading
+import time
+import wave
+from typing import Dict, Optional, Union
+
+OVERFLOW_POLICIES = ['block', 'drop']
+
+
+class RingBuffer:
+    """
+    A byte ring buffer with preallocated storage of :param:`capacity` bytes. Writes and reads copy data into and out
+    of the storage without allocating intermediate buffers. Access is guarded by :attr:`lock`, and :attr:`changed` is
+    notified whenever data is written or read.
+    """
+    def __init__(self, capacity: int) -> None:
+        if capacity < 1:
+            raise ValueError(f"Parameter `capacity` has to be positive whereas `capacity={capacity}` was given.")
+        self.capacity = capacity
+        self._data = bytearray(capacity)
+        self._view = memoryview(self._data)
+        self._start = 0
+        self._size = 0
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def free(self) -> int:
+        return self.capacity - self._size
+
+    def write(self, data: Union[bytes, bytearray, memoryview]) -> int:
+        """Copies as much of :param:`data` as fits and returns a number of written bytes. Has to be called with
+        :attr:`lock` held."""
+        data = memoryview(data).cast('B')
+        n = min(len(data), self.free)
+        end = (self._start + self._size) % self.capacity
+        first = min(n, self.capacity - end)
+        self._view[end : end + first] = data[:first]
+        self._view[: n - first] = data[first:n]
+        self._size += n
+        if n:
+            self.changed.notify_all()
+        return n
+
+    def read_into(self, out: memoryview) -> int:
+        """Moves up to ``len(out)`` bytes into :param:`out` and returns a number of moved bytes. Has to be called
+        with :attr:`lock` held."""
+        n = min(len(out), self._size)
+        first = min(n, self.capacity - self._start)
+        out[:first] = self._view[self._start : self._start + first]
+        out[first:n] = self._view[: n - first]
+        self._start = (self._start + n) % self.capacity
+        self._size -= n
+        if n:
+            self.changed.notify_all()
+        return n
+
+    def discard(self, n: int) -> int:
+        """Drops up to :param:`n` oldest bytes and returns a number of dropped bytes. Has to be called with
+        :attr:`lock` held."""
+        n = min(n, self._size)
+        self._start = (self._start + n) % self.capacity
+        self._size -= n
+        if n:
+            self.changed.notify_all()
+        return n
+
+
+class WaveFileSink:
+    """
+    An audio sink writing to a WAV file. It stands in for an output device, e.g. on machines without audio hardware
+    or in tests. If :param:`realtime` is :obj:`True`, then a write blocks for a duration of written audio, like a
+    write to a device does.
+    """
+    def __init__(
+        self,
+        path: Union[str, os.PathLike],
+        sampwidth: int,
+        nchannels: int,
+        framerate: int,
+        realtime: bool = False,
+    ) -> None:
+        self.frame_size = sampwidth * nchannels
+        self.framerate = framerate
+        self.realtime = realtime
+        self._file = wave.open(str(path), 'wb')
+        self._file.setsampwidth(sampwidth)
+        self._file.setnchannels(nchannels)
+        self._file.setframerate(framerate)
+
+    def write(self, data: bytes) -> None:
+        self._file.writeframesraw(data)
+        if self.realtime:
+            time.sleep(len(data) / self.frame_size / self.framerate)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class PlaybackEngine:
+    """
+    Plays audio on a dedicated thread so that producers of audio, e.g. a loop reading
+    :meth:`riva.client.SpeechSynthesisService.synthesize_online` responses or
+    :class:`riva.client.AudioChunkFileIterator` sending audio to a server, never wait for an output device.
+
+    Audio written with :meth:`write` is copied into a preallocated :class:`RingBuffer` which holds up to
+    :param:`buffer_seconds` of audio. The playback thread starts playing when :param:`prebuffer_seconds` of audio are
+    buffered and writes :param:`period_frames` frames at a time to :param:`sink`. If the buffer runs dry while a
+    stream is not finished, playback waits for the prebuffer to be refilled, and an underrun is counted when more
+    audio arrives. If a write does not fit into the buffer, then it blocks until there is space if :param:`overflow`
+    is ``"block"``, or the excess is dropped and an overrun is counted if :param:`overflow` is ``"drop"``. If
+    :param:`sink` fails, then playback stops and the exception of :param:`sink` is raised from :meth:`write` and
+    :meth:`close`.
+
+    An instance can be called like :class:`riva.client.audio_io.SoundCallBack`, so it can be used as
+    ``delay_callback`` of :class:`riva.client.AudioChunkFileIterator`.
+
+    Args:
+        sink: an object with ``write(data: bytes)`` and ``close()`` methods, e.g.
+            :class:`riva.client.audio_io.PyAudioSink` or :class:`WaveFileSink`.
+        sampwidth (:obj:`int`): a number of bytes in a sample.
+        nchannels (:obj:`int`): a number of channels.
+        framerate (:obj:`int`): a number of frames per second.
+        buffer_seconds (:obj:`float`, defaults to :obj:`10.0`): a capacity of the buffer.
+        prebuffer_seconds (:obj:`float`, defaults to :obj:`0.2`): an amount of audio buffered before playback starts
+            or resumes after an underrun.
+        period_frames (:obj:`int`, defaults to :obj:`1024`): a number of frames written to :param:`sink` at once.
+        overflow (:obj:`str`, defaults to :obj:`"block"`): ``"block"`` or ``"drop"``.
+    """
+    def __init__(
+        self,
+        sink,
+        sampwidth: int,
+        nchannels: int,
+        framerate: int,
+        buffer_seconds: float = 10.0,
+        prebuffer_seconds: float = 0.2,
+        period_frames: int = 1024,
+        overflow: str = 'block',
+    ) -> None:
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(
+                f"Not allowed value '{overflow}' of parameter `overflow`. Allowed values are {OVERFLOW_POLICIES}"
+            )
+        self.sink = sink
+        self.frame_size = sampwidth * nchannels
+        self.framerate = framerate
+        self.overflow = overflow
+        self.period_bytes = period_frames * self.frame_size
+        capacity = max(int(buffer_seconds * framerate) * self.frame_size, self.period_bytes)
+        self.prebuffer_bytes = min(int(prebuffer_seconds * framerate) * self.frame_size, capacity)
+        self._buffer = RingBuffer(capacity)
+        self._finishing = False
+        self._stopped = False
+        self._error: Optional[BaseException] = None
+        self.underruns = 0
+        self.overruns = 0
+        self.dropped_bytes = 0
+        self.played_bytes = 0
+        self._thread = threading.Thread(target=self._play, daemon=True)
+        self._thread.start()
+
+    @property
+    def opened(self) -> bool:
+        return not self._finishing
+
+    @property
+    def buffered_seconds(self) -> float:
+        return len(self._buffer) / self.frame_size / self.framerate
+
+    @property
+    def stats(self) -> Dict[str, Union[int, float]]:
+        return {
+            'underruns': self.underruns,
+            'overruns': self.overruns,
+            'dropped_seconds': self.dropped_bytes / self.frame_size / self.framerate,
+            'played_seconds': self.played_bytes / self.frame_size / self.framerate,
+        }
+
+    def write(self, audio_data: bytes, timeout: Optional[float] = None) -> int:
+        """
+        Adds :param:`audio_data` to the buffer and returns a number of buffered bytes. Blocks only if the buffer is
+        full and :attr:`overflow` is ``"block"``. If :param:`timeout` seconds pass, the rest of the data is dropped
+        and counted as an overrun.
+        """
+        if self._error is not None:
+            raise self._error
+        if self._finishing:
+            raise RuntimeError("Cannot write to a closed playback engine.")
+        data = memoryview(audio_data).cast('B')
+        deadline = None if timeout is None else time.monotonic() + timeout
+        written = 0
+        with self._buffer.lock:
+            while True:
+                written += self._buffer.write(data[written:])
+                if written == len(data) or self.overflow == 'drop' or self._stopped:
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._buffer.changed.wait(remaining)
+            if self._error is not None:
+                raise self._error
+            if written < len(data):
+                self.overruns += 1
+                self.dropped_bytes += len(data) - written
+        return written
+
+    def __call__(self, audio_data: bytes, audio_length: Optional[float] = None) -> None:
+        self.write(audio_data)
+
+    def _play(self) -> None:
+        view = memoryview(bytearray(self.period_bytes))
+        buffer = self._buffer
+        min_start_bytes = max(self.prebuffer_bytes, self.frame_size)
+        prebuffering = True
+        starved = False
+        while True:
+            with buffer.lock:
+                while True:
+                    if self._stopped:
+                        return
+                    available = len(buffer)
+                    if self._finishing and not available:
+                        return
+                    if self._finishing or available >= (min_start_bytes if prebuffering else self.frame_size):
+                        break
+                    if not prebuffering:
+                        # The buffer ran dry. It is an underrun only if a stream goes on, not if it has ended.
+                        starved = True
+                        prebuffering = True
+                    buffer.changed.wait()
+                if starved:
+                    self.underruns += 1
+                    starved = False
+                prebuffering = False
+                # Only whole frames are played unless a stream is finished.
+                if not self._finishing:
+                    available -= available % self.frame_size
+                n = buffer.read_into(view[: min(self.period_bytes, available)])
+            try:
+                self.sink.write(bytes(view[:n]))
+            except BaseException as e:
+                with buffer.lock:
+                    self._error = e
+                    self._stopped = True
+                    buffer.changed.notify_all()
+                return
+            self.played_bytes += n
+
+    def close(self, drain: bool = True) -> None:
+        """Stops accepting audio, plays buffered audio if :param:`drain` is :obj:`True`, and closes the sink. Raises
+        an exception of the sink if playback failed."""
+        with self._buffer.lock:
+            self._finishing = True
+            if not drain:
+                self._stopped = True
+            self._buffer.changed.notify_all()
+        self._thread.join()
+        self.sink.close()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self) -> 'PlaybackEngine':
+        return self
+
+    def __exit__(self, type_, value, traceback) -> None:
+        self.close()
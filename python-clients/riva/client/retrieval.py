@@ -0,0 +1,230 @@
+# SPDX-FileCopyrightText: Copyright (c) 2022 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import hashlib
+import heapq
+import json
+import math
+import os
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+import riva.client.proto.riva_nlp_pb2 as rnlp
+from riva.client.nlp import NLPService, natural_query_batch
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def document_id(text: str) -> str:
+    """Returns an id of a document made of a digest of its text, so the id does not depend on a document position."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+
+def chunk_text(text: str, chunk_words: int = 128, chunk_overlap: int = 32) -> List[str]:
+    """Splits :param:`text` into chunks of :param:`chunk_words` words. Neighboring chunks share
+    :param:`chunk_overlap` words so that an answer on a chunk border is fully contained in one of chunks."""
+    if not 0 <= chunk_overlap < chunk_words:
+        raise ValueError(
+            f"Parameter `chunk_overlap` has to be not negative and less than `chunk_words` whereas "
+            f"`chunk_overlap={chunk_overlap}` and `chunk_words={chunk_words}` were given."
+        )
+    words = text.split()
+    chunks = []
+    for start in range(0, max(len(words) - chunk_overlap, 1), chunk_words - chunk_overlap):
+        chunks.append(' '.join(words[start : start + chunk_words]))
+    return chunks
+
+
+class Passage:
+    __slots__ = ('doc_id', 'text', 'score')
+
+    def __init__(self, doc_id: str, text: str, score: float = 0.0) -> None:
+        self.doc_id = doc_id
+        self.text = text
+        self.score = score
+
+    def __repr__(self) -> str:
+        return f"Passage(doc_id={self.doc_id!r}, score={self.score:.3f}, text={self.text[:40]!r})"
+
+
+class BM25Index:
+    """
+    An in-process Okapi BM25 index over chunks of documents. It is used to select short contexts for
+    :meth:`riva.client.NLPService.natural_query` instead of sending whole documents.
+
+    Documents are added, replaced and removed one by one, and a document whose text has not changed is not
+    reindexed, so an index loaded with :meth:`load` can be updated incrementally and saved again with :meth:`save`.
+
+    Args:
+        chunk_words (:obj:`int`, defaults to :obj:`128`): a number of words in a chunk.
+        chunk_overlap (:obj:`int`, defaults to :obj:`32`): a number of words shared by neighboring chunks.
+        k1 (:obj:`float`, defaults to :obj:`1.5`): BM25 term frequency saturation parameter.
+        b (:obj:`float`, defaults to :obj:`0.75`): BM25 length normalization parameter.
+    """
+    def __init__(self, chunk_words: int = 128, chunk_overlap: int = 32, k1: float = 1.5, b: float = 0.75) -> None:
+        self.chunk_words = chunk_words
+        self.chunk_overlap = chunk_overlap
+        self.k1 = k1
+        self.b = b
+        self._documents: Dict[str, Dict[str, Union[str, List[int]]]] = {}
+        self._chunks: Dict[int, Passage] = {}
+        self._chunk_lengths: Dict[int, int] = {}
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._total_length = 0
+        self._next_chunk_id = 0
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    @property
+    def n_chunks(self) -> int:
+        return len(self._chunks)
+
+    def add_document(self, doc_id: str, text: str) -> bool:
+        """
+        Adds or replaces a document. Returns :obj:`False` if a document with the same id and text is already
+        indexed.
+        """
+        digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        if doc_id in self._documents:
+            if self._documents[doc_id]['digest'] == digest:
+                return False
+            self.remove_document(doc_id)
+        chunk_ids = []
+        for chunk in chunk_text(text, self.chunk_words, self.chunk_overlap):
+            chunk_ids.append(self._add_chunk(doc_id, chunk))
+        self._documents[doc_id] = {'digest': digest, 'chunk_ids': chunk_ids}
+        return True
+
+    def add_documents(self, texts: Iterable[str], doc_id_prefix: str = '', remove_missing: bool = False) -> int:
+        """
+        Adds documents with ids made of :param:`doc_id_prefix` and :func:`document_id` of their texts, so inserting
+        or removing a document does not change ids of other documents and does not reindex them. If
+        :param:`remove_missing` is :obj:`True`, then documents with ids starting with :param:`doc_id_prefix` which are
+        not in :param:`texts` are removed, e.g. when an index loaded with :meth:`load` is updated from a source
+        whose lines were deleted. Returns a number of (re)indexed documents.
+        """
+        n_indexed = 0
+        doc_ids = set()
+        for text in texts:
+            doc_id = f'{doc_id_prefix}{document_id(text)}'
+            doc_ids.add(doc_id)
+            n_indexed += self.add_document(doc_id, text)
+        if remove_missing:
+            for doc_id in [d for d in self._documents if d.startswith(doc_id_prefix) and d not in doc_ids]:
+                self.remove_document(doc_id)
+        return n_indexed
+
+    def remove_document(self, doc_id: str) -> None:
+        for chunk_id in self._documents.pop(doc_id)['chunk_ids']:
+            for term in set(tokenize(self._chunks.pop(chunk_id).text)):
+                postings = self._postings[term]
+                del postings[chunk_id]
+                if not postings:
+                    del self._postings[term]
+            self._total_length -= self._chunk_lengths.pop(chunk_id)
+
+    def _add_chunk(self, doc_id: str, text: str) -> int:
+        chunk_id = self._next_chunk_id
+        self._next_chunk_id += 1
+        terms = tokenize(text)
+        self._chunks[chunk_id] = Passage(doc_id, text)
+        self._chunk_lengths[chunk_id] = len(terms)
+        self._total_length += len(terms)
+        for term, count in Counter(terms).items():
+            self._postings.setdefault(term, {})[chunk_id] = count
+        return chunk_id
+
+    def search(self, query: str, top_k: int = 3) -> List[Passage]:
+        """Returns up to :param:`top_k` chunks with the highest BM25 scores for :param:`query`. Chunks sharing no
+        terms with :param:`query` are not returned."""
+        if not self._chunks:
+            return []
+        n_chunks = len(self._chunks)
+        mean_length = self._total_length / n_chunks
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_chunks - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self._chunk_lengths[chunk_id] / mean_length)
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        best = heapq.nlargest(top_k, scores.items(), key=lambda x: x[1])
+        return [Passage(self._chunks[i].doc_id, self._chunks[i].text, score) for i, score in best]
+
+    def save(self, path: Union[str, os.PathLike]) -> None:
+        path = Path(path).expanduser()
+        state = {
+            'params': {'chunk_words': self.chunk_words, 'chunk_overlap': self.chunk_overlap, 'k1': self.k1, 'b': self.b},
+            'documents': {
+                doc_id: {'digest': doc['digest'], 'chunks': [self._chunks[i].text for i in doc['chunk_ids']]}
+                for doc_id, doc in self._documents.items()
+            },
+        }
+        tmp_path = path.with_name(path.name + '.tmp')
+        with tmp_path.open('w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Union[str, os.PathLike]) -> 'BM25Index':
+        with Path(path).expanduser().open(encoding='utf-8') as f:
+            state = json.load(f)
+        index = cls(**state['params'])
+        for doc_id, doc in state['documents'].items():
+            index._documents[doc_id] = {
+                'digest': doc['digest'], 'chunk_ids': [index._add_chunk(doc_id, chunk) for chunk in doc['chunks']]
+            }
+        return index
+
+
+def natural_query_with_index(
+    nlp_service: NLPService,
+    index: BM25Index,
+    query: str,
+    top_k: int = 3,
+    top_n: int = 1,
+    max_async_requests_to_queue: Optional[int] = None,
+) -> rnlp.NaturalQueryResponse:
+    """
+    Answers :param:`query` using the best :param:`top_k` passages of :param:`index` as contexts. A separate
+    :meth:`riva.client.NLPService.natural_query` request is sent for every passage, requests are processed
+    concurrently and answers from all passages are merged by score. An answer found in several overlapping passages
+    is returned once with its best score.
+
+    Args:
+        nlp_service (:obj:`NLPService`): a service which sends requests.
+        index (:obj:`BM25Index`): an index with documents.
+        query (:obj:`str`): a natural language query.
+        top_k (:obj:`int`, defaults to :obj:`3`): a number of passages to query.
+        top_n (:obj:`int`, defaults to :obj:`1`): a maximum number of answers to return.
+        max_async_requests_to_queue (:obj:`int`, `optional`): a number of requests kept in flight. Defaults to
+            :param:`top_k`.
+
+    Returns:
+        :obj:`riva.client.proto.riva_nlp_pb2.NaturalQueryResponse`: at most :param:`top_n` answers sorted by score.
+    """
+    passages = index.search(query, top_k)
+    if not passages:
+        return rnlp.NaturalQueryResponse()
+    responses = natural_query_batch(
+        nlp_service,
+        [query] * len(passages),
+        [p.text for p in passages],
+        top_n=top_n,
+        max_async_requests_to_queue=len(passages) if max_async_requests_to_queue is None else max_async_requests_to_queue,
+    )
+    results = [result for response in responses for result in response.results]
+    results.sort(key=lambda result: result.score, reverse=True)
+    best_results = {}
+    for result in results:
+        best_results.setdefault(result.answer.strip(), result)
+    return rnlp.NaturalQueryResponse(results=list(best_results.values())[:top_n])
@@ -0,0 +1,436 @@
+# SPDX-FileCopyrightText: Copyright (c) 2022 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import queue
+import threading
+import time
+from functools import partial
+from typing import Any, Callable, Dict, Generator, Iterable, List, Optional, Tuple, Union
+
+import riva.client.proto.riva_asr_pb2 as rasr
+import riva.client.proto.riva_nmt_pb2 as riva_nmt
+from riva.client.asr import ASRService
+from riva.client.async_utils import STREAM_END, StreamFailure, merge_iterables, put_until_stopped
+from riva.client.audio_buffer import AudioBuffer, to_audio_bytes
+from riva.client.nmt import NeuralMachineTranslationClient
+from riva.client.tts import SpeechSynthesisService, VoiceProfile
+
+
+class LatencyStats:
+    """Thread-safe latency counters of one pipeline stage. Latencies are in seconds."""
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.n_items = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def add(self, latency: float) -> None:
+        with self._lock:
+            self.n_items += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+
+    @property
+    def mean_latency(self) -> float:
+        return self.total_latency / self.n_items if self.n_items else 0.0
+
+    def as_dict(self) -> Dict[str, Union[int, float]]:
+        return {'n_items': self.n_items, 'mean_latency': self.mean_latency, 'max_latency': self.max_latency}
+
+
+class SpeechTranslationEvent:
+    """
+    A chunk of synthesized translation. :attr:`index` is a number of an utterance, i.e. of a final ASR result, which
+    :attr:`transcript` and :attr:`translation` belong to. :attr:`audio` is synthesized audio of :attr:`translation`.
+    """
+    __slots__ = ('index', 'transcript', 'translation', 'audio')
+
+    def __init__(self, index: int, transcript: str, translation: str, audio: bytes) -> None:
+        self.index = index
+        self.transcript = transcript
+        self.translation = translation
+        self.audio = audio
+
+
+class _Utterance:
+    __slots__ = ('index', 'transcript', 'translation', 'audio_sent')
+
+    def __init__(self, index: int, transcript: str, audio_sent: float) -> None:
+        self.index = index
+        self.transcript = transcript
+        self.translation = ''
+        self.audio_sent = audio_sent
+
+
+class SpeechTranslationPipeline:
+    """
+    Speech-to-speech translation composed on a client of streaming ASR, NMT and online TTS. Unlike
+    :meth:`riva.client.NeuralMachineTranslationClient.streaming_s2s_response_generator` it does not require a
+    speech-to-speech pipeline deployed on a server, only ASR, NMT and TTS models.
+
+    Every stage runs on its own thread. Final ASR results are translated as soon as they arrive, and translations are
+    synthesized while later speech is still being recognized and translated. Stages are connected by queues holding
+    up to :param:`max_queue_size` utterances, so a slow stage holds back earlier stages instead of accumulating
+    results in memory.
+
+    Latencies are collected in :attr:`stats`:
+
+    - ``"asr"``: from sending the last audio chunk before a final result until the result is received;
+    - ``"nmt"``: a translation request duration;
+    - ``"tts_first_audio"``: from a synthesis request until its first audio chunk;
+    - ``"tts"``: a synthesis request duration;
+    - ``"end_to_end"``: from sending the last audio chunk before a final result until the first chunk of synthesized
+      translation is yielded.
+
+    Args:
+        asr_service (:obj:`riva.client.ASRService`): a service recognizing source speech.
+        nmt_client (:obj:`riva.client.NeuralMachineTranslationClient`): a client translating transcripts.
+        tts_service (:obj:`riva.client.SpeechSynthesisService`): a service synthesizing translations.
+        streaming_config (:obj:`riva.client.StreamingRecognitionConfig`): a config of recognition.
+        model (:obj:`str`): a name of a translation model.
+        source_language (:obj:`str`): a language of speech.
+        target_language (:obj:`str`): a language of translations.
+        voice_profile (:obj:`riva.client.VoiceProfile`): voice settings of synthesis.
+        max_queue_size (:obj:`int`, defaults to :obj:`4`): a maximum number of utterances waiting between stages.
+        dnt_phrases_dict (:obj:`dict`, `optional`): same as in
+            :meth:`riva.client.NeuralMachineTranslationClient.translate`.
+    """
+    def __init__(
+        self,
+        asr_service: ASRService,
+        nmt_client: NeuralMachineTranslationClient,
+        tts_service: SpeechSynthesisService,
+        streaming_config: rasr.StreamingRecognitionConfig,
+        model: str,
+        source_language: str,
+        target_language: str,
+        voice_profile: VoiceProfile,
+        max_queue_size: int = 4,
+        dnt_phrases_dict: Optional[dict] = None,
+    ) -> None:
+        if max_queue_size < 1:
+            raise ValueError(f"Parameter `max_queue_size` has to be positive whereas `{max_queue_size}` was given.")
+        self.asr_service = asr_service
+        self.nmt_client = nmt_client
+        self.tts_service = tts_service
+        self.streaming_config = streaming_config
+        self.model = model
+        self.source_language = source_language
+        self.target_language = target_language
+        self.voice_profile = voice_profile
+        self.max_queue_size = max_queue_size
+        self.dnt_phrases_dict = dnt_phrases_dict
+        self.stats = {name: LatencyStats() for name in ['asr', 'nmt', 'tts_first_audio', 'tts', 'end_to_end']}
+
+    def generate(
+        self, audio_chunks: Iterable[Union[bytes, AudioBuffer]]
+    ) -> Generator[SpeechTranslationEvent, None, None]:
+        """
+        Recognizes, translates and synthesizes speech from :param:`audio_chunks` and yields synthesized audio as it
+        becomes available. Events of an utterance are yielded before events of the next utterance. If a stage fails,
+        then the error is raised here. Closing the generator stops all stages.
+        """
+        stop = threading.Event()
+        transcripts: queue.Queue = queue.Queue(self.max_queue_size)
+        translations: queue.Queue = queue.Queue(self.max_queue_size)
+        events: queue.Queue = queue.Queue(self.max_queue_size)
+        threads = [
+            threading.Thread(target=_run_stage, args=(self._recognize, audio_chunks, transcripts, stop)),
+            threading.Thread(target=_run_stage, args=(self._translate, transcripts, translations, stop)),
+            threading.Thread(target=_run_stage, args=(self._synthesize, translations, events, stop)),
+        ]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        try:
+            first_audio_index = -1
+            while True:
+                item = events.get()
+                if item is STREAM_END:
+                    break
+                if isinstance(item, StreamFailure):
+                    raise item.error
+                utterance, audio = item
+                if utterance.index != first_audio_index:
+                    first_audio_index = utterance.index
+                    self.stats['end_to_end'].add(time.monotonic() - utterance.audio_sent)
+                yield SpeechTranslationEvent(utterance.index, utterance.transcript, utterance.translation, audio)
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+    def _recognize(
+        self,
+        audio_chunks: Iterable[Union[bytes, AudioBuffer]],
+        put: Callable[[Any], None],
+        stop: threading.Event,
+    ) -> None:
+        last_sent = [time.monotonic()]
+
+        def timed_chunks() -> Generator[Union[bytes, AudioBuffer], None, None]:
+            # Ending the request stream on stop lets a server close the response stream.
+            for chunk in audio_chunks:
+                if stop.is_set():
+                    return
+                last_sent[0] = time.monotonic()
+                yield chunk
+
+        index = 0
+        for response in self.asr_service.streaming_response_generator(timed_chunks(), self.streaming_config):
+            for result in response.results:
+                if not result.is_final or not result.alternatives:
+                    continue
+                transcript = result.alternatives[0].transcript.strip()
+                if not transcript:
+                    continue
+                self.stats['asr'].add(time.monotonic() - last_sent[0])
+                put(_Utterance(index, transcript, last_sent[0]))
+                index += 1
+
+    def _translate(
+        self, utterances: Iterable[_Utterance], put: Callable[[Any], None], stop: threading.Event
+    ) -> None:
+        for utterance in utterances:
+            start = time.monotonic()
+            response = self.nmt_client.translate(
+                [utterance.transcript],
+                self.model,
+                self.source_language,
+                self.target_language,
+                dnt_phrases_dict=self.dnt_phrases_dict,
+            )
+            self.stats['nmt'].add(time.monotonic() - start)
+            utterance.translation = response.translations[0].text
+            put(utterance)
+
+    def _synthesize(
+        self, utterances: Iterable[_Utterance], put: Callable[[Any], None], stop: threading.Event
+    ) -> None:
+        for utterance in utterances:
+            if not utterance.translation.strip():
+                continue
+            start = time.monotonic()
+            first = True
+            for response in self.tts_service.synthesize_online_with_profile(utterance.translation, self.voice_profile):
+                if first:
+                    self.stats['tts_first_audio'].add(time.monotonic() - start)
+                    first = False
+                put((utterance, response.audio))
+            self.stats['tts'].add(time.monotonic() - start)
+
+
+class AudioTee:
+    """
+    Reads audio chunks once and passes them to :param:`n_consumers` consumers, e.g. to several streaming requests.
+    Every consumer receives the same chunk objects, so audio is not copied per consumer. Chunks are read on a
+    background thread after :meth:`start` is called. Up to :param:`max_buffered_chunks` chunks wait for each consumer,
+    so the slowest consumer limits the reading rate and memory use is bounded.
+
+    If :param:`split` is given, then it is called once for every chunk and consumer ``i`` receives the ``i``-th
+    element of its result instead of the chunk, e.g. one channel of multichannel audio.
+
+    If reading fails, then consumers stop receiving chunks and the error is kept in :attr:`error`.
+    """
+    def __init__(
+        self,
+        audio_chunks: Iterable[Union[bytes, AudioBuffer]],
+        n_consumers: int,
+        max_buffered_chunks: int = 64,
+        split: Optional[Callable[[bytes], List[bytes]]] = None,
+    ) -> None:
+        if n_consumers < 1:
+            raise ValueError(f"Parameter `n_consumers` has to be positive whereas `{n_consumers}` was given.")
+        if max_buffered_chunks < 1:
+            raise ValueError(
+                f"Parameter `max_buffered_chunks` has to be positive whereas `{max_buffered_chunks}` was given."
+            )
+        self.audio_chunks = audio_chunks
+        self.split = split
+        self.error: Optional[BaseException] = None
+        self._queues = [queue.Queue(max_buffered_chunks) for _ in range(n_consumers)]
+        self._detached = [threading.Event() for _ in range(n_consumers)]
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._read, daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def close(self) -> None:
+        """Stops reading and ends all consumers."""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def detach(self, index: int) -> None:
+        """Stops passing chunks to consumer :param:`index`, e.g. when its stream ended, so it does not hold back other
+        consumers."""
+        self._detached[index].set()
+
+    def consumer(self, index: int, stop: Optional[threading.Event] = None) -> Generator[bytes, None, None]:
+        """Yields chunks for consumer :param:`index` until reading ends, the tee is closed or :param:`stop` is set."""
+        q = self._queues[index]
+        while True:
+            try:
+                item = q.get(timeout=0.1)
+            except queue.Empty:
+                if self._stop.is_set() or (stop is not None and stop.is_set()):
+                    return
+                continue
+            if item is STREAM_END:
+                return
+            yield item
+
+    def _read(self) -> None:
+        try:
+            for chunk in self.audio_chunks:
+                # A buffer is converted once and the same bytes are shared by all consumers.
+                chunk = to_audio_bytes(chunk)
+                pieces = [chunk] * len(self._queues) if self.split is None else self.split(chunk)
+                for i, piece in enumerate(pieces):
+                    if not self._put(i, piece):
+                        return
+        except BaseException as e:
+            self.error = e
+        for i in range(len(self._queues)):
+            self._put(i, STREAM_END)
+
+    def _put(self, index: int, item: Any) -> bool:
+        """Returns :obj:`False` if reading was stopped. A detached consumer does not receive the item."""
+        delivered = put_until_stopped(self._queues[index], item, self._stop, self._detached[index])
+        return delivered or not self._stop.is_set()
+
+
+class MultiTargetSpeechToText:
+    """
+    Translates one stream of speech into several languages. Audio is read once and teed with :class:`AudioTee` into
+    concurrent :meth:`riva.client.NeuralMachineTranslationClient.streaming_s2t_response_generator` streams, one per
+    target language. Responses of all streams are merged into one stream of ``(target_language, response)`` pairs.
+
+    Latencies of final results per target language are collected in :attr:`stats`. A latency is a time from sending
+    the last audio chunk before a final result to the stream of the language until the result is received.
+
+    Args:
+        nmt_client (:obj:`riva.client.NeuralMachineTranslationClient`): a client which opens streams.
+        streaming_config (:obj:`riva.client.StreamingTranslateSpeechToTextConfig`): a config of streams. A target
+            language of its translation config is replaced with each of :param:`target_languages`.
+        target_languages (:obj:`List[str]`): languages of translations.
+        max_buffered_chunks (:obj:`int`, defaults to :obj:`64`): a maximum number of audio chunks waiting to be sent
+            in one stream.
+    """
+    def __init__(
+        self,
+        nmt_client: NeuralMachineTranslationClient,
+        streaming_config: riva_nmt.StreamingTranslateSpeechToTextConfig,
+        target_languages: List[str],
+        max_buffered_chunks: int = 64,
+    ) -> None:
+        if not target_languages:
+            raise ValueError("Parameter `target_languages` has to contain at least one language.")
+        if len(set(target_languages)) != len(target_languages):
+            raise ValueError(f"Parameter `target_languages` contains repeated languages: {target_languages}.")
+        self.nmt_client = nmt_client
+        self.streaming_config = streaming_config
+        self.target_languages = list(target_languages)
+        self.max_buffered_chunks = max_buffered_chunks
+        self.stats = {language: LatencyStats() for language in self.target_languages}
+
+    def config(self, target_language: str) -> riva_nmt.StreamingTranslateSpeechToTextConfig:
+        """Returns a copy of :param:`streaming_config` for :param:`target_language`."""
+        config = riva_nmt.StreamingTranslateSpeechToTextConfig()
+        config.CopyFrom(self.streaming_config)
+        config.translation_config.target_language_code = target_language
+        return config
+
+    def generate(
+        self, audio_chunks: Union[Iterable[Union[bytes, AudioBuffer]], AudioBuffer], chunk_n_frames: int = 1600
+    ) -> Generator[Tuple[str, riva_nmt.StreamingTranslateSpeechToTextResponse], None, None]:
+        """
+        Yields ``(target_language, response)`` pairs as responses of all streams arrive. If :param:`audio_chunks` is an
+        :class:`riva.client.AudioBuffer`, then it is sent in chunks of :param:`chunk_n_frames` frames. If a stream or
+        reading of audio fails, then the error is raised here. Closing the generator stops all streams.
+        """
+        if isinstance(audio_chunks, AudioBuffer):
+            audio_chunks = audio_chunks.chunks(chunk_n_frames)
+        tee = AudioTee(audio_chunks, len(self.target_languages), self.max_buffered_chunks)
+        tee.start()
+        try:
+            for i, response in merge_iterables(
+                [partial(self._translate, tee, i) for i in range(len(self.target_languages))],
+                self.max_buffered_chunks,
+            ):
+                yield self.target_languages[i], response
+            if tee.error is not None:
+                raise tee.error
+        finally:
+            tee.close()
+
+    def _translate(
+        self, tee: AudioTee, index: int, stop: threading.Event
+    ) -> Generator[riva_nmt.StreamingTranslateSpeechToTextResponse, None, None]:
+        target_language = self.target_languages[index]
+        audio_chunks = tee.consumer(index, stop)
+        last_sent = [time.monotonic()]
+
+        def timed_chunks() -> Generator[bytes, None, None]:
+            # Ending the request stream on stop lets a server close the response stream.
+            for chunk in audio_chunks:
+                if stop.is_set():
+                    return
+                last_sent[0] = time.monotonic()
+                yield chunk
+
+        try:
+            for response in self.nmt_client.streaming_s2t_response_generator(
+                timed_chunks(), self.config(target_language)
+            ):
+                if any(result.is_final for result in response.results):
+                    self.stats[target_language].add(time.monotonic() - last_sent[0])
+                yield response
+        finally:
+            # A finished stream must not hold back reading of other streams.
+            tee.detach(index)
+
+
+def _run_stage(stage: Callable[..., None], source: Any, target: queue.Queue, stop: threading.Event) -> None:
+    def put(item: Any) -> None:
+        if not put_until_stopped(target, item, stop):
+            raise _Stopped()
+
+    try:
+        if isinstance(source, queue.Queue):
+            source = _queue_items(source, stop)
+        stage(source, put, stop)
+        put(STREAM_END)
+    except _Stopped:
+        pass
+    except _UpstreamError as e:
+        put_until_stopped(target, e.item, stop)
+    except BaseException as e:
+        put_until_stopped(target, StreamFailure(e), stop)
+
+
+class _Stopped(Exception):
+    pass
+
+
+class _UpstreamError(Exception):
+    def __init__(self, item: StreamFailure) -> None:
+        super().__init__()
+        self.item = item
+
+
+def _queue_items(source: queue.Queue, stop: threading.Event) -> Generator[Any, None, None]:
+    while True:
+        try:
+            item = source.get(timeout=0.1)
+        except queue.Empty:
+            if stop.is_set():
+                raise _Stopped()
+            continue
+        if item is STREAM_END:
+            return
+        if isinstance(item, StreamFailure):
+            raise _UpstreamError(item)
+        yield item
+
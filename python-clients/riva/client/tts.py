@@ -1,16 +1,33 @@
 # SPDX-FileCopyrightText: Copyright (c) 2022 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
 # SPDX-License-Identifier: MIT
 
-from typing import Generator, Optional, Union
+import functools
+import hashlib
+import io
+import os
+import re
+import struct
+import unicodedata
+import warnings
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Generator, Iterable, List, Optional, Union
 
 from grpc._channel import _MultiThreadedRendezvous
 
 import riva.client.proto.riva_tts_pb2 as rtts
 import riva.client.proto.riva_tts_pb2_grpc as rtts_srv
 from riva.client import Auth
+from riva.client.async_utils import ordered_async_results
+from riva.client.audio_buffer import AudioBuffer
+from riva.client.cache import MISSING, CacheStats, LRUCache, MmapFileCache, TieredCache
 from riva.client.proto.riva_audio_pb2 import AudioEncoding
 import wave
 
+# Full-width CJK punctuation is usually not followed by a space, so whitespace after it is optional.
+SENTENCE_BOUNDARY_PATTERN = re.compile(r'(?<=[.!?…])\s+|(?<=[。！？])\s*')
+CLAUSE_BOUNDARY_PATTERN = re.compile(r'(?<=[,;:])\s+|(?<=[，；：])\s*')
+
 def add_custom_dictionary_to_config(req, custom_dictionary):
     result_list = None
     if custom_dictionary is not None:
@@ -19,6 +36,201 @@ def add_custom_dictionary_to_config(req, custom_dictionary):
         result_string = ','.join(result_list)
         req.custom_dictionary = result_string
 
+
+def _join_pieces(left: str, right: str) -> str:
+    # Chinese and Japanese text has no spaces between words, clauses and sentences.
+    wide = unicodedata.east_asian_width(left[-1]) in 'WF' or unicodedata.east_asian_width(right[0]) in 'WF'
+    return left + right if wide else left + ' ' + right
+
+
+def _pack_pieces(pieces: List[str], max_chars: int) -> List[str]:
+    # Joins neighboring pieces while a result is not longer than `max_chars`. Longer pieces are split by words, and
+    # pieces without spaces are cut every `max_chars` characters.
+    chunks: List[str] = []
+    for piece in pieces:
+        if len(piece) > max_chars:
+            if ' ' in piece:
+                chunks += _pack_pieces(piece.split(), max_chars)
+            else:
+                chunks += [piece[i : i + max_chars] for i in range(0, len(piece), max_chars)]
+        elif chunks and len(_join_pieces(chunks[-1], piece)) <= max_chars:
+            chunks[-1] = _join_pieces(chunks[-1], piece)
+        else:
+            chunks.append(piece)
+    return chunks
+
+
+def split_text_for_synthesis(text: str, max_chars: int = 400, first_chunk_max_chars: Optional[int] = 100) -> List[str]:
+    """
+    Splits :param:`text` into sentences which can be synthesized independently. Sentences longer than
+    :param:`max_chars` characters are split at clause boundaries, then at spaces, and then at every
+    :param:`max_chars` characters if a piece has no spaces, e.g. in Chinese or Japanese. If the first sentence
+    is longer than :param:`first_chunk_max_chars`, then its first clauses form a separate chunk so that audio for
+    the beginning of a text is ready sooner.
+    """
+    if max_chars < 1:
+        raise ValueError(f"Parameter `max_chars` has to be positive whereas `max_chars={max_chars}` was given.")
+    chunks = []
+    for sentence in SENTENCE_BOUNDARY_PATTERN.split(text.strip()):
+        if sentence:
+            chunks += _pack_pieces(CLAUSE_BOUNDARY_PATTERN.split(sentence), max_chars)
+    if first_chunk_max_chars is not None and chunks and len(chunks[0]) > first_chunk_max_chars:
+        head = _pack_pieces(CLAUSE_BOUNDARY_PATTERN.split(chunks[0]), first_chunk_max_chars)
+        chunks[:1] = head[:1] + ([functools.reduce(_join_pieces, head[1:])] if len(head) > 1 else [])
+    return chunks
+
+
+def _build_request(
+    text: str,
+    voice_name: Optional[str],
+    language_code: str,
+    encoding: AudioEncoding,
+    sample_rate_hz: int,
+    zero_shot_audio_prompt_file: Optional[Union[str, os.PathLike]],
+    audio_prompt_encoding: AudioEncoding,
+    zero_shot_quality: int,
+    custom_dictionary: Optional[dict],
+    zero_shot_transcript: Optional[str],
+) -> rtts.SynthesizeSpeechRequest:
+    # Builds a request as is. Parameters are validated by a server, or by `VoiceProfile`.
+    req = rtts.SynthesizeSpeechRequest(
+        text=text,
+        language_code=language_code,
+        sample_rate_hz=sample_rate_hz,
+        encoding=encoding,
+    )
+    if voice_name is not None:
+        req.voice_name = voice_name
+    if zero_shot_audio_prompt_file is not None:
+        with Path(zero_shot_audio_prompt_file).expanduser().open('rb') as f:
+            req.zero_shot_data.audio_prompt = f.read()
+        req.zero_shot_data.encoding = audio_prompt_encoding
+        req.zero_shot_data.quality = zero_shot_quality
+        if zero_shot_transcript is not None:
+            req.zero_shot_data.transcript = zero_shot_transcript
+    add_custom_dictionary_to_config(req, custom_dictionary)
+    return req
+
+
+class VoiceProfile:
+    """
+    Voice settings which are loaded and validated once and are reused by many synthesis requests. A zero-shot audio
+    prompt is read from disk and a custom dictionary is converted to a request field only when a profile is created.
+    A profile holds a prebuilt :class:`riva.client.proto.riva_tts_pb2.SynthesizeSpeechRequest` template, and a request
+    for a text is a copy of the template with the text set.
+
+    A profile can be shared by threads. Pass it to :meth:`SpeechSynthesisService.synthesize_with_profile`,
+    :meth:`SpeechSynthesisService.synthesize_online_with_profile` or
+    :meth:`SpeechSynthesisService.synthesize_parallel`.
+
+    :attr:`settings_digest` is a digest of the template computed once, so that
+    :class:`CachingSpeechSynthesisService` does not hash a zero-shot audio prompt for every text.
+
+    Args:
+        voice_name, language_code, encoding, sample_rate_hz, zero_shot_audio_prompt_file, audio_prompt_encoding,
+            zero_shot_quality, custom_dictionary, zero_shot_transcript: same as in
+            :meth:`SpeechSynthesisService.synthesize`.
+
+    Raises:
+        :obj:`ValueError`: if :param:`sample_rate_hz` is not positive, :param:`zero_shot_quality` is not in range
+            from 1 to 40, a prompt file is empty, or :param:`custom_dictionary` contains empty entries or commas.
+    """
+    def __init__(
+        self,
+        voice_name: Optional[str] = None,
+        language_code: str = 'en-US',
+        encoding: AudioEncoding = AudioEncoding.LINEAR_PCM,
+        sample_rate_hz: int = 44100,
+        zero_shot_audio_prompt_file: Optional[Union[str, os.PathLike]] = None,
+        audio_prompt_encoding: AudioEncoding = AudioEncoding.ENCODING_UNSPECIFIED,
+        zero_shot_quality: int = 20,
+        custom_dictionary: Optional[dict] = None,
+        zero_shot_transcript: Optional[str] = None,
+    ) -> None:
+        if sample_rate_hz <= 0:
+            raise ValueError(f"Parameter `sample_rate_hz` has to be positive whereas `{sample_rate_hz}` was given.")
+        if zero_shot_audio_prompt_file is not None and not 1 <= zero_shot_quality <= 40:
+            raise ValueError(
+                f"Parameter `zero_shot_quality` has to be in range from 1 to 40 whereas `{zero_shot_quality}` was "
+                f"given."
+            )
+        if custom_dictionary:
+            for key, value in custom_dictionary.items():
+                if not str(key).strip() or not str(value).strip() or ',' in f'{key}{value}':
+                    raise ValueError(
+                        f"Custom dictionary entries have to be non-empty and must not contain commas whereas entry "
+                        f"{key!r}: {value!r} was given."
+                    )
+        template = _build_request(
+            '',
+            voice_name,
+            language_code,
+            encoding,
+            sample_rate_hz,
+            zero_shot_audio_prompt_file,
+            audio_prompt_encoding,
+            zero_shot_quality,
+            custom_dictionary,
+            zero_shot_transcript,
+        )
+        if zero_shot_audio_prompt_file is not None:
+            if not template.zero_shot_data.audio_prompt:
+                raise ValueError(f"Zero shot audio prompt file {zero_shot_audio_prompt_file} is empty.")
+            _check_audio_prompt_duration(template.zero_shot_data.audio_prompt, zero_shot_audio_prompt_file)
+        self.template = template
+        self.settings_digest = request_settings_digest(template)
+
+    def request(self, text: str) -> rtts.SynthesizeSpeechRequest:
+        """Returns a request for text :param:`text` made of a template."""
+        req = rtts.SynthesizeSpeechRequest()
+        req.CopyFrom(self.template)
+        req.text = text
+        return req
+
+    def audio_buffer(self, response: rtts.SynthesizeSpeechResponse) -> AudioBuffer:
+        """
+        Returns audio of :param:`response` as a view of the response audio without copying. Synthesized audio is 16-bit
+        mono.
+
+        Raises:
+            :obj:`ValueError`: if encoding of the profile is not ``AudioEncoding.LINEAR_PCM``.
+        """
+        if self.template.encoding != AudioEncoding.LINEAR_PCM:
+            raise ValueError(
+                f"Only LINEAR_PCM audio can be viewed as an audio buffer whereas encoding "
+                f"{AudioEncoding.Name(self.template.encoding)} was given."
+            )
+        return AudioBuffer(response.audio, self.template.sample_rate_hz)
+
+
+def request_settings_digest(req: rtts.SynthesizeSpeechRequest) -> str:
+    """
+    Returns a SHA-256 hex digest of all fields of :param:`req` except a text and an id. Zero-shot prompt audio is
+    replaced by its own SHA-256 digest.
+    """
+    settings = rtts.SynthesizeSpeechRequest()
+    settings.CopyFrom(req)
+    settings.ClearField('text')
+    settings.ClearField('id')
+    if settings.zero_shot_data.audio_prompt:
+        settings.zero_shot_data.audio_prompt = hashlib.sha256(settings.zero_shot_data.audio_prompt).digest()
+    return hashlib.sha256(settings.SerializeToString(deterministic=True)).hexdigest()
+
+
+def _check_audio_prompt_duration(audio_data: bytes, path: Union[str, os.PathLike]) -> None:
+    # Duration can be checked only for WAV prompts. Other formats are sent as they are.
+    try:
+        with wave.open(io.BytesIO(audio_data)) as wav:
+            duration = wav.getnframes() / wav.getframerate()
+    except (wave.Error, EOFError, ZeroDivisionError):
+        return
+    if not 3 <= duration <= 10:
+        warnings.warn(
+            f"Zero shot audio prompt {path} is {duration:.1f} seconds long whereas it should be between 3 and 10 "
+            f"seconds."
+        )
+
+
 class SpeechSynthesisService:
     """
     A class for synthesizing speech from text. Provides :meth:`synthesize` which returns entire audio for a text
@@ -73,27 +285,19 @@ class SpeechSynthesisService:
             description `here
             <https://docs.nvidia.com/deeplearning/riva/user-guide/docs/reference/protos/protos.html#riva-proto-riva-tts-proto>`_.
         """
-        req = rtts.SynthesizeSpeechRequest(
-            text=text,
-            language_code=language_code,
-            sample_rate_hz=sample_rate_hz,
-            encoding=encoding,
+        req = _build_request(
+            text,
+            voice_name,
+            language_code,
+            encoding,
+            sample_rate_hz,
+            zero_shot_audio_prompt_file,
+            audio_prompt_encoding,
+            zero_shot_quality,
+            custom_dictionary,
+            zero_shot_transcript,
         )
-        if voice_name is not None:
-            req.voice_name = voice_name
-        if zero_shot_audio_prompt_file is not None:
-            with zero_shot_audio_prompt_file.open('rb') as f:
-                audio_data = f.read()
-                req.zero_shot_data.audio_prompt = audio_data
-            req.zero_shot_data.encoding = audio_prompt_encoding
-            req.zero_shot_data.quality = zero_shot_quality
-            if zero_shot_transcript is not None:
-                req.zero_shot_data.transcript = zero_shot_transcript
-
-        add_custom_dictionary_to_config(req, custom_dictionary)
-
-        func = self.stub.Synthesize.future if future else self.stub.Synthesize
-        return func(req, metadata=self.auth.get_auth_metadata())
+        return self._synthesize_request(req, future)
 
     def synthesize_online(
         self,
@@ -106,6 +310,7 @@ class SpeechSynthesisService:
         audio_prompt_encoding: AudioEncoding = AudioEncoding.ENCODING_UNSPECIFIED,
         zero_shot_quality: int = 20,
         custom_dictionary: Optional[dict] = None,
+        zero_shot_transcript: Optional[str] = None,
     ) -> Generator[rtts.SynthesizeSpeechResponse, None, None]:
         """
         Synthesizes and yields output audio chunks for text :param:`text` as the chunks
@@ -123,6 +328,7 @@ class SpeechSynthesisService:
             audio_prompt_encoding: (:obj:`AudioEncoding`): Encoding of audio prompt file, e.g. ``AudioEncoding.LINEAR_PCM``.
             zero_shot_quality: (:obj:`int`): Required quality of output audio, ranges between 1-40.
             custom_dictionary (:obj:`dict`, `optional`): Dictionary with key-value pair containing grapheme and corresponding phoneme
+            zero_shot_transcript (:obj:`str`, `optional`): Transcript corresponding to Zero shot audio prompt.
 
         Yields:
             :obj:`riva.client.proto.riva_tts_pb2.SynthesizeSpeechResponse`: a response with output. You may find
@@ -131,22 +337,245 @@ class SpeechSynthesisService:
             If :param:`future` is :obj:`True`, then a future object is returned. You may retrieve a response from a
             future object by calling ``result()`` method.
         """
-        req = rtts.SynthesizeSpeechRequest(
-            text=text,
-            language_code=language_code,
-            sample_rate_hz=sample_rate_hz,
-            encoding=encoding,
+        req = _build_request(
+            text,
+            voice_name,
+            language_code,
+            encoding,
+            sample_rate_hz,
+            zero_shot_audio_prompt_file,
+            audio_prompt_encoding,
+            zero_shot_quality,
+            custom_dictionary,
+            zero_shot_transcript,
         )
-        if voice_name is not None:
-            req.voice_name = voice_name
+        return self._synthesize_online_request(req)
 
-        if zero_shot_audio_prompt_file is not None:
-            with zero_shot_audio_prompt_file.open('rb') as f:
-                audio_data = f.read()
-                req.zero_shot_data.audio_prompt = audio_data
-            req.zero_shot_data.encoding = audio_prompt_encoding
-            req.zero_shot_data.quality = zero_shot_quality
+    def synthesize_with_profile(
+        self, text: str, profile: VoiceProfile, future: bool = False
+    ) -> Union[rtts.SynthesizeSpeechResponse, _MultiThreadedRendezvous]:
+        """Same as :meth:`synthesize` with voice settings of :param:`profile`."""
+        return self._synthesize_request(profile.request(text), future)
+
+    def synthesize_online_with_profile(
+        self, text: str, profile: VoiceProfile
+    ) -> Generator[rtts.SynthesizeSpeechResponse, None, None]:
+        """Same as :meth:`synthesize_online` with voice settings of :param:`profile`."""
+        return self._synthesize_online_request(profile.request(text))
 
-        add_custom_dictionary_to_config(req, custom_dictionary)                   
+    def synthesize_audio_buffer(self, text: str, profile: VoiceProfile) -> AudioBuffer:
+        """Same as :meth:`synthesize_with_profile` but returns audio as :class:`riva.client.AudioBuffer`. See
+        :meth:`VoiceProfile.audio_buffer`."""
+        return profile.audio_buffer(self.synthesize_with_profile(text, profile))
 
+    def _synthesize_request(
+        self, req: rtts.SynthesizeSpeechRequest, future: bool = False
+    ) -> Union[rtts.SynthesizeSpeechResponse, _MultiThreadedRendezvous]:
+        func = self.stub.Synthesize.future if future else self.stub.Synthesize
+        return func(req, metadata=self.auth.get_auth_metadata())
+
+    def _synthesize_online_request(
+        self, req: rtts.SynthesizeSpeechRequest
+    ) -> Generator[rtts.SynthesizeSpeechResponse, None, None]:
         return self.stub.SynthesizeOnline(req, metadata=self.auth.get_auth_metadata())
+
+    def synthesize_parallel(
+        self,
+        text: str,
+        voice_name: Optional[str] = None,
+        language_code: str = 'en-US',
+        encoding: AudioEncoding = AudioEncoding.LINEAR_PCM,
+        sample_rate_hz: int = 44100,
+        zero_shot_audio_prompt_file: Optional[str] = None,
+        audio_prompt_encoding: AudioEncoding = AudioEncoding.ENCODING_UNSPECIFIED,
+        zero_shot_quality: int = 20,
+        custom_dictionary: Optional[dict] = None,
+        zero_shot_transcript: Optional[str] = None,
+        max_in_flight: int = 4,
+        max_chars: int = 400,
+        first_chunk_max_chars: Optional[int] = 100,
+        profile: Optional[VoiceProfile] = None,
+    ) -> Generator[rtts.SynthesizeSpeechResponse, None, None]:
+        """
+        Splits text :param:`text` into sentences with :func:`split_text_for_synthesis`, synthesizes sentences
+        concurrently with :meth:`synthesize` and yields a response for every sentence in the order of sentences.
+
+        Up to :param:`max_in_flight` requests are processed simultaneously and a new request is sent as soon as any of
+        them is finished. The first sentence is sent first and is kept short, so time to first audio is close to
+        time of synthesis of a short sentence, while total synthesis time drops for long texts. For
+        ``AudioEncoding.LINEAR_PCM``, audio of responses can be concatenated.
+
+        Args:
+            text (:obj:`str`): An input text.
+            voice_name, language_code, encoding, sample_rate_hz, zero_shot_audio_prompt_file, audio_prompt_encoding,
+                zero_shot_quality, custom_dictionary, zero_shot_transcript: same as in :meth:`synthesize`.
+            max_in_flight (:obj:`int`, defaults to :obj:`4`): A maximum number of requests processed simultaneously.
+            max_chars (:obj:`int`, defaults to :obj:`400`): A maximum number of characters in one request.
+            first_chunk_max_chars (:obj:`int`, `optional`, defaults to :obj:`100`): A maximum number of characters in
+                the first request. If :obj:`None`, then the first sentence is not shortened.
+            profile (:obj:`VoiceProfile`, `optional`): Voice settings. If provided, then voice parameters are ignored.
+                Otherwise, a profile is made of voice parameters once for all sentences.
+
+        Yields:
+            :obj:`riva.client.proto.riva_tts_pb2.SynthesizeSpeechResponse`: a response for every sentence.
+        """
+        if profile is None:
+            profile = VoiceProfile(
+                voice_name,
+                language_code,
+                encoding,
+                sample_rate_hz,
+                zero_shot_audio_prompt_file,
+                audio_prompt_encoding,
+                zero_shot_quality,
+                custom_dictionary,
+                zero_shot_transcript,
+            )
+        yield from ordered_async_results(
+            split_text_for_synthesis(text, max_chars, first_chunk_max_chars),
+            lambda chunk: self.synthesize_with_profile(chunk, profile, future=True),
+            max_in_flight,
+        )
+
+
+def pack_responses(responses: Iterable[rtts.SynthesizeSpeechResponse]) -> bytes:
+    """Serializes a sequence of responses into one length-prefixed byte string."""
+    parts = []
+    for response in responses:
+        data = response.SerializeToString()
+        parts += [struct.pack('<I', len(data)), data]
+    return b''.join(parts)
+
+
+def unpack_responses(data: bytes) -> List[rtts.SynthesizeSpeechResponse]:
+    """Inverse of :func:`pack_responses`."""
+    view = memoryview(data)
+    responses = []
+    pos = 0
+    while pos < len(view):
+        (size,) = struct.unpack_from('<I', view, pos)
+        # Responses are parsed from slices of the view, so a memory-mapped value is not copied before parsing.
+        responses.append(rtts.SynthesizeSpeechResponse.FromString(view[pos + 4 : pos + 4 + size]))
+        pos += 4 + size
+    return responses
+
+
+class CachingSpeechSynthesisService(SpeechSynthesisService):
+    """
+    :class:`SpeechSynthesisService` which caches responses of :meth:`synthesize` and :meth:`synthesize_online`.
+
+    Cache keys are SHA-256 digests of a text and of :func:`request_settings_digest` of a request, so a key covers a
+    text, a voice, a language, a sample rate, an encoding, a custom dictionary and zero-shot prompt audio, quality and
+    transcript. Requests made of a :class:`VoiceProfile` reuse its precomputed :attr:`VoiceProfile.settings_digest`,
+    so prompt audio is not hashed for every text. Responses of
+    :meth:`synthesize` and of :meth:`synthesize_online` are cached separately, and a hit is returned in the same shape
+    a server returns: one response, a future, or a sequence of streaming chunks. A streaming response is cached only
+    if it was received completely.
+
+    Hit and miss counters are available in :attr:`stats`.
+    """
+    def __init__(
+        self,
+        auth: Auth,
+        cache: Optional[TieredCache] = None,
+        max_bytes: int = 256 * 2**20,
+        disk_cache_dir: Optional[Union[str, os.PathLike]] = None,
+        max_disk_bytes: Optional[int] = None,
+    ) -> None:
+        """
+        Initializes an instance of the class.
+
+        Args:
+            auth (:obj:`Auth`): an instance of :class:`riva.client.auth.Auth` which is used for authentication metadata
+                generation.
+            cache (:obj:`riva.client.cache.TieredCache`, `optional`): a cache for serialized responses. If provided,
+                then other parameters are ignored.
+            max_bytes (:obj:`int`, defaults to :obj:`268435456`): a maximum size of responses kept in memory.
+            disk_cache_dir (:obj:`Union[str, os.PathLike]`, `optional`): a directory which keeps responses between
+                runs. Responses are read from it through memory maps.
+            max_disk_bytes (:obj:`int`, `optional`): a maximum size of responses in :param:`disk_cache_dir`.
+        """
+        super().__init__(auth)
+        if cache is None:
+            # Disk hits are parsed straight from memory maps, so they are not copied into the memory tier.
+            cache = TieredCache(
+                LRUCache(max_entries=None, max_bytes=max_bytes),
+                None if disk_cache_dir is None else MmapFileCache(disk_cache_dir, max_disk_bytes),
+                promote=False,
+            )
+        self.cache = cache
+
+    def close(self) -> None:
+        """Closes the cache, e.g. memory maps of disk cache files."""
+        self.cache.close()
+
+    @property
+    def stats(self) -> CacheStats:
+        return self.cache.stats
+
+    @staticmethod
+    def request_key(req: rtts.SynthesizeSpeechRequest, method: str, settings_digest: Optional[str] = None) -> str:
+        """
+        Returns a cache key for request :param:`req` sent with gRPC method :param:`method`. If
+        :param:`settings_digest` is not provided, then it is computed with :func:`request_settings_digest`.
+        """
+        if settings_digest is None:
+            settings_digest = request_settings_digest(req)
+        digest = hashlib.sha256(f'{method}\x1f{settings_digest}\x1f'.encode('utf-8'))
+        digest.update(req.text.encode('utf-8'))
+        return digest.hexdigest()
+
+    def synthesize_with_profile(
+        self, text: str, profile: VoiceProfile, future: bool = False
+    ) -> Union[rtts.SynthesizeSpeechResponse, _MultiThreadedRendezvous, Future]:
+        req = profile.request(text)
+        return self._synthesize_request(req, future, self.request_key(req, 'Synthesize', profile.settings_digest))
+
+    def synthesize_online_with_profile(
+        self, text: str, profile: VoiceProfile
+    ) -> Generator[rtts.SynthesizeSpeechResponse, None, None]:
+        req = profile.request(text)
+        return self._synthesize_online_request(
+            req, self.request_key(req, 'SynthesizeOnline', profile.settings_digest)
+        )
+
+    def _synthesize_request(
+        self, req: rtts.SynthesizeSpeechRequest, future: bool = False, key: Optional[str] = None
+    ) -> Union[rtts.SynthesizeSpeechResponse, _MultiThreadedRendezvous, Future]:
+        if key is None:
+            key = self.request_key(req, 'Synthesize')
+        value = self.cache.get(key)
+        if value is not MISSING:
+            response = rtts.SynthesizeSpeechResponse.FromString(value)
+            if not future:
+                return response
+            result = Future()
+            result.set_result(response)
+            return result
+        if not future:
+            response = super()._synthesize_request(req, False)
+            self.cache.put(key, response.SerializeToString())
+            return response
+
+        def on_done(response_future: _MultiThreadedRendezvous) -> None:
+            if not response_future.cancelled() and response_future.exception() is None:
+                self.cache.put(key, response_future.result().SerializeToString())
+
+        response_future = super()._synthesize_request(req, True)
+        response_future.add_done_callback(on_done)
+        return response_future
+
+    def _synthesize_online_request(
+        self, req: rtts.SynthesizeSpeechRequest, key: Optional[str] = None
+    ) -> Generator[rtts.SynthesizeSpeechResponse, None, None]:
+        if key is None:
+            key = self.request_key(req, 'SynthesizeOnline')
+        value = self.cache.get(key)
+        if value is not MISSING:
+            yield from unpack_responses(value)
+            return
+        responses = []
+        for response in super()._synthesize_online_request(req):
+            responses.append(response)
+            yield response
+        self.cache.put(key, pack_responses(responses))
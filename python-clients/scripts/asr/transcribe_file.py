@@ -5,7 +5,15 @@ import argparse
 
 import os
 import riva.client
-from riva.client.argparse_utils import add_asr_config_argparse_parameters, add_connection_argparse_parameters
+from riva.client.argparse_utils import (
+    add_asr_config_argparse_parameters,
+    add_async_punctuation_argparse_parameters,
+    add_connection_argparse_parameters,
+    add_discovery_argparse_parameters,
+)
+from riva.client.asr_postprocessing import AsyncPunctuationStage
+from riva.client.coalescing import punctuate_text_coalescer
+from riva.client.discovery import CapabilityDiscovery
 
 
 def parse_args() -> argparse.Namespace:
@@ -49,12 +57,22 @@ def parse_args() -> argparse.Namespace:
         help="Option to simulate realtime transcription. Audio fragments are sent to a server at a pace that mimics "
         "normal speech.",
     )
+    parser.add_argument(
+        "--split-channels",
+        action='store_true',
+        help="Recognize every channel of a multichannel WAV file in its own concurrent stream and print final "
+        "transcripts of all channels on one timeline, e.g. an agent and a customer of a stereo call recording.",
+    )
     parser.add_argument(
         "--print-confidence", action="store_true", help="Whether to print stability and confidence of transcript. If `--word-time-offsets` or `--speaker-diarization` is set, then confidence is not printed."
     )
     parser = add_connection_argparse_parameters(parser)
+    parser = add_discovery_argparse_parameters(parser)
     parser = add_asr_config_argparse_parameters(parser, max_alternatives=True, profanity_filter=True, word_time_offsets=True)
+    parser = add_async_punctuation_argparse_parameters(parser)
     args = parser.parse_args()
+    if args.async_punctuation and args.automatic_punctuation:
+        parser.error("`--async-punctuation` and `--automatic-punctuation` cannot be used together.")
     if args.play_audio or args.output_device is not None or args.list_devices:
         import riva.client.audio_io
     return args
@@ -69,16 +87,12 @@ def main() -> None:
     asr_service = riva.client.ASRService(auth)
 
     if args.list_models:
+        capabilities = CapabilityDiscovery(auth, args.capabilities_cache_dir, args.capabilities_ttl).asr()
         asr_models = dict()
-        config_response = asr_service.stub.GetRivaSpeechRecognitionConfig(riva.client.proto.riva_asr_pb2.RivaSpeechRecognitionConfigRequest())
-        for model_config in config_response.model_config:
-            if model_config.parameters["type"] == "online":
-                language_code = model_config.parameters['language_code']
-                model = {"model": [model_config.model_name]}
-                if language_code in asr_models:
-                    asr_models[language_code].append(model)
-                else:
-                    asr_models[language_code] = [model]
+        for language_code in capabilities.languages:
+            models = capabilities.models(language_code, 'online')
+            if models:
+                asr_models[language_code] = [{"model": [model]} for model in models]
 
         print("Available ASR models")
         asr_models = dict(sorted(asr_models.items()))
@@ -116,30 +130,56 @@ def main() -> None:
         config,
         args.custom_configuration
     )
+    if args.split_channels:
+        audio = riva.client.AudioBuffer.from_wav_file(args.input_file)
+        riva.client.add_audio_buffer_specs_to_config(config, audio)
+        recognizer = riva.client.MultiChannelRecognizer(asr_service, config, audio.nchannels, audio.sampwidth)
+        for segment in recognizer.transcribe(audio, args.file_streaming_chunk):
+            print(
+                f"[{segment.start_time:.2f} - {segment.end_time:.2f}] Channel {segment.channel}: "
+                f"{segment.transcript}"
+            )
+        return
+
     sound_callback = None
+    punctuation_coalescer = None
     try:
         if args.play_audio or args.output_device is not None:
             wp = riva.client.get_wav_file_parameters(args.input_file)
-            sound_callback = riva.client.audio_io.SoundCallBack(
+            sound_callback = riva.client.audio_io.open_playback(
                 args.output_device, wp['sampwidth'], wp['nchannels'], wp['framerate'],
             )
-            delay_callback = sound_callback
+
+            def delay_callback(audio_data: bytes, audio_length: float) -> None:
+                # Audio is played on a separate thread, so sending is paced by a clock and not by device writes.
+                sound_callback(audio_data)
+                riva.client.sleep_audio_length(audio_data, audio_length)
         else:
             delay_callback = riva.client.sleep_audio_length if args.simulate_realtime else None
         with riva.client.AudioChunkFileIterator(
             args.input_file, args.file_streaming_chunk, delay_callback,
         ) as audio_chunk_iterator:
+            responses = asr_service.streaming_response_generator(
+                audio_chunks=audio_chunk_iterator,
+                streaming_config=config,
+            )
+            if args.async_punctuation:
+                punctuation_coalescer = punctuate_text_coalescer(
+                    riva.client.NLPService(auth), args.punctuation_model, args.language_code
+                )
+                responses = AsyncPunctuationStage(punctuation_coalescer, args.punctuation_latency_budget).process(
+                    responses
+                )
             riva.client.print_streaming(
-                responses=asr_service.streaming_response_generator(
-                    audio_chunks=audio_chunk_iterator,
-                    streaming_config=config,
-                ),
+                responses=responses,
                 show_intermediate=args.show_intermediate,
                 additional_info="time" if (args.word_time_offsets or args.speaker_diarization) else ("confidence" if args.print_confidence else "no"),
                 word_time_offsets=args.word_time_offsets or args.speaker_diarization,
                 speaker_diarization=args.speaker_diarization,
             )
     finally:
+        if punctuation_coalescer is not None:
+            punctuation_coalescer.close()
         if sound_callback is not None and sound_callback.opened:
             sound_callback.close()
 
@@ -7,7 +7,12 @@ from pathlib import Path
 
 import grpc
 import riva.client
-from riva.client.argparse_utils import add_asr_config_argparse_parameters, add_connection_argparse_parameters
+from riva.client.argparse_utils import (
+    add_asr_config_argparse_parameters,
+    add_connection_argparse_parameters,
+    add_discovery_argparse_parameters,
+)
+from riva.client.discovery import CapabilityDiscovery
 
 
 def parse_args() -> argparse.Namespace:
@@ -22,6 +27,7 @@ def parse_args() -> argparse.Namespace:
     group.add_argument("--list-models", action="store_true", help="List available models.")
 
     parser = add_connection_argparse_parameters(parser)
+    parser = add_discovery_argparse_parameters(parser)
     parser = add_asr_config_argparse_parameters(parser, max_alternatives=True, profanity_filter=True, word_time_offsets=True)
     args = parser.parse_args()
     if args.input_file:
@@ -36,16 +42,12 @@ def main() -> None:
     asr_service = riva.client.ASRService(auth)
 
     if args.list_models:
+        capabilities = CapabilityDiscovery(auth, args.capabilities_cache_dir, args.capabilities_ttl).asr()
         asr_models = dict()
-        config_response = asr_service.stub.GetRivaSpeechRecognitionConfig(riva.client.proto.riva_asr_pb2.RivaSpeechRecognitionConfigRequest())
-        for model_config in config_response.model_config:
-            if model_config.parameters["type"] == "offline":
-                language_code = model_config.parameters['language_code']
-                model = {"model": [model_config.model_name]}
-                if language_code in asr_models:
-                    asr_models[language_code].append(model)
-                else:
-                    asr_models[language_code] = [model]
+        for language_code in capabilities.languages:
+            models = capabilities.models(language_code, 'offline')
+            if models:
+                asr_models[language_code] = [{"model": [model]} for model in models]
 
         print("Available ASR models")
         asr_models = dict(sorted(asr_models.items()))
@@ -4,7 +4,14 @@
 import argparse
 
 import riva.client
-from riva.client.argparse_utils import add_asr_config_argparse_parameters, add_connection_argparse_parameters
+from riva.client.argparse_utils import (
+    add_asr_config_argparse_parameters,
+    add_async_punctuation_argparse_parameters,
+    add_connection_argparse_parameters,
+)
+from riva.client.asr_postprocessing import AsyncPunctuationStage
+from riva.client.capture import CAPTURE_OVERFLOW_POLICIES
+from riva.client.coalescing import punctuate_text_coalescer
 
 try:
     import riva.client.audio_io
@@ -23,6 +30,7 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--input-device", type=int, default=default_device_index, help="An input audio device to use.")
     parser.add_argument("--list-devices", action="store_true", help="List input audio device indices.")
     parser = add_asr_config_argparse_parameters(parser, profanity_filter=True)
+    parser = add_async_punctuation_argparse_parameters(parser)
     parser = add_connection_argparse_parameters(parser)
     parser.add_argument(
         "--sample-rate-hz",
@@ -36,7 +44,22 @@ def parse_args() -> argparse.Namespace:
         default=1600,
         help="A maximum number of frames in a audio chunk sent to server.",
     )
+    parser.add_argument(
+        "--capture-buffer-seconds",
+        type=float,
+        default=5.0,
+        help="A maximum duration of recorded audio waiting to be sent to server.",
+    )
+    parser.add_argument(
+        "--capture-overflow",
+        choices=CAPTURE_OVERFLOW_POLICIES,
+        default='drop_oldest',
+        help="What happens when the capture buffer is full. `drop_oldest` drops the oldest audio, `block` keeps all "
+        "audio and pauses recording until there is space, `error` stops transcription.",
+    )
     args = parser.parse_args()
+    if args.async_punctuation and args.automatic_punctuation:
+        parser.error("`--async-punctuation` and `--automatic-punctuation` cannot be used together.")
     return args
 
 
@@ -75,18 +98,39 @@ def main() -> None:
         config,
         args.custom_configuration
     )
-    with riva.client.audio_io.MicrophoneStream(
-        args.sample_rate_hz,
-        args.file_streaming_chunk,
-        device=args.input_device,
-    ) as audio_chunk_iterator:
-        riva.client.print_streaming(
-            responses=asr_service.streaming_response_generator(
+    punctuation_coalescer = None
+    try:
+        with riva.client.audio_io.MicrophoneStream(
+            args.sample_rate_hz,
+            args.file_streaming_chunk,
+            device=args.input_device,
+            buffer_seconds=args.capture_buffer_seconds,
+            max_chunk_seconds=args.file_streaming_chunk / args.sample_rate_hz,
+            overflow=args.capture_overflow,
+        ) as audio_chunk_iterator:
+            responses = asr_service.streaming_response_generator(
                 audio_chunks=audio_chunk_iterator,
                 streaming_config=config,
-            ),
-            show_intermediate=True,
-        )
+            )
+            if args.async_punctuation:
+                punctuation_coalescer = punctuate_text_coalescer(
+                    riva.client.NLPService(auth), args.punctuation_model, args.language_code
+                )
+                responses = AsyncPunctuationStage(punctuation_coalescer, args.punctuation_latency_budget).process(
+                    responses
+                )
+            riva.client.print_streaming(
+                responses=responses,
+                show_intermediate=True,
+            )
+        if audio_chunk_iterator.stats['overruns']:
+            print(
+                f"Capture buffer overruns: {audio_chunk_iterator.stats['overruns']}, dropped "
+                f"{audio_chunk_iterator.stats['dropped_seconds']:.2f} s of audio"
+            )
+    finally:
+        if punctuation_coalescer is not None:
+            punctuation_coalescer.close()
 
 
 if __name__ == '__main__':
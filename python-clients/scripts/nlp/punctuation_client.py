@@ -2,10 +2,12 @@
 # SPDX-License-Identifier: MIT
 
 import argparse
+import sys
 import time
 
 import riva.client
 from riva.client.argparse_utils import add_connection_argparse_parameters
+from riva.client.long_text import punctuate_long_texts
 
 
 def parse_args() -> argparse.Namespace:
@@ -34,6 +36,19 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument(
         "--language-code", default="en-US", help="Language code of the model to be used.",
     )
+    parser.add_argument(
+        "--input-file",
+        help="A file with a long text, e.g. a meeting transcript. If this option is set, then `--query` and "
+        "`--interactive` are ignored. The text is split into overlapping windows which are punctuated concurrently.",
+    )
+    parser.add_argument(
+        "--window-tokens", type=int, default=256, help="A number of words in a window of `--input-file` text."
+    )
+    parser.add_argument("--overlap-tokens", type=int, default=32, help="A number of words shared by windows.")
+    parser.add_argument("--batch-size", type=int, default=8, help="A number of windows in a request.")
+    parser.add_argument(
+        "--max-async-requests-to-queue", type=int, default=4, help="A number of requests with windows kept in flight."
+    )
     parser = add_connection_argparse_parameters(parser)
     return parser.parse_args()
 
@@ -41,7 +56,23 @@ def parse_args() -> argparse.Namespace:
 def run_punct_capit(args: argparse.Namespace) -> None:
     auth = riva.client.Auth(args.ssl_cert, args.use_ssl, args.server, args.metadata)
     nlp_service = riva.client.NLPService(auth)
-    if args.interactive:
+    if args.input_file is not None:
+        with open(args.input_file, encoding='utf-8') as f:
+            text = f.read()
+        start = time.time()
+        result = punctuate_long_texts(
+            nlp_service,
+            [text],
+            model_name=args.model,
+            language_code=args.language_code,
+            window_tokens=args.window_tokens,
+            overlap_tokens=args.overlap_tokens,
+            batch_size=args.batch_size,
+            max_async_requests_to_queue=args.max_async_requests_to_queue,
+        )[0]
+        print(result)
+        print(f"Inference complete in {(time.time() - start) * 1000:.4f} ms", file=sys.stderr)
+    elif args.interactive:
         while True:
             query = input("Enter a query: ")
             start = time.time()
@@ -0,0 +1,69 @@
+# SPDX-FileCopyrightText: Copyright (c) 2022 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import argparse
+import time
+from pathlib import Path
+
+import riva.client
+from riva.client.argparse_utils import add_connection_argparse_parameters
+from riva.client.retrieval import BM25Index, natural_query_with_index
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Client app to answer questions about documents with Riva. Documents are indexed locally and "
+        "only the most relevant passages are sent to the server as contexts.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--contexts-file", type=Path, help="A file with one document per line. Documents are added to the index."
+    )
+    parser.add_argument(
+        "--index-file",
+        type=Path,
+        help="A path to a saved index. If the file exists, the index is loaded from it, and the updated index is saved "
+        "to it. Documents from `--contexts-file` which did not change are not reindexed, and documents which were "
+        "removed from `--contexts-file` are removed from the index.",
+    )
+    parser.add_argument("--query", action='append', help="A question. The option can be repeated.")
+    parser.add_argument("--queries-file", type=Path, help="A file with one question per line.")
+    parser.add_argument("--top-k", type=int, default=3, help="A number of passages sent as contexts for a question.")
+    parser.add_argument("--top-n", type=int, default=1, help="A maximum number of answers for a question.")
+    parser.add_argument("--chunk-words", type=int, default=128, help="A number of words in an indexed passage.")
+    parser.add_argument("--chunk-overlap", type=int, default=32, help="A number of words shared by passages.")
+    parser = add_connection_argparse_parameters(parser)
+    args = parser.parse_args()
+    if args.contexts_file is None and args.index_file is None:
+        parser.error("At least one of `--contexts-file` and `--index-file` has to be provided.")
+    return args
+
+
+def main() -> None:
+    args = parse_args()
+    if args.index_file is not None and args.index_file.exists():
+        index = BM25Index.load(args.index_file)
+    else:
+        index = BM25Index(args.chunk_words, args.chunk_overlap)
+    if args.contexts_file is not None:
+        with args.contexts_file.expanduser().open(encoding='utf-8') as f:
+            n_indexed = index.add_documents((line.strip() for line in f if line.strip()), remove_missing=True)
+        print(f"Indexed {n_indexed} new or changed documents, {len(index)} documents and {index.n_chunks} passages total.")
+        if args.index_file is not None:
+            index.save(args.index_file)
+    queries = list(args.query or [])
+    if args.queries_file is not None:
+        with args.queries_file.expanduser().open(encoding='utf-8') as f:
+            queries.extend(line.strip() for line in f if line.strip())
+    auth = riva.client.Auth(args.ssl_cert, args.use_ssl, args.server, args.metadata)
+    nlp_service = riva.client.NLPService(auth)
+    for query in queries:
+        start = time.time()
+        response = natural_query_with_index(nlp_service, index, query, top_k=args.top_k, top_n=args.top_n)
+        print(f"Query: {query} ({(time.time() - start) * 1000:.1f} ms)")
+        for result in response.results:
+            print(f"  {result.score:.3f}: {result.answer}")
+
+
+if __name__ == '__main__':
+    main()
@@ -27,6 +27,7 @@
 #!/usr/bin/env python
 
 import argparse
+import json
 import os
 import sys
 
@@ -35,38 +36,12 @@ import riva.client.proto.riva_nmt_pb2 as riva_nmt
 import riva.client.proto.riva_nmt_pb2_grpc as riva_nmt_srv
 
 import riva.client
-from riva.client.argparse_utils import add_connection_argparse_parameters
+from riva.client.argparse_utils import add_connection_argparse_parameters, add_discovery_argparse_parameters
+from riva.client.async_utils import ordered_async_results
+from riva.client.batching import plan_length_bucketed_batches
+from riva.client.discovery import CapabilityDiscovery
 
 
-def read_dnt_phrases_file(file_path):
-    dnt_phrases_dict = {}
-    if file_path:
-        try:
-            with open(file_path, "r") as infile:
-                for line in infile:
-                    # Trim leading and trailing whitespaces
-                    line = line.strip()
-
-                    if line:
-                        pos = line.find("##")
-                        if pos != -1:
-                            # Line contains "##"
-                            key = line[:pos].strip()
-                            value = line[pos + 2 :].strip()
-                        else:
-                            # Line doesn't contain "##"
-                            key = line.strip()
-                            value = ""
-
-                        # Add the key-value pair to the dictionary
-                        if key:
-                            dnt_phrases_dict[key] = value
-
-        except IOError:
-            raise RuntimeError(f"Could not open file {file_path}")
-
-    return dnt_phrases_dict
-
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Neural machine translation by Riva AI Services",
@@ -84,70 +59,220 @@ def parse_args() -> argparse.Namespace:
         "--source-language-code", type=str, default="en-US", help="Source language code (according to BCP-47 standard)"
     )
     parser.add_argument(
-        "--target-language-code", type=str, default="en-US", help="Target language code (according to BCP-47 standard)"
+        "--target-language-code",
+        type=str,
+        nargs='+',
+        default=["en-US"],
+        help="Target language code (according to BCP-47 standard). If several codes are given, then every text is "
+        "translated into all of them and translations are printed with language code prefixes.",
     )
     parser.add_argument("--batch-size", type=int, default=8, help="Batch size to use for file translation")
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=4,
+        help="Number of translation requests processed simultaneously for file translation. Requests for all target "
+        "languages of a batch are sent concurrently and translations are printed in the original order of lines.",
+    )
+    parser.add_argument(
+        "--max-batch-tokens",
+        type=int,
+        help="Maximum number of tokens in a padded batch for file translation. If this parameter or "
+        "`--bucketing-lookahead` is set, then lines are grouped into batches of similar length.",
+    )
+    parser.add_argument(
+        "--bucketing-lookahead",
+        type=int,
+        default=0,
+        help="Number of lines which are sorted by length together before splitting them into batches. "
+        "Translations are printed in the original order of lines.",
+    )
+    parser.add_argument(
+        "--translation-memory",
+        type=str,
+        help="Path to a SQLite database with previous translations. Texts found in it are not sent to the server, "
+        "and new translations are added to it. A hit rate is printed to stderr.",
+    )
+    parser.add_argument(
+        "--document",
+        default=False,
+        action='store_true',
+        help="Translate `--text-file` as one document. The document is split into sentences which are translated in "
+        "concurrent batches, and paragraphs, line breaks and markup tags are kept in the output.",
+    )
     parser.add_argument("--list-models", default=False, action='store_true', help="List available models on server")
     parser = add_connection_argparse_parameters(parser)
+    parser = add_discovery_argparse_parameters(parser)
 
     return parser.parse_args()
 
 
 def main() -> None:
-    def request(inputs,args):
-        try:
-            dnt_phrases_input = {}
-            if args.dnt_phrases_file != None:
-                dnt_phrases_input = read_dnt_phrases_file(args.dnt_phrases_file)
-            response = nmt_client.translate(
-                texts=inputs,
+    def print_error(e):
+        if e.code() == grpc.StatusCode.INVALID_ARGUMENT:
+            result = {'msg': 'invalid arg error'}
+        elif e.code() == grpc.StatusCode.ALREADY_EXISTS:
+            result = {'msg': 'already exists error'}
+        elif e.code() == grpc.StatusCode.UNAVAILABLE:
+            result = {'msg': 'server unavailable check network'}
+        else:
+            result = {'msg': 'error code:{}'.format(e.code())}
+        print(f"{result['msg']} : {e.details()}")
+
+    def print_translation(translation, target_language):
+        if len(args.target_language_code) > 1:
+            print(f"{target_language}: {translation}")
+        else:
+            print(translation)
+
+    def request_bucketed(lines, args, padding_stats):
+        plan = plan_length_bucketed_batches(lines, args.batch_size, args.max_batch_tokens)
+        target_languages = list(dict.fromkeys(args.target_language_code))
+        requests = [
+            (batch, target_language) for batch in plan.batch_inputs(lines) for target_language in target_languages
+        ]
+        responses = ordered_async_results(
+            requests,
+            lambda request: nmt_client.translate(
+                texts=request[0],
                 model=args.model_name,
                 source_language=args.source_language_code,
-                target_language=args.target_language_code,
-                future=False,
-                dnt_phrases_dict=dnt_phrases_input,
+                target_language=request[1],
+                future=True,
+                dnt_phrases_dict=dnt_phrases,
                 max_len_variation=args.max_len_variation,
-            )
-            for translation in response.translations:
-                print(translation.text)
-        except grpc.RpcError as e:
-            if e.code() == grpc.StatusCode.INVALID_ARGUMENT:
-                result = {'msg': 'invalid arg error'}
-            elif e.code() == grpc.StatusCode.ALREADY_EXISTS:
-                result = {'msg': 'already exists error'}
-            elif e.code() == grpc.StatusCode.UNAVAILABLE:
-                result = {'msg': 'server unavailable check network'}
+            ),
+            args.max_in_flight,
+            return_exceptions=True,
+        )
+        translations = {target_language: [] for target_language in target_languages}
+        for (batch, target_language), response in zip(requests, responses):
+            if isinstance(response, Exception):
+                on_batch_error(response, batch, target_language)
+                translations[target_language] += [None] * len(batch)
             else:
-                result = {'msg': 'error code:{}'.format(e.code())}
-            print(f"{result['msg']} : {e.details()}")
+                translations[target_language] += [translation.text for translation in response.translations]
+        restored = {
+            target_language: plan.restore_order(language_translations)
+            for target_language, language_translations in translations.items()
+        }
+        for i in range(len(lines)):
+            for target_language in target_languages:
+                if restored[target_language][i] is not None:
+                    print_translation(restored[target_language][i], target_language)
+        for key, value in plan.padding_stats().items():
+            padding_stats[key] = padding_stats.get(key, 0) + value
+
+    def on_batch_error(error, batch, target_language):
+        if not isinstance(error, grpc.RpcError):
+            raise error
+        print_error(error)
+
+    def translate_lines(lines):
+        for _, translations in nmt_client.translate_batch(
+            lines,
+            args.model_name,
+            args.source_language_code,
+            args.target_language_code,
+            batch_size=args.batch_size,
+            max_in_flight=args.max_in_flight,
+            dnt_phrases_dict=dnt_phrases,
+            max_len_variation=args.max_len_variation,
+            on_error=on_batch_error,
+        ):
+            for target_language, translation in translations.items():
+                print_translation(translation, target_language)
+
+    def print_translation_memory_stats():
+        if args.translation_memory is not None:
+            stats = nmt_client.stats
+            print(
+                f"Translation memory: {stats.hits} hits, {stats.misses} misses, {stats.deduplicated} repeated texts "
+                f"in batches, hit rate {stats.hit_rate:.1%}",
+                file=sys.stderr,
+            )
 
     args = parse_args()
+    dnt_phrases = None
+    if args.dnt_phrases_file is not None:
+        try:
+            dnt_phrases = riva.client.DNTDictionary.from_file(args.dnt_phrases_file)
+        except IOError:
+            raise RuntimeError(f"Could not open file {args.dnt_phrases_file}")
 
     auth = riva.client.Auth(args.ssl_cert, args.use_ssl, args.server, args.metadata)
-    nmt_client = riva.client.NeuralMachineTranslationClient(auth)
+    if args.translation_memory is not None:
+        nmt_client = riva.client.CachingNeuralMachineTranslationClient(auth, disk_cache_path=args.translation_memory)
+    else:
+        nmt_client = riva.client.NeuralMachineTranslationClient(auth)
 
     if args.list_models:
-
-        response = nmt_client.get_config(args.model_name)
-        print(response)
+        capabilities = CapabilityDiscovery(auth, args.capabilities_cache_dir, args.capabilities_ttl).nmt()
+        language_pairs = {}
+        for source_language, target_language in capabilities.language_pairs:
+            models = capabilities.models(source_language, target_language)
+            if args.model_name:
+                models = [model for model in models if model == args.model_name]
+            if models:
+                language_pairs[f"{source_language} -> {target_language}"] = models
+        print(json.dumps(language_pairs, indent=4))
         return
 
     if args.text_file != None and os.path.exists(args.text_file):
+        if args.document:
+            with open(args.text_file, "r") as f:
+                document = f.read()
+            try:
+                for target_language in args.target_language_code:
+                    print(
+                        riva.client.translate_document(
+                            nmt_client,
+                            document,
+                            args.model_name,
+                            args.source_language_code,
+                            target_language,
+                            max_batch_size=args.batch_size,
+                            max_batch_tokens=args.max_batch_tokens,
+                            max_in_flight=args.max_in_flight,
+                            dnt_phrases_dict=dnt_phrases,
+                            max_len_variation=args.max_len_variation,
+                        ),
+                        end="",
+                    )
+            except grpc.RpcError as e:
+                print_error(e)
+            print_translation_memory_stats()
+            return
+        if args.max_batch_tokens is not None or args.bucketing_lookahead > 0:
+            lookahead = args.bucketing_lookahead if args.bucketing_lookahead > 0 else args.batch_size * 16
+            padding_stats = {}
+            with open(args.text_file, "r") as f:
+                lines = []
+                for line in f:
+                    line = line.strip()
+                    if line != "":
+                        lines.append(line)
+                    if len(lines) == lookahead:
+                        request_bucketed(lines, args, padding_stats)
+                        lines = []
+                if len(lines) > 0:
+                    request_bucketed(lines, args, padding_stats)
+            if padding_stats:
+                print(
+                    f"Padding tokens: {padding_stats['padding']}, with fixed size batches: "
+                    f"{padding_stats['naive_padding']}, saved: {padding_stats['padding_saved']}",
+                    file=sys.stderr,
+                )
+            print_translation_memory_stats()
+            return
         with open(args.text_file, "r") as f:
-            batch = []
-            for line in f:
-                line = line.strip()
-                if line != "":
-                    batch.append(line)
-                if len(batch) == args.batch_size:
-                    request(batch, args)
-                    batch = []
-            if len(batch) > 0:
-                request(batch, args)
+            translate_lines(line.strip() for line in f if line.strip() != "")
+        print_translation_memory_stats()
         return
 
     if args.text != "":
-        request([args.text], args)
+        translate_lines([args.text])
+    print_translation_memory_stats()
 
 
 if __name__ == '__main__':
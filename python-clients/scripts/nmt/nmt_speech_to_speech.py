@@ -1,5 +1,6 @@
 import argparse
 import os
+import sys
 import wave
 from typing import Iterator
 
@@ -20,11 +21,50 @@ def parse_arguments():
     parser.add_argument('--sample-rate-hz', type=int, default=16000, help='Sample rate (default: 16000)')
     parser.add_argument('--list-models', action='store_true', help='List available models')
     parser.add_argument('--output-file', default='output.wav', help='Output file (optional)')
+    parser.add_argument(
+        '--client-pipeline',
+        action='store_true',
+        help='Run ASR, NMT and TTS as separate concurrent stages on the client instead of the server speech-to-speech '
+        'pipeline. Output audio is written as soon as an utterance is synthesized and stage latencies are printed.',
+    )
+    parser.add_argument('--model-name', default='', help='Translation model used with --client-pipeline')
     parser = add_connection_argparse_parameters(parser)
 
     return parser.parse_args()
 
 
+def translate_with_client_pipeline(args, auth, nmt_client, asr_config):
+    riva.client.add_audio_file_specs_to_config(asr_config, args.audio_file)
+    pipeline = riva.client.SpeechTranslationPipeline(
+        riva.client.ASRService(auth),
+        nmt_client,
+        riva.client.SpeechSynthesisService(auth),
+        asr_config,
+        args.model_name,
+        args.source_language,
+        args.target_language,
+        riva.client.VoiceProfile(args.voice or None, args.target_language, sample_rate_hz=args.sample_rate_hz),
+    )
+    with wave.open(str(args.output_file), 'wb') as output_file:
+        output_file.setnchannels(1)
+        output_file.setsampwidth(2)
+        output_file.setframerate(args.sample_rate_hz)
+        index = -1
+        with riva.client.AudioChunkFileIterator(args.audio_file, 1600) as audio_chunks:
+            for event in pipeline.generate(audio_chunks):
+                if event.index != index:
+                    index = event.index
+                    print(f"{event.transcript} -> {event.translation}")
+                output_file.writeframesraw(event.audio)
+        print(f"Written {output_file.getnframes()} samples to {args.output_file}")
+    for stage, stats in pipeline.stats.items():
+        print(
+            f"{stage}: {stats.n_items} items, mean latency {stats.mean_latency:.3f} s, "
+            f"max latency {stats.max_latency:.3f} s",
+            file=sys.stderr,
+        )
+
+
 def main():
     args = parse_arguments()
 
@@ -66,6 +106,10 @@ def main():
             sample_rate_hz=args.sample_rate_hz,
         )
 
+        if args.client_pipeline:
+            translate_with_client_pipeline(args, auth, nmt_client, asr_config)
+            return
+
         # Create streaming config
         streaming_config = riva_nmt_pb2.StreamingTranslateSpeechToSpeechConfig(
             asr_config=asr_config, translation_config=translation_config, tts_config=tts_config
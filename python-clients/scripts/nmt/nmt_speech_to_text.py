@@ -1,5 +1,6 @@
 import argparse
 import os
+import sys
 import riva.client
 import riva.client.proto.riva_asr_pb2 as riva_asr_pb2
 import riva.client.proto.riva_nmt_pb2 as riva_nmt_pb2
@@ -19,8 +20,10 @@ def parse_arguments():
     )
     parser.add_argument(
         '--target-language',
-        default='es-ES',
-        help='Target language code (default: es-ES)'
+        default=['es-ES'],
+        nargs='+',
+        help='Target language codes (default: es-ES). If several languages are given, then the audio file is read '
+        'once and translated into all languages in concurrent streams.'
     )
     parser.add_argument(
         '--model',
@@ -52,7 +55,7 @@ def main():
         return
 
     try:
-        print(f"Translating speech from {args.source_language} to {args.target_language}")
+        print(f"Translating speech from {args.source_language} to {', '.join(args.target_language)}")
         print(f"Using audio file: {args.audio_file}")
         print(f"Server address: {args.server}")
 
@@ -69,7 +72,7 @@ def main():
         # Create translation config
         translation_config = riva_nmt_pb2.TranslationConfig(
             source_language_code=args.source_language,
-            target_language_code=args.target_language,
+            target_language_code=args.target_language[0],
             model_name=args.model
         )
 
@@ -79,18 +82,22 @@ def main():
             translation_config=translation_config
         )
 
-        responses = nmt_client.streaming_s2t_response_generator(
-            audio_chunks=riva.client.AudioChunkFileIterator(args.audio_file, 100),
-            streaming_config=streaming_config
-        )
-
-        final_translation = ""
-        for response in responses:
-            for result in response.results:
-                if result.is_final:
-                    final_translation += result.alternatives[0].transcript
-
-        print(f"Final translation: {final_translation}")
+        translator = riva.client.MultiTargetSpeechToText(nmt_client, streaming_config, args.target_language)
+        final_translations = {target_language: "" for target_language in args.target_language}
+        with riva.client.AudioChunkFileIterator(args.audio_file, 100) as audio_chunks:
+            for target_language, response in translator.generate(audio_chunks):
+                for result in response.results:
+                    if result.is_final:
+                        final_translations[target_language] += result.alternatives[0].transcript
+
+        for target_language, final_translation in final_translations.items():
+            print(f"Final translation ({target_language}): {final_translation}")
+            stats = translator.stats[target_language]
+            print(
+                f"{target_language}: {stats.n_items} final results, mean latency {stats.mean_latency:.3f} s, "
+                f"max latency {stats.max_latency:.3f} s",
+                file=sys.stderr,
+            )
 
     except Exception as e:
         print(f"Error during translation: {e}")
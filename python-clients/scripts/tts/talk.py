@@ -8,7 +8,8 @@ import json
 from pathlib import Path
 
 import riva.client
-from riva.client.argparse_utils import add_connection_argparse_parameters
+from riva.client.argparse_utils import add_connection_argparse_parameters, add_discovery_argparse_parameters
+from riva.client.discovery import CapabilityDiscovery
 from riva.client.proto.riva_audio_pb2 import AudioEncoding
 
 def read_file_to_dict(file_path):
@@ -58,12 +59,24 @@ def parse_args() -> argparse.Namespace:
         "then the default output audio device will be used.",
     )
     parser.add_argument("--output-device", type=int, help="Output device to use.")
+    parser.add_argument(
+        "--playback-prebuffer",
+        type=float,
+        default=0.2,
+        help="Seconds of audio buffered before playback starts. Audio is played on a separate thread, so a larger "
+        "prebuffer protects playback from network jitter without slowing down receiving of audio.",
+    )
     parser.add_argument("--language-code", default='en-US', help="A language of input text.")
     parser.add_argument(
         "--sample-rate-hz", type=int, default=44100, help="Number of audio frames per second in synthesized audio."
     )
     parser.add_argument("--encoding", default="LINEAR_PCM", choices={"LINEAR_PCM", "OGGOPUS"}, help="Output audio encoding.")
     parser.add_argument("--custom-dictionary", type=str, help="A file path to a user dictionary with key-value pairs separated by double spaces.")
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        help="A directory where synthesized audio is cached. Identical requests are served from the cache.",
+    )
     parser.add_argument(
         "--stream",
         action="store_true",
@@ -71,12 +84,22 @@ def parse_args() -> argparse.Namespace:
         "as it gets ready. If `--stream` is not set, then a synthesized audio is returned in 1 response only when "
         "all text is processed.",
     )
+    parser.add_argument(
+        "--parallel",
+        action="store_true",
+        help="If this option is set, then text is split into sentences which are synthesized concurrently and audio "
+        "is yielded sentence by sentence in order. The first sentence is shortened to reduce time to first audio.",
+    )
+    parser.add_argument(
+        "--max-in-flight", type=int, default=4, help="A number of sentences synthesized simultaneously with `--parallel`."
+    )
     parser.add_argument(
         "--zero_shot_transcript",
         type=str,
         help="Transcript corresponding to Zero shot audio prompt.",
     )
     parser = add_connection_argparse_parameters(parser)
+    parser = add_discovery_argparse_parameters(parser)
     args = parser.parse_args()
     if args.output is not None:
         args.output = args.output.expanduser()
@@ -100,27 +123,19 @@ def main() -> None:
         return
 
     auth = riva.client.Auth(args.ssl_cert, args.use_ssl, args.server, args.metadata)
-    service = riva.client.SpeechSynthesisService(auth)
+    if args.cache_dir is not None:
+        service = riva.client.CachingSpeechSynthesisService(auth, disk_cache_dir=args.cache_dir)
+    else:
+        service = riva.client.SpeechSynthesisService(auth)
     nchannels = 1
     sampwidth = 2
     sound_stream, out_f = None, None
 
     if args.list_voices:
-        config_response = service.stub.GetRivaSynthesisConfig(
-                riva.client.proto.riva_tts_pb2.RivaSynthesisConfigRequest()
-            )
-        tts_models = dict()
-        for model_config in config_response.model_config:
-                language_code = model_config.parameters['language_code']
-                voice_name = model_config.parameters['voice_name']
-                subvoices = [voice.split(':')[0] for voice in model_config.parameters['subvoices'].split(',')]
-                full_voice_names = [voice_name + "." + subvoice for subvoice in subvoices]
-
-                if language_code in tts_models:
-                    tts_models[language_code]['voices'].extend(full_voice_names)
-                else:
-                    tts_models[language_code] = {"voices": full_voice_names}
-
+        capabilities = CapabilityDiscovery(auth, args.capabilities_cache_dir, args.capabilities_ttl).tts()
+        tts_models = {
+            language_code: {"voices": capabilities.voices(language_code)} for language_code in capabilities.languages
+        }
         tts_models = dict(sorted(tts_models.items()))
         print(json.dumps(tts_models, indent=4))
         return
@@ -131,8 +146,12 @@ def main() -> None:
 
     try:
         if args.output_device is not None or args.play_audio:
-            sound_stream = riva.client.audio_io.SoundCallBack(
-                args.output_device, nchannels=nchannels, sampwidth=sampwidth, framerate=args.sample_rate_hz
+            sound_stream = riva.client.audio_io.open_playback(
+                args.output_device,
+                nchannels=nchannels,
+                sampwidth=sampwidth,
+                framerate=args.sample_rate_hz,
+                prebuffer_seconds=args.playback_prebuffer,
             )
         if args.output is not None:
             out_f = wave.open(str(args.output), 'wb')
@@ -146,14 +165,26 @@ def main() -> None:
 
         print("Generating audio for request...")
         start = time.time()
-        if args.stream:
+        if args.parallel:
+            responses = service.synthesize_parallel(
+                args.text, args.voice, args.language_code, sample_rate_hz=args.sample_rate_hz,
+                encoding=(AudioEncoding.OGGOPUS if args.encoding == "OGGOPUS" else AudioEncoding.LINEAR_PCM),
+                zero_shot_audio_prompt_file=args.zero_shot_audio_prompt_file,
+                zero_shot_quality=(20 if args.zero_shot_quality is None else args.zero_shot_quality),
+                custom_dictionary=custom_dictionary_input,
+                zero_shot_transcript=args.zero_shot_transcript,
+                max_in_flight=args.max_in_flight,
+            )
+        elif args.stream:
             responses = service.synthesize_online(
                 args.text, args.voice, args.language_code, sample_rate_hz=args.sample_rate_hz,
                 encoding=(AudioEncoding.OGGOPUS if args.encoding == "OGGOPUS" else AudioEncoding.LINEAR_PCM),
                 zero_shot_audio_prompt_file=args.zero_shot_audio_prompt_file,
                 zero_shot_quality=(20 if args.zero_shot_quality is None else args.zero_shot_quality),
                 custom_dictionary=custom_dictionary_input,
+                zero_shot_transcript=args.zero_shot_transcript,
             )
+        if args.parallel or args.stream:
             first = True
             for resp in responses:
                 stop = time.time()
@@ -186,6 +217,8 @@ def main() -> None:
             out_f.close()
         if sound_stream is not None:
             sound_stream.close()
+            if sound_stream.underruns or sound_stream.overruns:
+                print(f"Playback: {sound_stream.underruns} underruns, {sound_stream.overruns} overruns.")
 
 
 if __name__ == '__main__':
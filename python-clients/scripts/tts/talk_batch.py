@@ -0,0 +1,254 @@
+# SPDX-FileCopyrightText: Copyright (c) 2022 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Generator, Optional, Set, Tuple
+
+import riva.client
+from riva.client.argparse_utils import add_connection_argparse_parameters
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Batch speech synthesis of text files via Riva AI Services. Every line of an input file is "
+        "synthesized into a separate WAV file. Several requests are processed simultaneously over one connection "
+        "and audio is written to disk by a pool of writer threads. Rendered lines are recorded in a manifest, so an "
+        "interrupted run can be resumed.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--input-file",
+        type=Path,
+        required=True,
+        help="A text file with one text per line, or a JSONL file (`.jsonl` extension or `--jsonl` option) where "
+        "every line is an object with a required field `text` and optional fields `id`, `voice` and `language_code`.",
+    )
+    parser.add_argument("--jsonl", action="store_true", help="Parse input file as JSONL regardless of its extension.")
+    parser.add_argument(
+        "--output-dir", type=Path, required=True, help="A directory where `<id>.wav` files are written."
+    )
+    parser.add_argument(
+        "--manifest",
+        type=Path,
+        help="A JSONL file where a result of every line is appended. Lines which were rendered successfully according "
+        "to the manifest are skipped. Defaults to `manifest.jsonl` in `--output-dir`.",
+    )
+    parser.add_argument(
+        "--voice",
+        help="A default voice name. If this parameter is missing, then the server will try a first available model "
+        "based on language code.",
+    )
+    parser.add_argument("--language-code", default='en-US', help="A default language of input texts.")
+    parser.add_argument(
+        "--sample-rate-hz", type=int, default=44100, help="Number of audio frames per second in synthesized audio."
+    )
+    parser.add_argument("--max-in-flight", type=int, default=8, help="A number of requests processed simultaneously.")
+    parser.add_argument("--writers", type=int, default=2, help="A number of threads writing audio files.")
+    parser.add_argument(
+        "--max-pending-writes",
+        type=int,
+        default=16,
+        help="A maximum number of synthesized audios waiting to be written. When the limit is reached, no new "
+        "requests are sent until writers catch up, so memory use is bounded.",
+    )
+    parser.add_argument("--report-every", type=int, default=100, help="Print progress every N rendered lines.")
+    parser = add_connection_argparse_parameters(parser)
+    args = parser.parse_args()
+    if args.max_in_flight < 1 or args.writers < 1 or args.max_pending_writes < 1:
+        parser.error("`--max-in-flight`, `--writers` and `--max-pending-writes` have to be positive.")
+    args.output_dir = args.output_dir.expanduser()
+    args.manifest = args.output_dir / "manifest.jsonl" if args.manifest is None else args.manifest.expanduser()
+    return args
+
+
+def read_items(
+    input_file: Path, jsonl: bool, voice: Optional[str], language_code: str
+) -> Generator[Tuple[str, str, Optional[str], str], None, None]:
+    """
+    Yields ``(id, text, voice, language_code)`` for every nonempty line of :param:`input_file`. Raises
+    :obj:`ValueError` if a JSONL line is not an object with a string field ``text``, or if an id is repeated or is
+    not a plain file name, because ids name output files.
+    """
+    seen_ids = set()
+    with input_file.expanduser().open(encoding='utf-8') as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            if jsonl:
+                item = json.loads(line)
+                if not isinstance(item, dict) or not isinstance(item.get('text'), str):
+                    raise ValueError(
+                        f"Line {line_number} of {input_file} has to be an object with a string field `text`."
+                    )
+                item_id = str(item.get('id', line_number))
+                if item_id in ('', '.', '..') or Path(item_id).name != item_id or '\\' in item_id:
+                    raise ValueError(
+                        f"An id has to be a file name without directories whereas id {item_id!r} was given in line "
+                        f"{line_number} of {input_file}."
+                    )
+                if item_id in seen_ids:
+                    raise ValueError(f"Id {item_id!r} in line {line_number} of {input_file} is repeated.")
+                seen_ids.add(item_id)
+                yield (
+                    item_id,
+                    item['text'],
+                    item.get('voice', voice),
+                    item.get('language_code', language_code),
+                )
+            else:
+                yield str(line_number), line, voice, language_code
+
+
+def read_manifest(path: Path) -> Set[str]:
+    """Returns ids of lines which were rendered successfully."""
+    done = set()
+    if path.exists():
+        with path.open(encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A record may be truncated if a previous run was killed.
+                    continue
+                if record.get('status') == 'ok':
+                    done.add(record['id'])
+    return done
+
+
+def write_wav(path: Path, audio: bytes, sample_rate_hz: int) -> None:
+    tmp_path = path.with_name(path.name + '.tmp')
+    with wave.open(str(tmp_path), 'wb') as out_f:
+        out_f.setnchannels(1)
+        out_f.setsampwidth(2)
+        out_f.setframerate(sample_rate_hz)
+        out_f.writeframesraw(audio)
+    os.replace(tmp_path, path)
+
+
+class BatchRenderer:
+    def __init__(self, service: riva.client.SpeechSynthesisService, args: argparse.Namespace) -> None:
+        self.service = service
+        self.args = args
+        self.profiles: Dict[Tuple[Optional[str], str], riva.client.VoiceProfile] = {}
+        self.request_slots = threading.Semaphore(args.max_in_flight)
+        self.write_slots = threading.Semaphore(args.max_in_flight + args.max_pending_writes)
+        self.writers = ThreadPoolExecutor(max_workers=args.writers)
+        self.lock = threading.Lock()
+        self.manifest = args.manifest.open('a', encoding='utf-8')
+        self.n_ok = 0
+        self.n_failed = 0
+        self.audio_seconds = 0.0
+        self.start = time.time()
+
+    def profile(self, voice: Optional[str], language_code: str) -> riva.client.VoiceProfile:
+        key = (voice, language_code)
+        if key not in self.profiles:
+            self.profiles[key] = riva.client.VoiceProfile(voice, language_code, sample_rate_hz=self.args.sample_rate_hz)
+        return self.profiles[key]
+
+    def record(self, item_id: str, output: Path, error: Optional[str] = None, audio_seconds: float = 0.0) -> None:
+        if error is None:
+            record = {'id': item_id, 'status': 'ok', 'output': str(output), 'audio_seconds': round(audio_seconds, 3)}
+        else:
+            record = {'id': item_id, 'status': 'failed', 'error': error}
+        with self.lock:
+            self.manifest.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self.manifest.flush()
+            if error is None:
+                self.n_ok += 1
+                self.audio_seconds += audio_seconds
+            else:
+                self.n_failed += 1
+                print(f"Failed to render line {item_id}: {error}", file=sys.stderr)
+            if (self.n_ok + self.n_failed) % self.args.report_every == 0:
+                self.report()
+
+    def report(self) -> None:
+        elapsed = time.time() - self.start
+        print(
+            f"Rendered {self.n_ok} lines, {self.n_failed} failed, {self.audio_seconds:.1f}s of audio in {elapsed:.1f}s "
+            f"({self.audio_seconds / max(elapsed, 1e-9):.1f} audio seconds per second)."
+        )
+
+    def write(self, item_id: str, output: Path, audio: bytes) -> None:
+        try:
+            write_wav(output, audio, self.args.sample_rate_hz)
+            self.record(item_id, output, audio_seconds=len(audio) / 2 / self.args.sample_rate_hz)
+        except Exception as e:
+            self.record(item_id, output, error=repr(e))
+        finally:
+            self.write_slots.release()
+
+    def on_done(self, item_id: str, output: Path, future) -> None:
+        # Called on a gRPC thread, so the thread only hands the audio over to writers.
+        self.request_slots.release()
+        try:
+            audio = future.result().audio
+        except Exception as e:
+            details = getattr(e, 'details', None)
+            self.record(item_id, output, error=details() if callable(details) else repr(e))
+            self.write_slots.release()
+            return
+        self.writers.submit(self.write, item_id, output, audio)
+
+    def render(self, items) -> None:
+        for item_id, text, voice, language_code in items:
+            output = self.args.output_dir / f"{item_id}.wav"
+            try:
+                profile = self.profile(voice, language_code)
+            except ValueError as e:
+                self.record(item_id, output, error=str(e))
+                continue
+            self.write_slots.acquire()
+            self.request_slots.acquire()
+            try:
+                future = self.service.synthesize_with_profile(text, profile, future=True)
+            except Exception as e:
+                self.request_slots.release()
+                self.write_slots.release()
+                self.record(item_id, output, error=repr(e))
+                continue
+            future.add_done_callback(lambda f, i=item_id, o=output: self.on_done(i, o, f))
+        # Waits for all requests and writes.
+        for _ in range(self.args.max_in_flight + self.args.max_pending_writes):
+            self.write_slots.acquire()
+        self.writers.shutdown()
+        self.manifest.close()
+
+
+def main() -> None:
+    args = parse_args()
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    done = read_manifest(args.manifest)
+    jsonl = args.jsonl or args.input_file.suffix == '.jsonl'
+    if jsonl:
+        # Ids are checked before rendering, so an invalid input file does not leave a partial output.
+        try:
+            for _ in read_items(args.input_file, jsonl, args.voice, args.language_code):
+                pass
+        except ValueError as e:
+            sys.exit(str(e))
+    items = (
+        item for item in read_items(args.input_file, jsonl, args.voice, args.language_code) if item[0] not in done
+    )
+    if done:
+        print(f"Skipping {len(done)} lines rendered according to manifest {args.manifest}.")
+    auth = riva.client.Auth(args.ssl_cert, args.use_ssl, args.server, args.metadata)
+    renderer = BatchRenderer(riva.client.SpeechSynthesisService(auth), args)
+    renderer.render(items)
+    renderer.report()
+    if renderer.n_failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
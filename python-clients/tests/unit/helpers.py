@@ -1,7 +1,9 @@
 # SPDX-FileCopyrightText: Copyright (c) 2022 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
 # SPDX-License-Identifier: MIT
 
-from typing import Tuple
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, List, Tuple
 from unittest.mock import Mock
 
 
@@ -10,3 +12,30 @@ def set_auth_mock() -> Tuple[Mock, str]:
     return_value_of_get_auth_metadata = 'return_value_of_get_auth_metadata'
     auth.get_auth_metadata = Mock(return_value=return_value_of_get_auth_metadata)
     return auth, return_value_of_get_auth_metadata
+
+
+class ReverseOrderFutureMock:
+    """
+    A mock of a ``future`` method of a unary gRPC call. Completes pending requests in reverse order when `n_pending`
+    requests are pending or all `n_requests` requests are sent. A response is made of a request by `make_response`.
+    """
+    def __init__(self, make_response: Callable[[Any], Any], n_pending: int, n_requests: int) -> None:
+        self.make_response = make_response
+        self.n_pending = n_pending
+        self.n_requests = n_requests
+        self.futures: List[Tuple[Future, Any]] = []
+        self.requests: List[Any] = []
+        self.max_pending = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, request: Any, metadata: Any = None) -> Future:
+        future = Future()
+        with self.lock:
+            self.requests.append(request)
+            self.futures.append((future, self.make_response(request)))
+            pending = [f for f in self.futures if not f[0].done()]
+            self.max_pending = max(self.max_pending, len(pending))
+            if len(pending) == self.n_pending or len(self.requests) == self.n_requests:
+                for f, response in reversed(pending):
+                    f.set_result(response)
+        return future
@@ -0,0 +1,99 @@
+# SPDX-FileCopyrightText: Copyright (c) 2022 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import threading
+import time
+from typing import List
+
+import riva.client.proto.riva_asr_pb2 as rasr
+from riva.client.asr_postprocessing import AsyncPunctuationStage
+from riva.client.coalescing import RequestCoalescer
+
+
+def make_response(transcript: str, is_final: bool) -> rasr.StreamingRecognizeResponse:
+    response = rasr.StreamingRecognizeResponse()
+    result = response.results.add(is_final=is_final)
+    result.alternatives.add(transcript=transcript)
+    return response
+
+
+RESPONSES = [
+    make_response('hello', False),
+    make_response('hello world ', True),
+    make_response('how', False),
+    make_response('how are you ', True),
+]
+
+
+def transcripts(responses: List[rasr.StreamingRecognizeResponse]) -> List[str]:
+    return [r.results[0].alternatives[0].transcript for r in responses]
+
+
+def test_finals_are_punctuated_in_order() -> None:
+    with RequestCoalescer(lambda texts: [text.capitalize() + '.' for text in texts], max_delay=0.001) as coalescer:
+        stage = AsyncPunctuationStage(coalescer, latency_budget=5.0)
+        output = list(stage.process(RESPONSES))
+    finals = [r for r in output if r.results[0].is_final]
+    assert transcripts(finals) == ['Hello world. ', 'How are you. ']
+    assert transcripts(output)[:2] == ['hello', 'Hello world. '] and transcripts(output)[-1] == 'How are you. '
+    assert stage.stats['n_punctuated'] == 2
+    assert transcripts(RESPONSES)[1] == 'hello world '
+
+
+def test_fallback_to_raw_text_when_budget_is_exceeded() -> None:
+    release = threading.Event()
+
+    def slow_punctuation(texts: List[str]) -> List[str]:
+        release.wait(5.0)
+        return [text + '.' for text in texts]
+
+    with RequestCoalescer(slow_punctuation, max_delay=0.001) as coalescer:
+        stage = AsyncPunctuationStage(coalescer, latency_budget=0.05)
+        start = time.monotonic()
+        output = list(stage.process(RESPONSES))
+        elapsed = time.monotonic() - start
+        release.set()
+    assert transcripts([r for r in output if r.results[0].is_final]) == ['hello world ', 'how are you ']
+    assert stage.stats['n_fallbacks'] == 2
+    assert elapsed < 2.0
+
+
+def test_interim_results_wait_for_previous_finals() -> None:
+    def slow_punctuation(texts: List[str]) -> List[str]:
+        time.sleep(0.1)
+        return [text + '.' for text in texts]
+
+    def responses():
+        yield make_response('hello', False)
+        yield make_response('hello world ', True)
+        yield make_response('how', False)
+        yield make_response('how are', False)
+        time.sleep(0.3)
+        yield make_response('how are you ', True)
+
+    with RequestCoalescer(slow_punctuation, max_delay=0.001) as coalescer:
+        stage = AsyncPunctuationStage(coalescer, latency_budget=5.0)
+        output = stage.process(responses())
+        assert transcripts([next(output)]) == ['hello']
+        assert transcripts(list(output)) == ['hello world. ', 'how are', 'how are you. ']
+
+
+def test_reader_stops_when_output_is_closed() -> None:
+    n_read = 0
+
+    def endless_responses():
+        nonlocal n_read
+        while True:
+            n_read += 1
+            yield make_response('hello', False)
+
+    with RequestCoalescer(lambda texts: texts, max_delay=0.001) as coalescer:
+        output = AsyncPunctuationStage(coalescer, max_queue_size=4).process(endless_responses())
+        next(output)
+        time.sleep(0.05)
+        assert n_read <= 6
+        output.close()
+        time.sleep(0.2)
+        n_read_after_close = n_read
+        time.sleep(0.2)
+        assert n_read == n_read_after_close
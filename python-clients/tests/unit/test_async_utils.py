@@ -0,0 +1,72 @@
+# SPDX-FileCopyrightText: Copyright (c) 2022 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+from concurrent.futures import Future
+from typing import Dict
+
+import pytest
+
+from riva.client.async_utils import merge_iterables, ordered_async_results
+
+
+def test_results_are_in_input_order() -> None:
+    def submit(item: int) -> Future:
+        future = Future()
+        future.set_result(item * 10)
+        return future
+
+    assert list(ordered_async_results(range(7), submit, 3)) == [0, 10, 20, 30, 40, 50, 60]
+
+
+def test_window_is_refilled_when_any_request_finishes() -> None:
+    futures: Dict[int, Future] = {}
+    max_in_flight_observed = 0
+
+    def submit(item: int) -> Future:
+        nonlocal max_in_flight_observed
+        future = Future()
+        futures[item] = future
+        max_in_flight_observed = max(max_in_flight_observed, sum(not f.done() for f in futures.values()))
+        if item == 4:
+            # The slow first request is finished only after all other requests were sent.
+            futures[0].set_result(0)
+        if item != 0:
+            future.set_result(item)
+        return future
+
+    assert list(ordered_async_results(range(5), submit, 2, max_buffered_results=4)) == [0, 1, 2, 3, 4]
+    assert max_in_flight_observed == 2
+
+
+def test_exception_is_raised_in_order() -> None:
+    def submit(item: int) -> Future:
+        future = Future()
+        if item == 1:
+            future.set_exception(RuntimeError("failed"))
+        else:
+            future.set_result(item)
+        return future
+
+    results = ordered_async_results(range(3), submit, 2)
+    assert next(results) == 0
+    with pytest.raises(RuntimeError):
+        next(results)
+
+
+def test_wrong_max_in_flight() -> None:
+    with pytest.raises(ValueError):
+        list(ordered_async_results([1], lambda x: None, 0))
+
+
+def test_merge_iterables_yields_items_of_all_sources_and_raises_errors() -> None:
+    def source(items):
+        return lambda stop: iter(items)
+
+    def failing(stop):
+        yield 'x'
+        raise RuntimeError('source failed')
+
+    merged = list(merge_iterables([source([1, 2]), source([]), source(['a'])], max_buffered_results=1))
+    assert sorted(merged, key=str) == [(0, 1), (0, 2), (2, 'a')]
+    with pytest.raises(RuntimeError, match='source failed'):
+        list(merge_iterables([failing, source(range(1000))]))
@@ -0,0 +1,100 @@
+# SPDX-FileCopyrightText: Copyright (c) 2022 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import io
+import struct
+import wave
+from unittest.mock import Mock
+
+import pytest
+
+import riva.client.proto.riva_asr_pb2 as rasr
+import riva.client.proto.riva_tts_pb2 as rtts
+from riva.client import AudioBuffer, AudioEncoding, VoiceProfile, add_audio_buffer_specs_to_config
+from riva.client.asr import ASRService, streaming_request_generator
+
+
+def test_views_share_memory() -> None:
+    data = bytearray(range(12))
+    buffer = AudioBuffer(data, 8000, nchannels=2)
+    assert buffer.n_frames == 3
+    assert buffer.duration == 3 / 8000
+    middle = buffer[1:2]
+    assert middle.tobytes() == bytes(range(4, 8))
+    data[4] = 100
+    assert middle.data[0] == 100
+    assert [chunk.n_frames for chunk in buffer.chunks(2)] == [2, 1]
+    with pytest.raises(ValueError):
+        AudioBuffer(b'abc', 8000)
+
+
+def test_tobytes_does_not_copy_whole_bytes() -> None:
+    data = b'\x00\x01' * 10
+    assert AudioBuffer(data, 8000).tobytes() is data
+
+
+def test_from_wav_file(tmp_path) -> None:
+    path = tmp_path / 'a.wav'
+    with wave.open(str(path), 'wb') as wf:
+        wf.setnchannels(2)
+        wf.setsampwidth(2)
+        wf.setframerate(16000)
+        wf.writeframes(bytes(range(40)))
+    buffer = AudioBuffer.from_wav_file(path)
+    assert (buffer.sample_rate_hz, buffer.nchannels, buffer.sampwidth, buffer.n_frames) == (16000, 2, 2, 10)
+    assert buffer.tobytes() == bytes(range(40))
+
+
+def test_from_wav_bytes_skips_other_chunks() -> None:
+    out = io.BytesIO()
+    with wave.open(out, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(8000)
+        wf.writeframes(bytes(range(20)))
+    wav_data = out.getvalue()
+    # A chunk of odd size, padded with one byte, between `fmt ` and `data` chunks.
+    extra = b'LIST' + struct.pack('<I', 3) + b'abc\x00'
+    wav_data = wav_data[:4] + struct.pack('<I', len(wav_data) - 8 + len(extra)) + wav_data[8:36] + extra + wav_data[36:]
+    buffer = AudioBuffer.from_wav_bytes(wav_data)
+    assert buffer.n_frames == 10 and buffer.tobytes() == bytes(range(20))
+
+
+def test_to_numpy_is_a_view() -> None:
+    np = pytest.importorskip('numpy')
+    samples = np.arange(8, dtype='<i2').reshape(4, 2)
+    buffer = AudioBuffer.from_numpy(samples, 16000)
+    assert buffer.nchannels == 2 and buffer.n_frames == 4
+    array = buffer[1:3].to_numpy()
+    assert array.tolist() == [[2, 3], [4, 5]]
+    samples[1, 0] = -1
+    assert array[0, 0] == -1
+    copy = buffer.copy().to_numpy()
+    copy[0, 0] = 7
+    assert samples[0, 0] == 0
+
+
+def test_asr_accepts_audio_buffer() -> None:
+    buffer = AudioBuffer(b'\x00' * 20, 8000)
+    config = rasr.RecognitionConfig()
+    add_audio_buffer_specs_to_config(config, buffer)
+    assert (config.sample_rate_hertz, config.audio_channel_count) == (8000, 1)
+    requests = list(streaming_request_generator(buffer.chunks(4), rasr.StreamingRecognitionConfig()))
+    assert [r.audio_content for r in requests[1:]] == [b'\x00' * 8, b'\x00' * 8, b'\x00' * 4]
+
+    service = ASRService.__new__(ASRService)
+    service.auth = Mock(get_auth_metadata=Mock(return_value=[]))
+    service.stub = Mock()
+    service.offline_recognize(buffer, config)
+    request = service.stub.Recognize.call_args[0][0]
+    assert request.audio == b'\x00' * 20
+    service.stub.StreamingRecognize = Mock(side_effect=lambda requests, metadata: list(requests))
+    assert len(list(service.streaming_response_generator(buffer, rasr.StreamingRecognitionConfig(), 3))) == 5
+
+
+def test_tts_response_as_audio_buffer() -> None:
+    response = rtts.SynthesizeSpeechResponse(audio=b'\x01\x00' * 5)
+    buffer = VoiceProfile(sample_rate_hz=22050).audio_buffer(response)
+    assert (buffer.sample_rate_hz, buffer.n_frames) == (22050, 5)
+    with pytest.raises(ValueError):
+        VoiceProfile(encoding=AudioEncoding.OGGOPUS).audio_buffer(response)
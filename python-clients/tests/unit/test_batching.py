@@ -0,0 +1,48 @@
+# SPDX-FileCopyrightText: Copyright (c) 2022 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import pytest
+
+from riva.client.batching import plan_length_bucketed_batches
+
+
+TEXTS = ['a ' * 20, 'b', 'c c', 'd ' * 19, 'e', 'f f f', 'g ' * 18, 'h h']
+
+
+def test_batches_cover_all_inputs() -> None:
+    plan = plan_length_bucketed_batches(TEXTS, max_batch_size=3)
+    assert sorted(i for batch in plan.batches for i in batch) == list(range(len(TEXTS)))
+    assert all(len(batch) <= 3 for batch in plan.batches)
+
+
+def test_restore_order() -> None:
+    plan = plan_length_bucketed_batches(TEXTS, max_batch_size=3)
+    results = [text.upper() for batch in plan.batch_inputs(TEXTS) for text in batch]
+    assert plan.restore_order(results) == [text.upper() for text in TEXTS]
+
+
+def test_padding_is_saved() -> None:
+    plan = plan_length_bucketed_batches(TEXTS, max_batch_size=2)
+    stats = plan.padding_stats()
+    assert stats['padding_saved'] > 0
+    assert stats['padding_saved'] == stats['naive_padding'] - stats['padding']
+
+
+def test_max_batch_tokens() -> None:
+    plan = plan_length_bucketed_batches(TEXTS, max_batch_size=8, max_batch_tokens=20)
+    for batch in plan.batches:
+        lengths = [plan.lengths[i] for i in batch]
+        assert len(batch) == 1 or len(lengths) * max(lengths) <= 20
+
+
+def test_lookahead_keeps_windows_apart() -> None:
+    plan = plan_length_bucketed_batches(TEXTS, max_batch_size=8, lookahead=4)
+    for batch in plan.batches:
+        assert len({i // 4 for i in batch}) == 1
+
+
+def test_char_length_unit() -> None:
+    plan = plan_length_bucketed_batches(['abc', 'a'], max_batch_size=2, length_unit='char')
+    assert plan.lengths == [3, 1]
+    with pytest.raises(ValueError):
+        plan_length_bucketed_batches(['abc'], max_batch_size=2, length_unit='word')
@@ -0,0 +1,149 @@
+# SPDX-FileCopyrightText: Copyright (c) 2022 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+from concurrent.futures import Future
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from riva.client.cache import MISSING, LRUCache, MmapFileCache, SqliteCache, TieredCache, cached_batch_call
+
+
+def test_lru_eviction() -> None:
+    cache = LRUCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert cache.get('b') is MISSING
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+
+
+def test_lru_ttl() -> None:
+    cache = LRUCache(ttl=10)
+    with patch('riva.client.cache.time.monotonic', return_value=100.0):
+        cache.put('a', 1)
+    with patch('riva.client.cache.time.monotonic', return_value=105.0):
+        assert cache.get('a') == 1
+    with patch('riva.client.cache.time.monotonic', return_value=111.0):
+        assert cache.get('a') is MISSING
+    assert len(cache) == 0
+
+
+def test_lru_max_bytes() -> None:
+    cache = LRUCache(max_entries=None, max_bytes=5)
+    cache.put('a', b'12')
+    cache.put('b', b'34')
+    assert cache.get('a') == b'12'
+    cache.put('c', b'56')
+    assert cache.get('b') is MISSING
+    assert cache.n_bytes == 4
+    cache.put('d', b'1234567')
+    assert len(cache) == 1 and cache.get('d') == b'1234567'
+
+
+def test_sqlite_cache_persists(tmp_path: Path) -> None:
+    path = tmp_path / 'cache.sqlite'
+    cache = SqliteCache(path)
+    cache.put('a', b'1')
+    cache.close()
+    cache = SqliteCache(path)
+    assert cache.get('a') == b'1'
+    assert cache.get('b') is MISSING
+    cache.close()
+
+
+def test_sqlite_cache_max_entries(tmp_path: Path) -> None:
+    cache = SqliteCache(tmp_path / 'cache.sqlite', max_entries=2)
+    with patch('riva.client.cache.time.time', side_effect=[1.0, 2.0, 3.0, 4.0]):
+        cache.put('a', b'1')
+        cache.put('b', b'2')
+        assert cache.get('a') == b'1'
+        cache.put('c', b'3')
+    assert len(cache) == 2
+    assert cache.get('b') is MISSING
+    cache.close()
+
+
+def test_sqlite_cache_hits_do_not_write(tmp_path: Path) -> None:
+    cache = SqliteCache(tmp_path / 'cache.sqlite', max_entries=2)
+    with patch('riva.client.cache.time.time', side_effect=[1.0, 2.0, 3.0, 4.0]):
+        cache.put('a', b'1')
+        cache.put('b', b'2')
+        n_changes = cache._connection.total_changes
+        assert cache.get('a') == b'1'
+        assert cache._connection.total_changes == n_changes
+        cache.put('c', b'3')
+    assert cache.get('b') is MISSING and cache.get('a') == b'1'
+    cache.close()
+
+
+def test_cached_batch_call_cancels_request() -> None:
+    cache = TieredCache(LRUCache())
+    request = Future()
+    result = cached_batch_call(cache, ['a'], ['a'], lambda inputs, future: request, list, list, future=True)
+    assert result.cancel()
+    assert request.cancelled()
+    assert cache.get('a') is MISSING
+
+
+def test_tiered_cache_stats(tmp_path: Path) -> None:
+    disk = SqliteCache(tmp_path / 'cache.sqlite')
+    disk.put('a', b'1')
+    cache = TieredCache(LRUCache(), disk)
+    assert cache.get('a') == b'1'
+    assert cache.get('a') == b'1'
+    assert cache.get('b') is MISSING
+    assert cache.stats.as_dict() == {
+        'hits': 2, 'memory_hits': 1, 'disk_hits': 1, 'misses': 1, 'deduplicated': 0, 'hit_rate': 2 / 3
+    }
+    cache.close()
+
+
+def test_tiered_cache_promotion_keeps_write_time(tmp_path: Path) -> None:
+    disk = SqliteCache(tmp_path / 'cache.sqlite', ttl=10)
+    cache = TieredCache(LRUCache(ttl=10), disk)
+    with patch('riva.client.cache.time.time', return_value=1000.0):
+        disk.put('a', b'1')
+    with patch('riva.client.cache.time.time', return_value=1008.0), patch(
+        'riva.client.cache.time.monotonic', return_value=100.0
+    ):
+        assert cache.get('a') == b'1'
+    with patch('riva.client.cache.time.monotonic', return_value=103.0):
+        assert cache.memory.get('a') is MISSING
+    cache.close()
+
+
+def test_mmap_file_cache(tmp_path: Path) -> None:
+    cache = MmapFileCache(tmp_path, max_bytes=5)
+    cache.put('aa11', b'12')
+    cache.put('bb22', b'')
+    cache.put('cc33', b'34')
+    assert cache.get('aa11')[:] == b'12'
+    assert cache.get('bb22') == b''
+    cache.put('dd44', b'56')
+    assert cache.get('cc33') is MISSING
+    assert not (tmp_path / 'cc' / 'cc33').exists()
+    reopened = MmapFileCache(tmp_path, max_bytes=5)
+    assert len(reopened) == 3 and reopened.n_bytes == 4
+    assert bytes(reopened.get('dd44')) == b'56'
+    with pytest.raises(ValueError):
+        cache.get('../x')
+
+
+def test_mmap_file_cache_closes_maps(tmp_path: Path) -> None:
+    cache = MmapFileCache(tmp_path, max_bytes=4, max_open_maps=1)
+    cache.put('aa11', b'12')
+    cache.put('bb22', b'34')
+    view = cache.get('aa11')
+    map_a = view.obj
+    assert bytes(cache.get('aa11')) == b'12' and cache.get('aa11').obj is map_a
+    view.release()
+    map_b = cache.get('bb22').obj
+    assert map_a.closed and not map_b.closed
+    cache.put('cc33', b'56')
+    assert cache.get('aa11') is MISSING
+    cache.close()
+    assert map_b.closed
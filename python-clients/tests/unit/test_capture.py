@@ -0,0 +1,71 @@
+# SPDX-FileCopyrightText: Copyright (c) 2022 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import threading
+import time
+
+import pytest
+
+from riva.client.capture import CaptureBuffer
+
+
+def frames(start: int, n: int) -> bytes:
+    return b''.join(i.to_bytes(2, 'little') for i in range(start, start + n))
+
+
+def test_chunks_are_bounded_and_timestamped() -> None:
+    buffer = CaptureBuffer(2, 1, 10, buffer_seconds=2, max_chunk_seconds=0.4)
+    buffer.write(frames(0, 3), capture_time=100.0)
+    buffer.write(frames(3, 3), capture_time=100.3)
+    assert buffer.read() == (frames(0, 4), 100.0)
+    assert buffer.read() == (frames(4, 2), pytest.approx(100.4))
+    buffer.write(frames(6, 1), capture_time=100.6)
+    buffer.close()
+    assert buffer.read() == (frames(6, 1), pytest.approx(100.6))
+    assert buffer.read() is None
+    assert buffer.stats['captured_seconds'] == pytest.approx(0.7)
+
+
+def test_drop_oldest_keeps_latest_audio() -> None:
+    buffer = CaptureBuffer(2, 1, 10, buffer_seconds=0.4, max_chunk_seconds=0.4)
+    buffer.write(frames(0, 3), capture_time=0.0)
+    buffer.write(frames(3, 3), capture_time=0.3)
+    assert buffer.read() == (frames(2, 4), pytest.approx(0.2))
+    buffer.write(frames(6, 6), capture_time=0.6)
+    assert buffer.read() == (frames(8, 4), pytest.approx(0.8))
+    assert buffer.overruns == 2
+    assert buffer.stats['dropped_seconds'] == pytest.approx(0.4)
+
+
+def test_min_chunk_duration() -> None:
+    buffer = CaptureBuffer(2, 1, 10, buffer_seconds=1, max_chunk_seconds=0.5, min_chunk_seconds=0.2)
+    result = []
+    reader = threading.Thread(target=lambda: result.append(buffer.read()))
+    reader.start()
+    buffer.write(frames(0, 1))
+    time.sleep(0.05)
+    assert not result
+    buffer.write(frames(1, 1))
+    reader.join(5)
+    assert result[0][0] == frames(0, 2)
+
+
+def test_block_and_error_policies() -> None:
+    buffer = CaptureBuffer(2, 1, 10, buffer_seconds=0.2, max_chunk_seconds=0.2, overflow='block')
+    buffer.write(frames(0, 2))
+    writer = threading.Thread(target=buffer.write, args=(frames(2, 2),))
+    writer.start()
+    assert buffer.read()[0] == frames(0, 2)
+    writer.join(5)
+    assert buffer.read()[0] == frames(2, 2)
+    assert buffer.overruns == 1 and buffer.dropped_bytes == 0
+
+    buffer = CaptureBuffer(2, 1, 10, buffer_seconds=0.2, max_chunk_seconds=0.2, overflow='error')
+    buffer.write(frames(0, 2))
+    buffer.write(frames(2, 1))
+    with pytest.raises(RuntimeError):
+        buffer.read()
+    with pytest.raises(ValueError):
+        CaptureBuffer(2, 1, 10, overflow='drop')
+    with pytest.raises(ValueError):
+        CaptureBuffer(2, 1, 10, max_chunk_seconds=0.1, min_chunk_seconds=0.2)
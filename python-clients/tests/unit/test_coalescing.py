@@ -0,0 +1,101 @@
+# SPDX-FileCopyrightText: Copyright (c) 2022 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import threading
+from typing import List
+from unittest.mock import Mock
+
+import pytest
+
+import riva.client.proto.riva_nlp_pb2 as rnlp
+from riva.client.coalescing import RequestCoalescer, punctuate_text_coalescer
+
+
+def test_concurrent_calls_are_merged() -> None:
+    batches: List[List[int]] = []
+    barrier = threading.Barrier(8)
+
+    def process_batch(items: List[int]) -> List[int]:
+        batches.append(items)
+        return [item * 2 for item in items]
+
+    results = [None] * 8
+    with RequestCoalescer(process_batch, max_batch_size=8, max_delay=0.5) as coalescer:
+        def call(i: int) -> None:
+            barrier.wait()
+            results[i] = coalescer(i)
+
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert results == [i * 2 for i in range(8)]
+    assert len(batches) == 1
+    assert coalescer.stats.n_batches == 1
+    assert coalescer.stats.mean_batch_size == 8
+    assert coalescer.stats.max_queueing_delay < 0.5
+
+
+def test_max_batch_size() -> None:
+    batches: List[List[int]] = []
+
+    def process_batch(items: List[int]) -> List[int]:
+        batches.append(items)
+        return items
+
+    with RequestCoalescer(process_batch, max_batch_size=3, max_delay=0.05) as coalescer:
+        futures = [coalescer.submit(i) for i in range(7)]
+        assert [f.result() for f in futures] == list(range(7))
+    assert all(len(batch) <= 3 for batch in batches)
+
+
+def test_error_is_passed_to_all_callers() -> None:
+    def process_batch(items: List[int]) -> List[int]:
+        raise RuntimeError("server error")
+
+    with RequestCoalescer(process_batch, max_delay=0.01) as coalescer:
+        futures = [coalescer.submit(i) for i in range(3)]
+        for future in futures:
+            with pytest.raises(RuntimeError):
+                future.result()
+
+
+def test_submit_racing_with_close_is_answered() -> None:
+    coalescer = RequestCoalescer(lambda items: items, max_delay=0.001)
+    futures = []
+
+    def submit() -> None:
+        for i in range(200):
+            try:
+                futures.append(coalescer.submit(i))
+            except RuntimeError:
+                return
+
+    threads = [threading.Thread(target=submit) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    coalescer.close()
+    for thread in threads:
+        thread.join()
+    assert all(future.done() for future in futures)
+
+
+def test_asyncio() -> None:
+    async def main(coalescer: RequestCoalescer) -> List[int]:
+        return await asyncio.gather(*[coalescer.process_async(i) for i in range(5)])
+
+    with RequestCoalescer(lambda items: [item + 1 for item in items], max_delay=0.01) as coalescer:
+        assert asyncio.run(main(coalescer)) == [1, 2, 3, 4, 5]
+
+
+def test_punctuate_text_coalescer() -> None:
+    nlp_service = Mock()
+    nlp_service.punctuate_text = Mock(
+        side_effect=lambda texts, *args: rnlp.TextTransformResponse(text=[text + '.' for text in texts])
+    )
+    with punctuate_text_coalescer(nlp_service, max_batch_size=4, max_delay=0.05) as coalescer:
+        futures = [coalescer.submit(text) for text in ['a', 'b', 'c']]
+        assert [f.result() for f in futures] == ['a.', 'b.', 'c.']
+    nlp_service.punctuate_text.assert_called_once_with(['a', 'b', 'c'], None, 'en-US')
@@ -0,0 +1,122 @@
+# SPDX-FileCopyrightText: Copyright (c) 2022 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import time
+from unittest.mock import Mock
+
+import pytest
+
+import riva.client.proto.riva_asr_pb2 as rasr
+import riva.client.proto.riva_nmt_pb2 as riva_nmt
+import riva.client.proto.riva_tts_pb2 as rtts
+from riva.client.discovery import ASRCapabilities, CapabilityDiscovery, NMTCapabilities, TTSCapabilities
+
+
+def asr_response() -> rasr.RivaSpeechRecognitionConfigResponse:
+    response = rasr.RivaSpeechRecognitionConfigResponse()
+    for name, model_type, language_code in [
+        ('conformer-en-streaming', 'online', 'en-US'),
+        ('conformer-en-offline', 'offline', 'en-US'),
+        ('parakeet-multi', 'online', 'es-US,de-DE'),
+    ]:
+        config = response.model_config.add(model_name=name)
+        config.parameters['type'] = model_type
+        config.parameters['language_code'] = language_code
+    return response
+
+
+def tts_response() -> rtts.RivaSynthesisConfigResponse:
+    response = rtts.RivaSynthesisConfigResponse()
+    config = response.model_config.add(model_name='fastpitch')
+    config.parameters['language_code'] = 'en-US'
+    config.parameters['voice_name'] = 'English-US'
+    config.parameters['subvoices'] = 'Female-1:0,Male-1:1'
+    config = response.model_config.add(model_name='magpie-es')
+    config.parameters['language_code'] = 'es-US'
+    config.parameters['voice_name'] = 'Multilingual'
+    config.parameters['subvoices'] = 'Female-1:0'
+    config = response.model_config.add(model_name='magpie-fr')
+    config.parameters['language_code'] = 'fr-FR'
+    config.parameters['voice_name'] = 'Multilingual'
+    config.parameters['subvoices'] = 'Female-1:0'
+    return response
+
+
+def nmt_response() -> riva_nmt.AvailableLanguageResponse:
+    response = riva_nmt.AvailableLanguageResponse()
+    pair = response.languages['any_en']
+    pair.src_lang.extend(['de', 'fr', 'en'])
+    pair.tgt_lang.append('en')
+    return response
+
+
+def test_asr_capabilities() -> None:
+    capabilities = ASRCapabilities(asr_response())
+    assert capabilities.languages == ['de-DE', 'en-US', 'es-US']
+    assert capabilities.models('en-US', 'online') == ['conformer-en-streaming']
+    assert capabilities.models('de-DE') == ['parakeet-multi']
+    capabilities.validate('en-US', 'conformer-en-offline', 'offline')
+    with pytest.raises(ValueError):
+        capabilities.validate('fr-FR')
+    with pytest.raises(ValueError):
+        capabilities.validate('en-US', 'conformer-en-offline', 'online')
+
+
+def test_tts_capabilities() -> None:
+    capabilities = TTSCapabilities(tts_response())
+    assert capabilities.voices('en-US') == ['English-US.Female-1', 'English-US.Male-1']
+    assert capabilities.subvoices_by_voice == {'English-US': ['Female-1', 'Male-1'], 'Multilingual': ['Female-1']}
+    assert capabilities.voice_languages['Multilingual'] == {'es-US', 'fr-FR'}
+    capabilities.validate('en-US', 'English-US.Male-1')
+    capabilities.validate('en-US', 'English-US')
+    capabilities.validate('es-US', 'Multilingual.Female-1')
+    capabilities.validate('fr-FR', 'Multilingual')
+    with pytest.raises(ValueError):
+        capabilities.validate('de-DE')
+    with pytest.raises(ValueError):
+        capabilities.validate('en-US', 'English-US.Robot')
+
+
+def test_nmt_capabilities() -> None:
+    capabilities = NMTCapabilities(nmt_response())
+    assert capabilities.language_pairs == [('de', 'en'), ('en', 'en'), ('fr', 'en')]
+    assert capabilities.models('en', 'en') == ['any_en']
+    assert capabilities.models('de', 'en') == ['any_en']
+    with pytest.raises(ValueError):
+        capabilities.validate('en', 'de')
+
+
+def make_discovery(tmp_path, **kwargs) -> CapabilityDiscovery:
+    discovery = CapabilityDiscovery(Mock(uri='localhost:50051'), tmp_path, **kwargs)
+    fetch = Mock(return_value=asr_response().SerializeToString())
+    discovery.fetchers['asr'] = (fetch, discovery.fetchers['asr'][1])
+    return discovery
+
+
+def test_discovery_caches_in_memory_and_on_disk(tmp_path) -> None:
+    discovery = make_discovery(tmp_path)
+    assert discovery.asr().models('en-US', 'offline') == ['conformer-en-offline']
+    discovery.asr()
+    assert discovery.fetchers['asr'][0].call_count == 1
+    discovery.close()
+
+    other = make_discovery(tmp_path)
+    assert other.asr().languages == ['de-DE', 'en-US', 'es-US']
+    assert other.fetchers['asr'][0].call_count == 0
+    other.close()
+
+
+def test_discovery_refreshes_ahead_and_after_ttl(tmp_path) -> None:
+    discovery = make_discovery(tmp_path, ttl=0.2, refresh_ahead=0.5)
+    fetch = discovery.fetchers['asr'][0]
+    discovery.asr()
+    time.sleep(0.12)
+    discovery.asr()
+    deadline = time.time() + 1
+    while fetch.call_count < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    assert fetch.call_count == 2
+    time.sleep(0.25)
+    discovery.asr()
+    assert fetch.call_count == 3
+    discovery.close()
@@ -0,0 +1,36 @@
+# SPDX-FileCopyrightText: Copyright (c) 2022 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import riva.client.proto.riva_nmt_pb2 as riva_nmt
+from riva.client import DNTDictionary
+from riva.client.dnt import dnt_phrases_digest
+from riva.client.nmt import add_dnt_phrases_dict
+
+PHRASES = {'Riva': '', 'NVIDIA Riva': '', 'he': 'er', 'hers': '', 'GPU': 'Grafikkarte'}
+
+
+def test_match_finds_only_present_phrases() -> None:
+    dnt = DNTDictionary(PHRASES, whole_words=True)
+    assert dnt.match(['Deploy NVIDIA Riva on a gpu.']) == {'Riva': '', 'NVIDIA Riva': '', 'GPU': 'Grafikkarte'}
+    assert dnt.match(['ushers', 'the cat']) == {}
+    assert dnt.match(['ushers', 'He said']) == {'he': 'er'}
+    assert DNTDictionary(PHRASES).match(['ushers']) == {'he': 'er', 'hers': ''}
+    assert DNTDictionary(PHRASES).match(['Two GPUs']) == {'GPU': 'Grafikkarte'}
+
+
+def test_from_file(tmp_path) -> None:
+    path = tmp_path / 'dnt.txt'
+    path.write_text("Riva\n\n GPU ## Grafikkarte \n##ignored\n", encoding='utf-8')
+    dnt = DNTDictionary.from_file(path)
+    assert dnt.phrases == {'Riva': '', 'GPU': 'Grafikkarte'}
+    assert len(dnt) == 2
+    assert dnt_phrases_digest(dnt) == dnt_phrases_digest({'GPU': 'Grafikkarte', 'Riva': ''})
+
+
+def test_request_carries_only_matched_phrases() -> None:
+    req = riva_nmt.TranslateTextRequest(texts=['Riva runs on a GPU'])
+    add_dnt_phrases_dict(req, DNTDictionary(PHRASES))
+    assert list(req.dnt_phrases) == ['Riva##,GPU##Grafikkarte']
+    req = riva_nmt.TranslateTextRequest(texts=['a cat'])
+    add_dnt_phrases_dict(req, DNTDictionary(PHRASES))
+    assert list(req.dnt_phrases) == []
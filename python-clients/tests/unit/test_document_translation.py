@@ -0,0 +1,42 @@
+# SPDX-FileCopyrightText: Copyright (c) 2022 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+from unittest.mock import patch
+
+from riva.client import NeuralMachineTranslationClient, segment_document, translate_document, translate_documents
+
+from .helpers import ReverseOrderFutureMock, set_auth_mock
+from .test_nmt import riva_nmt_stub_init_patch, translate_response
+
+DOCUMENT = "<p>First sentence. Second one!</p>\n\n  <p>First sentence.   Third? <b>Bold</b> tail</p>\n"
+
+
+def test_segment_document_keeps_structure() -> None:
+    segments = segment_document(DOCUMENT)
+    assert ''.join(segments.pieces) == DOCUMENT
+    assert segments.segments == ['First sentence.', 'Second one!', 'First sentence.', 'Third?', '<b>Bold</b> tail']
+    assert segment_document('a <b>bold</b> word.<br/>Next').segments == ['a <b>bold</b> word.', 'Next']
+    plain = segment_document(DOCUMENT, markup=False)
+    assert ''.join(plain.pieces) == DOCUMENT
+    assert plain.segments[0] == '<p>First sentence.'
+    assert segment_document('').segments == []
+
+
+@patch("riva.client.proto.riva_nmt_pb2_grpc.RivaTranslationStub.__init__", riva_nmt_stub_init_patch)
+def test_translate_documents_deduplicates_and_reassembles() -> None:
+    auth, _ = set_auth_mock()
+    client = NeuralMachineTranslationClient(auth)
+    translate_mock = ReverseOrderFutureMock(translate_response, n_pending=2, n_requests=3)
+    client.stub.TranslateText.future = translate_mock
+    documents = [DOCUMENT, "Second one! New.\nLast line"]
+    result = translate_documents(client, documents, 'model', 'en', 'de', max_batch_size=2, max_in_flight=2)
+    assert result == [
+        "<p>de:First sentence. de:Second one!</p>\n\n  <p>de:First sentence.   de:Third? de:<b>Bold</b> tail</p>\n",
+        "de:Second one! de:New.\nde:Last line",
+    ]
+    sent = [text for request in translate_mock.requests for text in request.texts]
+    assert sorted(sent) == sorted(
+        ['First sentence.', 'Second one!', 'Third?', '<b>Bold</b> tail', 'New.', 'Last line']
+    )
+    assert translate_mock.max_pending == 2
+    assert translate_document(client, '', 'model', 'en', 'de') == ''
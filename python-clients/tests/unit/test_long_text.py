@@ -0,0 +1,83 @@
+# SPDX-FileCopyrightText: Copyright (c) 2022 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import re
+from concurrent.futures import Future
+from typing import List, Optional
+from unittest.mock import Mock
+
+import pytest
+
+import riva.client.proto.riva_nlp_pb2 as rnlp
+from riva.client.long_text import classify_tokens_long_texts, punctuate_long_texts, split_into_windows
+
+LONG_TEXT = ' '.join(f'w{i}' for i in range(23))
+
+
+def respond(response, future: bool):
+    if not future:
+        return response
+    result = Future()
+    result.set_result(response)
+    return result
+
+
+def punctuate_text(
+    input_strings: List[str], model_name: Optional[str] = None, language_code: str = 'en-US', future: bool = False
+):
+    # Like a real model, capitalizes a beginning and adds a period to an end of every text it sees.
+    texts = [s[0].upper() + s[1:] + '.' for s in input_strings]
+    return respond(rnlp.TextTransformResponse(text=texts), future)
+
+
+def classify_tokens(
+    input_strings: List[str], model_name: str, language_code: str = 'en-US', future: bool = False
+):
+    response = rnlp.TokenClassResponse()
+    for s in input_strings:
+        sequence = response.results.add()
+        for m in re.finditer(r'\S+', s):
+            value = sequence.results.add()
+            value.token = m.group()
+            value.label.add(class_name='EDGE' if m.start() == 0 or m.end() == len(s) else 'O', score=0.5)
+            value.span.add(start=m.start(), end=m.end())
+    return respond(response, future)
+
+
+def test_split_into_windows() -> None:
+    windows = split_into_windows(LONG_TEXT, window_tokens=10, overlap_tokens=4)
+    assert [(LONG_TEXT[w.start : w.end].split()[0], w.n_tokens) for w in windows] == [
+        ('w0', 10), ('w6', 10), ('w12', 10), ('w18', 5)
+    ]
+    owned = [LONG_TEXT[w.start : w.end].split()[w.own_token_start : w.own_token_end] for w in windows]
+    assert sum(owned, []) == LONG_TEXT.split()
+    assert ''.join(LONG_TEXT[w.own_start : w.own_end] for w in windows) == LONG_TEXT
+    assert len(split_into_windows('a b c', window_tokens=10, overlap_tokens=2)) == 1
+    assert split_into_windows('  ') == []
+    with pytest.raises(ValueError):
+        split_into_windows(LONG_TEXT, window_tokens=4, overlap_tokens=4)
+
+
+def test_punctuate_long_texts_discards_window_border_artifacts() -> None:
+    nlp_service = Mock()
+    nlp_service.punctuate_text = Mock(side_effect=punctuate_text)
+    texts = [LONG_TEXT, 'short text', '']
+    result = punctuate_long_texts(
+        nlp_service, texts, window_tokens=10, overlap_tokens=4, batch_size=2, max_async_requests_to_queue=2
+    )
+    assert result == ['W0 ' + LONG_TEXT[3:] + '.', 'Short text.', '']
+    assert nlp_service.punctuate_text.call_count == 3
+    assert all(call.kwargs['future'] for call in nlp_service.punctuate_text.call_args_list)
+
+
+def test_classify_tokens_long_texts_rebases_offsets() -> None:
+    nlp_service = Mock()
+    nlp_service.classify_tokens = Mock(side_effect=classify_tokens)
+    tokens, labels, scores, starts, ends = classify_tokens_long_texts(
+        nlp_service, [LONG_TEXT, 'x y'], 'model', window_tokens=10, overlap_tokens=4, batch_size=3
+    )
+    assert tokens[0] == LONG_TEXT.split()
+    assert [LONG_TEXT[s:e] for s, e in zip(starts[0], ends[0])] == tokens[0]
+    assert labels[0].count('EDGE') == 2
+    assert labels[0][0] == labels[0][-1] == 'EDGE'
+    assert tokens[1] == ['x', 'y'] and starts[1] == [0, 2]
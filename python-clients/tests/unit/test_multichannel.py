@@ -0,0 +1,90 @@
+# SPDX-FileCopyrightText: Copyright (c) 2022 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import sys
+import threading
+from typing import Dict, List
+from unittest.mock import patch
+
+import pytest
+
+import riva.client.proto.riva_asr_pb2 as rasr
+from riva.client import AudioBuffer, MultiChannelRecognizer, RecognitionConfig, StreamingRecognitionConfig
+
+
+def interleave(*channels: List[int]) -> bytes:
+    return b''.join(sample.to_bytes(2, 'little', signed=True) for frame in zip(*channels) for sample in frame)
+
+
+def mono(samples: List[int]) -> bytes:
+    return b''.join(sample.to_bytes(2, 'little', signed=True) for sample in samples)
+
+
+class FakeASR:
+    """Returns a final result for every chunk. A transcript is the first sample of the chunk and words span the chunk
+    assuming 1000 frames per second."""
+    def __init__(self) -> None:
+        self.chunks: Dict[int, List[bytes]] = {}
+        self.configs: List[rasr.StreamingRecognitionConfig] = []
+        self.lock = threading.Lock()
+
+    def streaming_response_generator(self, audio_chunks, streaming_config):
+        processed = 0
+        chunks = []
+        with self.lock:
+            self.configs.append(streaming_config)
+        for chunk in audio_chunks:
+            chunk = bytes(chunk)
+            chunks.append(chunk)
+            first = int.from_bytes(chunk[:2], 'little', signed=True)
+            start, processed = processed, processed + len(chunk) // 2
+            words = [rasr.WordInfo(word=str(first), start_time=start, end_time=processed)]
+            alternative = rasr.SpeechRecognitionAlternative(transcript=str(first), words=words)
+            yield rasr.StreamingRecognizeResponse(
+                results=[rasr.StreamingRecognitionResult(is_final=True, alternatives=[alternative])]
+            )
+        with self.lock:
+            self.chunks[first // 1000] = chunks
+
+
+def make_recognizer(asr: FakeASR, nchannels: int = 2) -> MultiChannelRecognizer:
+    config = StreamingRecognitionConfig(config=RecognitionConfig(audio_channel_count=nchannels))
+    return MultiChannelRecognizer(asr, config, nchannels, max_buffered_chunks=1)
+
+
+@pytest.mark.parametrize('without_numpy', [False, True])
+def test_split_channels(without_numpy: bool) -> None:
+    audio = AudioBuffer(interleave([1, 2, 3], [-1, -2, -3], [7, 8, 9]), 16000, nchannels=3)
+    with patch.dict(sys.modules, {'numpy': None} if without_numpy else {}):
+        channels = audio.split_channels()
+    assert [channel.tobytes() for channel in channels] == [mono([1, 2, 3]), mono([-1, -2, -3]), mono([7, 8, 9])]
+    assert all(channel.nchannels == 1 and channel.sample_rate_hz == 16000 for channel in channels)
+
+
+def test_channels_are_recognized_separately_on_one_timeline() -> None:
+    asr = FakeASR()
+    recognizer = make_recognizer(asr)
+    left = list(range(0, 6))
+    right = list(range(1000, 1006))
+    audio = AudioBuffer(interleave(left, right), 1000, nchannels=2)
+    segments = recognizer.transcribe(audio, chunk_n_frames=3)
+    assert [(s.channel, s.transcript, s.start_time, s.end_time) for s in segments] == [
+        (0, '0', 0.0, 0.003),
+        (1, '1000', 0.0, 0.003),
+        (0, '3', 0.003, 0.006),
+        (1, '1003', 0.003, 0.006),
+    ]
+    assert asr.chunks[0] == [mono(left[:3]), mono(left[3:])]
+    assert asr.chunks[1] == [mono(right[:3]), mono(right[3:])]
+    assert all(config.config.audio_channel_count == 1 for config in asr.configs)
+
+
+def test_chunk_iterables_are_deinterleaved_while_read() -> None:
+    asr = FakeASR()
+    recognizer = make_recognizer(asr)
+    chunks = [interleave([0, 1], [1000, 1001]), interleave([2], [1002])]
+    results = sorted((channel, r.results[0].alternatives[0].transcript) for channel, r in recognizer.generate(chunks))
+    assert results == [(0, '0'), (0, '2'), (1, '1000'), (1, '1002')]
+    assert asr.chunks[1] == [mono([1000, 1001]), mono([1002])]
+    with pytest.raises(ValueError):
+        list(recognizer.generate(AudioBuffer(mono([1, 2]), 1000)))
@@ -1,11 +1,23 @@
 # SPDX-FileCopyrightText: Copyright (c) 2022 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
 # SPDX-License-Identifier: MIT
 
-from typing import List, Union
+from concurrent.futures import Future
+from typing import Any, Generator, List, Union
 from unittest.mock import patch, Mock
 
+import pytest
+
 import riva.client.proto.riva_nlp_pb2 as rnlp
-from riva.client import NLPService
+from riva.client import CachingNLPService, NLPService, TokenClassificationResults
+from riva.client.batching import plan_length_bucketed_batches
+from riva.client.nlp import (
+    analyze_intent_batch,
+    classify_tokens_batch,
+    extract_most_probable_token_classification_predictions,
+    iter_classify_text_batch,
+    iter_classify_tokens_batch,
+    punctuate_text_batch,
+)
 
 from .helpers import set_auth_mock
 
@@ -216,3 +228,233 @@ class TestSpeechSynthesisService:
         resp = service.natural_query(INPUT_STRINGS[0], INPUT_STRINGS[1], TOP_N, future=True)
         assert isinstance(resp, rnlp.NaturalQueryResponse)
         NATURAL_QUERY_MOCK.future.assert_called_with(NATURAL_QUERY_REQUEST, metadata=return_value_of_get_auth_metadata)
+
+
+def completed_future(result: Any) -> Future:
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+def punctuate_text_response(request: rnlp.TextTransformRequest, **kwargs) -> rnlp.TextTransformResponse:
+    return rnlp.TextTransformResponse(text=[text.capitalize() + '.' for text in request.text])
+
+
+def riva_nlp_batch_stub_init_patch(self, channel):
+    self.PunctuateText = Mock(side_effect=punctuate_text_response)
+    self.PunctuateText.future = Mock(
+        side_effect=lambda *args, **kwargs: completed_future(punctuate_text_response(*args, **kwargs))
+    )
+    self.AnalyzeIntent = Mock(side_effect=lambda request, **kwargs: rnlp.AnalyzeIntentResponse(domain_str=request.query))
+    self.AnalyzeIntent.future = Mock(
+        side_effect=lambda request, **kwargs: completed_future(rnlp.AnalyzeIntentResponse(domain_str=request.query))
+    )
+    self.ClassifyTokens = Mock(side_effect=lambda request, **kwargs: token_class_response(request.text))
+
+
+BATCH_INPUT_STRINGS = ['first text', 'second text', 'third text', 'fourth text', 'fifth text']
+
+
+@patch("riva.client.proto.riva_nlp_pb2_grpc.RivaLanguageUnderstandingStub.__init__", riva_nlp_batch_stub_init_patch)
+class TestBatchProcessing:
+    @pytest.mark.parametrize("max_async_requests_to_queue", [0, 1, 2, 10])
+    def test_punctuate_text_batch(self, max_async_requests_to_queue: int) -> None:
+        auth, _ = set_auth_mock()
+        service = NLPService(auth)
+        texts = punctuate_text_batch(
+            service, BATCH_INPUT_STRINGS, batch_size=2, max_async_requests_to_queue=max_async_requests_to_queue
+        )
+        assert texts == [text.capitalize() + '.' for text in BATCH_INPUT_STRINGS]
+        if max_async_requests_to_queue == 0:
+            assert service.stub.PunctuateText.call_count == 3
+        else:
+            assert service.stub.PunctuateText.future.call_count == 3
+
+    @pytest.mark.parametrize("max_async_requests_to_queue", [0, 2])
+    def test_punctuate_text_batch_with_batch_plan(self, max_async_requests_to_queue: int) -> None:
+        auth, _ = set_auth_mock()
+        service = NLPService(auth)
+        input_strings = ['a b c d e f', 'a', 'a b c d e', 'a b', 'a b c']
+        plan = plan_length_bucketed_batches(input_strings, max_batch_size=2)
+        texts = punctuate_text_batch(
+            service,
+            input_strings,
+            batch_size=2,
+            max_async_requests_to_queue=max_async_requests_to_queue,
+            batch_plan=plan,
+        )
+        assert texts == [text.capitalize() + '.' for text in input_strings]
+
+    @pytest.mark.parametrize("columnar", [False, True])
+    def test_classify_tokens_batch(self, columnar: bool) -> None:
+        auth, _ = set_auth_mock()
+        service = NLPService(auth)
+        input_strings = ['GPU and CPU', 'hello', 'Meet NVIDIA in SF']
+        plan = plan_length_bucketed_batches(input_strings, max_batch_size=2)
+        results = classify_tokens_batch(
+            service, input_strings, MODEL_NAME, batch_size=2, batch_plan=plan, columnar=columnar
+        )
+        if columnar:
+            results = results.to_tuples()
+        assert results[0] == [text.split() for text in input_strings]
+        assert results[1][0] == ['UPPER', 'O', 'UPPER']
+
+    @pytest.mark.parametrize("max_async_requests_to_queue", [0, 3])
+    def test_analyze_intent_batch(self, max_async_requests_to_queue: int) -> None:
+        auth, _ = set_auth_mock()
+        service = NLPService(auth)
+        responses = analyze_intent_batch(
+            service, BATCH_INPUT_STRINGS, max_async_requests_to_queue=max_async_requests_to_queue
+        )
+        assert [r.domain_str for r in responses] == BATCH_INPUT_STRINGS
+
+    def test_negative_max_async_requests_to_queue(self) -> None:
+        auth, _ = set_auth_mock()
+        service = NLPService(auth)
+        with pytest.raises(ValueError):
+            punctuate_text_batch(service, BATCH_INPUT_STRINGS, batch_size=2, max_async_requests_to_queue=-1)
+
+
+def riva_nlp_cache_stub_init_patch(self, channel):
+    riva_nlp_batch_stub_init_patch(self, channel)
+    self.ClassifyText = Mock(
+        side_effect=lambda request, **kwargs: rnlp.TextClassResponse(
+            results=[
+                rnlp.ClassificationResult(labels=[rnlp.Classification(class_name=text, score=1.0)])
+                for text in request.text
+            ]
+        )
+    )
+
+
+@patch("riva.client.proto.riva_nlp_pb2_grpc.RivaLanguageUnderstandingStub.__init__", riva_nlp_cache_stub_init_patch)
+class TestCachingNLPService:
+    def test_punctuate_text(self) -> None:
+        auth, _ = set_auth_mock()
+        service = CachingNLPService(auth)
+        resp = service.punctuate_text(['first  text', 'second text', 'first text'], language_code=LANGUAGE_CODE)
+        assert list(resp.text) == ['First  text.', 'Second text.', 'First  text.']
+        assert list(service.stub.PunctuateText.call_args.args[0].text) == ['first  text', 'second text']
+        resp = service.punctuate_text(['second text', 'third text'], language_code=LANGUAGE_CODE)
+        assert list(resp.text) == ['Second text.', 'Third text.']
+        assert list(service.stub.PunctuateText.call_args.args[0].text) == ['third text']
+        assert service.stats.hits == 1
+        assert service.stats.deduplicated == 1
+        service.punctuate_text('third text', language_code='en-US')
+        assert service.stub.PunctuateText.call_count == 3
+
+    def test_punctuate_text_future(self) -> None:
+        auth, _ = set_auth_mock()
+        service = CachingNLPService(auth)
+        assert list(service.punctuate_text(['a b'], future=True).result().text) == ['A b.']
+        assert list(service.punctuate_text(['a b'], future=True).result().text) == ['A b.']
+        assert service.stub.PunctuateText.future.call_count == 1
+
+    def test_classify_text(self) -> None:
+        auth, _ = set_auth_mock()
+        service = CachingNLPService(auth)
+        service.classify_text(INPUT_STRINGS, MODEL_NAME, LANGUAGE_CODE)
+        resp = service.classify_text(INPUT_STRINGS[::-1], MODEL_NAME, LANGUAGE_CODE)
+        assert [r.labels[0].class_name for r in resp.results] == INPUT_STRINGS[::-1]
+        assert service.stub.ClassifyText.call_count == 1
+
+    def test_analyze_intent(self) -> None:
+        auth, _ = set_auth_mock()
+        service = CachingNLPService(auth)
+        options = rnlp.AnalyzeIntentOptions(domain='weather')
+        assert service.analyze_intent(INPUT_STRINGS[0], options).domain_str == INPUT_STRINGS[0]
+        assert service.analyze_intent(INPUT_STRINGS[0], options).domain_str == INPUT_STRINGS[0]
+        service.analyze_intent(INPUT_STRINGS[0], rnlp.AnalyzeIntentOptions(domain='misc'))
+        assert service.stub.AnalyzeIntent.call_count == 2
+
+    def test_disk_cache(self, tmp_path) -> None:
+        auth, _ = set_auth_mock()
+        service = CachingNLPService(auth, disk_cache_path=tmp_path / 'nlp.sqlite')
+        service.punctuate_text(['a b'])
+        service.cache.close()
+        service = CachingNLPService(auth, disk_cache_path=tmp_path / 'nlp.sqlite')
+        assert list(service.punctuate_text(['a b']).text) == ['A b.']
+        assert service.stats.disk_hits == 1
+        service.stub.PunctuateText.assert_not_called()
+
+
+def token_class_response(texts: List[str]) -> rnlp.TokenClassResponse:
+    response = rnlp.TokenClassResponse()
+    for text in texts:
+        sequence = response.results.add()
+        start = 0
+        for token in text.split():
+            value = sequence.results.add(token=token)
+            value.label.add(class_name='UPPER' if token.isupper() else 'O', score=0.5)
+            value.label.add(class_name='OTHER', score=0.1)
+            value.span.add(start=start, end=start + len(token))
+            start += len(token) + 1
+    return response
+
+
+TOKEN_CLASS_TEXTS = ['Meet NVIDIA in SF', 'hello', 'GPU and CPU']
+
+
+class TestTokenClassificationResults:
+    def test_to_tuples(self) -> None:
+        responses = [token_class_response(TOKEN_CLASS_TEXTS[:2]), token_class_response(TOKEN_CLASS_TEXTS[2:])]
+        results = TokenClassificationResults.from_responses(responses)
+        expected = [[], [], [], [], []]
+        for response in responses:
+            for field, values in zip(expected, extract_most_probable_token_classification_predictions(response)):
+                field += values
+        assert results.to_tuples() == tuple(expected)
+        assert sorted(results.label_vocabulary) == ['O', 'UPPER']
+
+    def test_sentence_view(self) -> None:
+        results = TokenClassificationResults.from_responses([token_class_response(TOKEN_CLASS_TEXTS)])
+        assert len(results) == 3
+        sentence = results[-1]
+        assert sentence.tokens == ['GPU', 'and', 'CPU']
+        assert sentence.labels == ['UPPER', 'O', 'UPPER']
+        assert list(sentence.starts) == [0, 4, 8]
+        assert list(sentence.ends) == [3, 7, 11]
+        with pytest.raises(IndexError):
+            results[3]
+
+    def test_take(self) -> None:
+        results = TokenClassificationResults.from_responses([token_class_response(TOKEN_CLASS_TEXTS)])
+        taken = results.take([2, 0])
+        assert [s.tokens for s in taken] == [TOKEN_CLASS_TEXTS[2].split(), TOKEN_CLASS_TEXTS[0].split()]
+
+
+def riva_nlp_iter_stub_init_patch(self, channel):
+    riva_nlp_cache_stub_init_patch(self, channel)
+    self.ClassifyText.future = Mock(
+        side_effect=lambda *args, **kwargs: completed_future(self.ClassifyText(*args, **kwargs))
+    )
+    self.ClassifyTokens = Mock(side_effect=lambda request, **kwargs: token_class_response(request.text))
+
+
+@patch("riva.client.proto.riva_nlp_pb2_grpc.RivaLanguageUnderstandingStub.__init__", riva_nlp_iter_stub_init_patch)
+class TestIterBatchProcessing:
+    @pytest.mark.parametrize("max_async_requests_to_queue", [0, 2])
+    def test_iter_classify_text_batch_is_lazy(self, max_async_requests_to_queue: int) -> None:
+        auth, _ = set_auth_mock()
+        service = NLPService(auth)
+        n_read = 0
+
+        def read_lines() -> Generator[str, None, None]:
+            nonlocal n_read
+            for i in range(1000):
+                n_read += 1
+                yield f'text {i}'
+
+        results = iter_classify_text_batch(
+            service, read_lines(), MODEL_NAME, batch_size=4, max_async_requests_to_queue=max_async_requests_to_queue
+        )
+        assert next(results) == ('text 0', 1.0)
+        assert n_read <= 4 * (2 * max_async_requests_to_queue + 1)
+        assert [r[0] for r in results] == [f'text {i}' for i in range(1, 1000)]
+
+    def test_iter_classify_tokens_batch(self) -> None:
+        auth, _ = set_auth_mock()
+        service = NLPService(auth)
+        results = list(iter_classify_tokens_batch(service, iter(TOKEN_CLASS_TEXTS), MODEL_NAME, batch_size=2))
+        assert [r[0] for r in results] == [text.split() for text in TOKEN_CLASS_TEXTS]
+        assert results[2][1] == ['UPPER', 'O', 'UPPER']
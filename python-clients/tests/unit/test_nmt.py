@@ -0,0 +1,253 @@
+# SPDX-FileCopyrightText: Copyright (c) 2022 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, List
+from unittest.mock import Mock, patch
+
+import pytest
+
+import riva.client.proto.riva_nmt_pb2 as riva_nmt
+from riva.client import (
+    CachingNeuralMachineTranslationClient,
+    IncrementalTranslationSession,
+    NeuralMachineTranslationClient,
+)
+from riva.client.nmt import dnt_phrases_digest
+
+from .helpers import ReverseOrderFutureMock, set_auth_mock
+
+
+def riva_nmt_stub_init_patch(self, channel):
+    self.TranslateText = Mock()
+
+
+def translate_response(request: riva_nmt.TranslateTextRequest, metadata: Any = None) -> riva_nmt.TranslateTextResponse:
+    return riva_nmt.TranslateTextResponse(
+        translations=[riva_nmt.Translation(text=f"{request.target_language}:{text}") for text in request.texts]
+    )
+
+
+@patch("riva.client.proto.riva_nmt_pb2_grpc.RivaTranslationStub.__init__", riva_nmt_stub_init_patch)
+def test_translate_batch_fans_out_to_targets_in_order() -> None:
+    auth, _ = set_auth_mock()
+    client = NeuralMachineTranslationClient(auth)
+    texts = [f"line {i}" for i in range(7)]
+    targets = ['de', 'fr', 'es']
+    translate_mock = ReverseOrderFutureMock(translate_response, n_pending=3, n_requests=9)
+    client.stub.TranslateText.future = translate_mock
+    results = list(client.translate_batch(iter(texts), 'model', 'en', targets, batch_size=3, max_in_flight=3))
+    assert [text for text, _ in results] == texts
+    assert all(translations == {t: f"{t}:{text}" for t in targets} for text, translations in results)
+    assert [(list(r.texts), r.target_language) for r in translate_mock.requests[:3]] == [
+        (texts[:3], target) for target in targets
+    ]
+    assert translate_mock.max_pending == 3
+
+
+@patch("riva.client.proto.riva_nmt_pb2_grpc.RivaTranslationStub.__init__", riva_nmt_stub_init_patch)
+def test_translate_batch_repeated_target_languages() -> None:
+    auth, _ = set_auth_mock()
+    client = NeuralMachineTranslationClient(auth)
+    texts = ['a', 'b', 'c']
+    translate_mock = ReverseOrderFutureMock(translate_response, n_pending=1, n_requests=4)
+    client.stub.TranslateText.future = translate_mock
+    results = list(client.translate_batch(texts, 'model', 'en', ['de', 'fr', 'de'], batch_size=2))
+    assert results == [(text, {'de': f"de:{text}", 'fr': f"fr:{text}"}) for text in texts]
+    assert len(translate_mock.requests) == 4
+
+
+@patch("riva.client.proto.riva_nmt_pb2_grpc.RivaTranslationStub.__init__", riva_nmt_stub_init_patch)
+def test_translate_batch_on_error_continues() -> None:
+    auth, _ = set_auth_mock()
+    client = NeuralMachineTranslationClient(auth)
+    translate_mock = ReverseOrderFutureMock(translate_response, n_pending=1, n_requests=6)
+
+    def translate(request: riva_nmt.TranslateTextRequest, metadata: Any = None) -> Future:
+        if list(request.texts) == ['c', 'd'] and request.target_language == 'fr':
+            future = Future()
+            future.set_exception(RuntimeError('failed'))
+            return future
+        return translate_mock(request, metadata)
+
+    client.stub.TranslateText.future = translate
+    errors = []
+    results = list(
+        client.translate_batch(
+            ['a', 'b', 'c', 'd', 'e'],
+            'model',
+            'en',
+            ['de', 'fr'],
+            batch_size=2,
+            on_error=lambda error, batch, language: errors.append((str(error), batch, language)),
+        )
+    )
+    assert errors == [('failed', ['c', 'd'], 'fr')]
+    assert [text for text, _ in results] == ['a', 'b', 'c', 'd', 'e']
+    assert results[2] == ('c', {'de': 'de:c'})
+    assert results[4] == ('e', {'de': 'de:e', 'fr': 'fr:e'})
+    with pytest.raises(RuntimeError):
+        list(client.translate_batch(['a', 'b', 'c', 'd'], 'model', 'en', ['de', 'fr'], batch_size=2))
+
+
+@patch("riva.client.proto.riva_nmt_pb2_grpc.RivaTranslationStub.__init__", riva_nmt_stub_init_patch)
+def test_translate_batch_validation() -> None:
+    auth, _ = set_auth_mock()
+    client = NeuralMachineTranslationClient(auth)
+    with pytest.raises(ValueError):
+        list(client.translate_batch(['a'], 'model', 'en', []))
+    with pytest.raises(ValueError):
+        list(client.translate_batch(['a'], 'model', 'en', 'de', max_in_flight=0))
+
+
+def completed(response: Any) -> Future:
+    future = Future()
+    future.set_result(response)
+    return future
+
+
+@patch("riva.client.proto.riva_nmt_pb2_grpc.RivaTranslationStub.__init__", riva_nmt_stub_init_patch)
+class TestCachingNeuralMachineTranslationClient:
+    def test_only_misses_are_sent(self) -> None:
+        auth, _ = set_auth_mock()
+        client = CachingNeuralMachineTranslationClient(auth)
+        client.stub.TranslateText.side_effect = translate_response
+        response = client.translate(['a', 'b', 'a'], 'model', 'en', 'de')
+        assert [t.text for t in response.translations] == ['de:a', 'de:b', 'de:a']
+        assert list(client.stub.TranslateText.call_args[0][0].texts) == ['a', 'b']
+        response = client.translate(['b', 'c'], 'model', 'en', 'de')
+        assert [t.text for t in response.translations] == ['de:b', 'de:c']
+        assert list(client.stub.TranslateText.call_args[0][0].texts) == ['c']
+        client.translate(['b'], 'model', 'en', 'fr')
+        client.translate(['b'], 'model', 'en', 'de', dnt_phrases_dict={'Riva': 'Riva'})
+        assert client.stub.TranslateText.call_count == 4
+        assert client.stats.hits == 1 and client.stats.deduplicated == 1
+
+    def test_future_and_disk_tier(self, tmp_path) -> None:
+        auth, _ = set_auth_mock()
+        client = CachingNeuralMachineTranslationClient(auth, disk_cache_path=tmp_path / 'tm.sqlite')
+        client.stub.TranslateText.future = Mock(
+            side_effect=lambda request, metadata: completed(translate_response(request))
+        )
+        assert [t.text for t in client.translate(['a'], 'model', 'en', 'de', future=True).result().translations] == [
+            'de:a'
+        ]
+        other = CachingNeuralMachineTranslationClient(auth, disk_cache_path=tmp_path / 'tm.sqlite')
+        assert [t.text for t in other.translate(['a'], 'model', 'en', 'de', future=True).result().translations] == [
+            'de:a'
+        ]
+        assert other.stats.disk_hits == 1
+        other.stub.TranslateText.future.assert_not_called()
+
+
+def test_dnt_phrases_digest_does_not_depend_on_order() -> None:
+    assert dnt_phrases_digest({'a': '1', 'b': '2'}) == dnt_phrases_digest({'b': '2', 'a': '1'})
+    assert dnt_phrases_digest({'a': '1'}) != dnt_phrases_digest({'a': '2'})
+    assert dnt_phrases_digest(None) == dnt_phrases_digest({}) == ''
+
+
+class ManualTranslateClient:
+    """Records requests of `translate` and returns futures which are completed by `complete`."""
+    def __init__(self, auto_complete: bool = True) -> None:
+        self.auto_complete = auto_complete
+        self.requests: List[List[str]] = []
+        self.futures: List[Future] = []
+        self.lock = threading.Lock()
+
+    def translate(self, texts, model, source_language, target_language, future=False, **kwargs) -> Future:
+        result = Future()
+        with self.lock:
+            self.requests.append(list(texts))
+            self.futures.append(result)
+        if self.auto_complete:
+            self.complete(len(self.futures) - 1)
+        return result
+
+    def complete(self, index: int) -> None:
+        texts = self.requests[index]
+        self.futures[index].set_result(
+            riva_nmt.TranslateTextResponse(translations=[riva_nmt.Translation(text=f"de:{text}") for text in texts])
+        )
+
+
+def wait_for_requests(client: ManualTranslateClient, n_requests: int) -> None:
+    deadline = time.monotonic() + 5
+    while len(client.requests) < n_requests and time.monotonic() < deadline:
+        time.sleep(0.001)
+    assert len(client.requests) == n_requests
+
+
+class TestIncrementalTranslationSession:
+    def test_only_new_sentences_are_sent(self) -> None:
+        client = ManualTranslateClient()
+        results = []
+        session = IncrementalTranslationSession(client, 'model', 'en', 'de', lambda *r: results.append(r))
+        session.update("Hello world. How")
+        session.flush()
+        session.update("Hello world. How are you")
+        session.flush()
+        session.update("Hello world.  How are you? Fine", is_final=True)
+        session.close()
+        assert client.requests == [['Hello world.'], ['How'], ['How are you'], ['How are you?', 'Fine']]
+        assert results == [
+            ("de:Hello world. de:How", False),
+            ("de:Hello world. de:How are you", False),
+            ("de:Hello world.  de:How are you? de:Fine", True),
+        ]
+
+    def test_superseded_requests_are_cancelled_and_complete_tail_is_reused(self) -> None:
+        client = ManualTranslateClient(auto_complete=False)
+        results = []
+        session = IncrementalTranslationSession(client, 'model', 'en', 'de', lambda *r: results.append(r), debounce=0)
+        session.update("One")
+        wait_for_requests(client, 1)
+        session.update("One two.")
+        wait_for_requests(client, 2)
+        assert client.futures[0].cancelled() and session.n_cancelled == 1
+        session.update("One two. Three")
+        wait_for_requests(client, 3)
+        assert client.requests == [['One'], ['One two.'], ['Three']]
+        client.complete(2)
+        client.complete(1)
+        session.close()
+        assert results == [("de:One two. de:Three", False)]
+
+    def test_interim_updates_are_debounced(self) -> None:
+        client = ManualTranslateClient()
+        results = []
+        with IncrementalTranslationSession(
+            client, 'model', 'en', 'de', lambda *r: results.append(r), debounce=10, max_delay=10
+        ) as session:
+            for text in ["a", "a b", "a b c"]:
+                session.update(text)
+        assert client.requests == [['a b c']]
+        assert results == [("de:a b c", False)]
+        with pytest.raises(ValueError):
+            IncrementalTranslationSession(client, 'model', 'en', 'de', print, debounce=1, max_delay=0.5)
+
+    def test_errors_are_raised(self) -> None:
+        client = ManualTranslateClient(auto_complete=False)
+        session = IncrementalTranslationSession(client, 'model', 'en', 'de', print, debounce=0)
+        session.update("Text")
+        wait_for_requests(client, 1)
+        client.futures[0].set_exception(RuntimeError("server error"))
+        with pytest.raises(RuntimeError, match="server error"):
+            session.close()
+
+    def test_failed_tail_is_sent_again(self) -> None:
+        client = ManualTranslateClient(auto_complete=False)
+        results = []
+        session = IncrementalTranslationSession(client, 'model', 'en', 'de', lambda *r: results.append(r), debounce=0)
+        session.update("Hello wor")
+        wait_for_requests(client, 1)
+        client.futures[0].set_exception(RuntimeError("server error"))
+        with pytest.raises(RuntimeError, match="server error"):
+            session.flush(timeout=2)
+        client.auto_complete = True
+        session.update("Hello wor")
+        session.flush(timeout=2)
+        assert client.requests == [["Hello wor"], ["Hello wor"]]
+        assert results == [("de:Hello wor", False)]
+        session.close()
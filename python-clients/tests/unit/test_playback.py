@@ -0,0 +1,116 @@
+# SPDX-FileCopyrightText: Copyright (c) 2022 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import threading
+import time
+import wave
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from riva.client.playback import PlaybackEngine, RingBuffer, WaveFileSink
+
+
+class ListSink:
+    def __init__(self, block: threading.Event = None) -> None:
+        self.chunks: List[bytes] = []
+        self.block = block
+        self.closed = False
+
+    def write(self, data: bytes) -> None:
+        if self.block is not None:
+            self.block.wait()
+        self.chunks.append(data)
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def test_ring_buffer_wraps_around() -> None:
+    buffer = RingBuffer(5)
+    out = memoryview(bytearray(5))
+    with buffer.lock:
+        assert buffer.write(b'abc') == 3
+        assert buffer.read_into(out[:2]) == 2 and bytes(out[:2]) == b'ab'
+        assert buffer.write(b'defgh') == 4
+        assert buffer.free == 0
+        assert buffer.read_into(out) == 5 and bytes(out) == b'cdefg'
+        assert len(buffer) == 0
+
+
+def test_playback_plays_everything_in_order() -> None:
+    sink = ListSink()
+    engine = PlaybackEngine(sink, sampwidth=2, nchannels=1, framerate=100, prebuffer_seconds=0.05, period_frames=4)
+    data = bytes(range(200))
+    for i in range(0, len(data), 30):
+        engine(data[i : i + 30])
+    engine.close()
+    assert b''.join(sink.chunks) == data
+    assert all(len(chunk) % 2 == 0 for chunk in sink.chunks)
+    assert sink.closed and engine.overruns == 0
+
+
+def test_playback_writes_do_not_wait_for_device() -> None:
+    release = threading.Event()
+    sink = ListSink(block=release)
+    engine = PlaybackEngine(
+        sink, sampwidth=2, nchannels=1, framerate=100, buffer_seconds=0.5, prebuffer_seconds=1, period_frames=10,
+        overflow='drop',
+    )
+    start = time.monotonic()
+    engine.write(b'\x00' * 60)
+    engine.write(b'\x00' * 60)
+    assert time.monotonic() - start < 0.5
+    assert engine.overruns == 1 and engine.dropped_bytes == 20
+    release.set()
+    engine.close()
+    assert sum(len(c) for c in sink.chunks) == 100
+
+
+def wait_until_played(engine: PlaybackEngine, n_bytes: int) -> None:
+    deadline = time.monotonic() + 2
+    while engine.played_bytes < n_bytes and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert engine.played_bytes == n_bytes
+
+
+def test_playback_counts_underruns() -> None:
+    sink = ListSink()
+    engine = PlaybackEngine(sink, sampwidth=2, nchannels=1, framerate=100, prebuffer_seconds=0.02, period_frames=2)
+    engine.write(b'\x00' * 8)
+    wait_until_played(engine, 8)
+    assert engine.underruns == 0
+    engine.write(b'\x00' * 8)
+    wait_until_played(engine, 16)
+    engine.close()
+    assert engine.underruns == 1
+    assert engine.stats['played_seconds'] == pytest.approx(0.08)
+
+
+class FailingSink(ListSink):
+    def write(self, data: bytes) -> None:
+        raise OSError("device lost")
+
+
+def test_playback_raises_sink_errors() -> None:
+    engine = PlaybackEngine(
+        FailingSink(), sampwidth=2, nchannels=1, framerate=100, buffer_seconds=0.1, prebuffer_seconds=0.02,
+        period_frames=2,
+    )
+    with pytest.raises(OSError, match="device lost"):
+        for _ in range(100):
+            engine.write(b'\x00' * 20)
+    with pytest.raises(OSError, match="device lost"):
+        engine.close()
+
+
+def test_wave_file_sink(tmp_path: Path) -> None:
+    path = tmp_path / 'out.wav'
+    engine = PlaybackEngine(WaveFileSink(path, 2, 1, 8000), sampwidth=2, nchannels=1, framerate=8000)
+    engine.write(b'\x01\x00' * 8000)
+    engine.close()
+    with wave.open(str(path)) as f:
+        assert f.getnframes() == 8000 and f.getframerate() == 8000
+    with pytest.raises(RuntimeError):
+        engine.write(b'\x00\x00')
@@ -0,0 +1,104 @@
+# SPDX-FileCopyrightText: Copyright (c) 2022 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+from concurrent.futures import Future
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+import riva.client.proto.riva_nlp_pb2 as rnlp
+from riva.client.retrieval import BM25Index, chunk_text, document_id, natural_query_with_index
+
+DOCUMENTS = [
+    "The Soyuz capsule landed in the steppes of Kazakhstan after a three hour descent from the space station.",
+    "Jensen Huang founded NVIDIA together with Chris Malachowsky and Curtis Priem who previously worked at Sun.",
+    "Graphics processing units accelerate deep learning workloads in data centers.",
+]
+
+
+def test_chunk_text_overlap() -> None:
+    words = [str(i) for i in range(10)]
+    chunks = chunk_text(' '.join(words), chunk_words=4, chunk_overlap=1)
+    assert chunks == ['0 1 2 3', '3 4 5 6', '6 7 8 9']
+    assert chunk_text('a b', chunk_words=4, chunk_overlap=1) == ['a b']
+    with pytest.raises(ValueError):
+        chunk_text('a b', chunk_words=4, chunk_overlap=4)
+
+
+def test_search_ranks_relevant_document_first() -> None:
+    index = BM25Index()
+    assert index.add_documents(DOCUMENTS) == 3
+    passages = index.search("Where did the Soyuz capsule land?", top_k=2)
+    assert passages[0].doc_id == document_id(DOCUMENTS[0])
+    assert passages[0].score > (passages[1].score if len(passages) > 1 else 0)
+    assert index.search("Which founder of NVIDIA worked at Sun?", top_k=1)[0].doc_id == document_id(DOCUMENTS[1])
+    assert index.search("unrelated", top_k=3) == []
+
+
+def test_incremental_updates() -> None:
+    index = BM25Index(chunk_words=8, chunk_overlap=2)
+    index.add_documents(DOCUMENTS[1:])
+    assert index.add_documents(DOCUMENTS) == 1
+    n_chunks = index.n_chunks
+    doc_id = document_id(DOCUMENTS[0])
+    assert not index.add_document(doc_id, DOCUMENTS[0])
+    assert index.n_chunks == n_chunks
+    assert index.add_document(doc_id, "A completely different text about kangaroos.")
+    assert index.search("Soyuz", top_k=3) == []
+    assert index.search("kangaroos", top_k=1)[0].doc_id == doc_id
+    index.remove_document(doc_id)
+    assert len(index) == 2
+    assert index.search("kangaroos") == []
+
+
+def test_save_and_load(tmp_path: Path) -> None:
+    index = BM25Index(chunk_words=8, chunk_overlap=2)
+    index.add_documents(DOCUMENTS)
+    path = tmp_path / 'index.json'
+    index.save(path)
+    loaded = BM25Index.load(path)
+    assert loaded.chunk_words == 8 and loaded.n_chunks == index.n_chunks
+    query = "deep learning data centers"
+    assert [(p.doc_id, p.text, p.score) for p in loaded.search(query)] == [
+        (p.doc_id, p.text, p.score) for p in index.search(query)
+    ]
+    assert not loaded.add_document(document_id(DOCUMENTS[2]), DOCUMENTS[2])
+    assert loaded.add_documents(DOCUMENTS[:2], remove_missing=True) == 0
+    assert len(loaded) == 2 and loaded.search(query) == []
+
+
+def natural_query_response(query: str, context: str, top_n: int = 1, future: bool = False) -> Future:
+    score = 0.9 if 'Soyuz' in context else 0.1
+    response = rnlp.NaturalQueryResponse(results=[rnlp.NaturalQueryResult(answer=context.split()[0], score=score)])
+    result = Future()
+    result.set_result(response)
+    return result if future else response
+
+
+def test_natural_query_with_index_merges_answers_by_score() -> None:
+    index = BM25Index()
+    index.add_documents(DOCUMENTS)
+    nlp_service = Mock()
+    nlp_service.natural_query = Mock(side_effect=natural_query_response)
+    response = natural_query_with_index(nlp_service, index, "Soyuz capsule Kazakhstan", top_k=3)
+    contexts = [call.args[1] for call in nlp_service.natural_query.call_args_list]
+    assert DOCUMENTS[0] in contexts and DOCUMENTS[2] not in contexts
+    assert all(call.kwargs['future'] for call in nlp_service.natural_query.call_args_list)
+    assert len(response.results) == 1
+    assert response.results[0].answer == 'The'
+    assert response.results[0].score == pytest.approx(0.9)
+
+
+def test_natural_query_with_index_deduplicates_answers() -> None:
+    index = BM25Index(chunk_words=8, chunk_overlap=4)
+    index.add_documents(DOCUMENTS)
+    nlp_service = Mock()
+    nlp_service.natural_query = Mock(
+        side_effect=lambda query, context, top_n=1, future=False: natural_query_response(
+            query, 'Soyuz ' + context, top_n, future
+        )
+    )
+    response = natural_query_with_index(nlp_service, index, "Soyuz capsule Kazakhstan steppes", top_k=3, top_n=2)
+    assert nlp_service.natural_query.call_count > 1
+    assert [result.answer for result in response.results] == ['Soyuz']
@@ -0,0 +1,146 @@
+# SPDX-FileCopyrightText: Copyright (c) 2022 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import threading
+from typing import Any, Dict, Generator, Iterable, List
+
+import pytest
+
+import riva.client.proto.riva_asr_pb2 as rasr
+import riva.client.proto.riva_nmt_pb2 as riva_nmt
+import riva.client.proto.riva_tts_pb2 as rtts
+from riva.client import MultiTargetSpeechToText, SpeechTranslationPipeline, StreamingRecognitionConfig, VoiceProfile
+
+
+class FakeASR:
+    """Returns a final result after every chunk which ends with a period."""
+    def streaming_response_generator(
+        self, audio_chunks: Iterable[bytes], streaming_config: Any
+    ) -> Generator[rasr.StreamingRecognizeResponse, None, None]:
+        words = []
+        for chunk in audio_chunks:
+            words.append(chunk.decode())
+            alternatives = [rasr.SpeechRecognitionAlternative(transcript=' '.join(words))]
+            yield rasr.StreamingRecognizeResponse(results=[rasr.StreamingRecognitionResult(alternatives=alternatives)])
+            if chunk.endswith(b'.'):
+                result = rasr.StreamingRecognitionResult(is_final=True, alternatives=alternatives)
+                yield rasr.StreamingRecognizeResponse(results=[result])
+                words = []
+
+
+class FakeNMT:
+    def __init__(self, fail_on: str = '') -> None:
+        self.fail_on = fail_on
+        self.texts: List[str] = []
+
+    def translate(self, texts, model, source_language, target_language, dnt_phrases_dict=None):
+        if texts[0] == self.fail_on:
+            raise RuntimeError('translation failed')
+        self.texts.extend(texts)
+        return riva_nmt.TranslateTextResponse(
+            translations=[riva_nmt.Translation(text=f'{target_language}:{text}') for text in texts]
+        )
+
+
+class FakeTTS:
+    def synthesize_online_with_profile(self, text: str, profile: VoiceProfile):
+        for word in text.split():
+            yield rtts.SynthesizeSpeechResponse(audio=word.encode())
+
+
+def make_pipeline(nmt: FakeNMT, tts: FakeTTS, **kwargs) -> SpeechTranslationPipeline:
+    return SpeechTranslationPipeline(
+        FakeASR(), nmt, tts, StreamingRecognitionConfig(), 'model', 'en', 'de', VoiceProfile(), **kwargs
+    )
+
+
+def test_pipeline_yields_audio_of_utterances_in_order() -> None:
+    pipeline = make_pipeline(FakeNMT(), FakeTTS(), max_queue_size=1)
+    events = list(pipeline.generate([b'hello', b'world.', b'good', b'bye.']))
+    assert [(e.index, e.transcript, e.translation, e.audio) for e in events] == [
+        (0, 'hello world.', 'de:hello world.', b'de:hello'),
+        (0, 'hello world.', 'de:hello world.', b'world.'),
+        (1, 'good bye.', 'de:good bye.', b'de:good'),
+        (1, 'good bye.', 'de:good bye.', b'bye.'),
+    ]
+    assert pipeline.stats['asr'].n_items == pipeline.stats['nmt'].n_items == 2
+    assert pipeline.stats['tts_first_audio'].n_items == pipeline.stats['end_to_end'].n_items == 2
+
+
+def test_pipeline_raises_stage_errors() -> None:
+    pipeline = make_pipeline(FakeNMT(fail_on='good bye.'), FakeTTS())
+    events = pipeline.generate([b'hello.', b'good', b'bye.', b'more.'])
+    with pytest.raises(RuntimeError, match='translation failed'):
+        list(events)
+
+
+def test_closing_generator_stops_stages() -> None:
+    nmt = FakeNMT()
+    pipeline = make_pipeline(nmt, FakeTTS(), max_queue_size=1)
+    events = pipeline.generate(f'{i}.'.encode() for i in range(1000))
+    next(events)
+    events.close()
+    assert len(nmt.texts) < 1000
+    with pytest.raises(ValueError):
+        make_pipeline(nmt, FakeTTS(), max_queue_size=0)
+
+
+class FakeS2T:
+    """Returns a final translation after every chunk ending with a period. A French stream ends at a chunk `stop`."""
+    def __init__(self) -> None:
+        self.chunks: Dict[str, List[bytes]] = {}
+        self.lock = threading.Lock()
+
+    def streaming_s2t_response_generator(self, audio_chunks, streaming_config):
+        language = streaming_config.translation_config.target_language_code
+        for chunk in audio_chunks:
+            with self.lock:
+                self.chunks.setdefault(language, []).append(chunk)
+            if chunk == b'stop' and language == 'fr':
+                return
+            if chunk.endswith(b'.'):
+                alternatives = [rasr.SpeechRecognitionAlternative(transcript=f'{language}:{chunk.decode()}')]
+                yield riva_nmt.StreamingTranslateSpeechToTextResponse(
+                    results=[rasr.StreamingRecognitionResult(is_final=True, alternatives=alternatives)]
+                )
+
+
+def s2t_config() -> riva_nmt.StreamingTranslateSpeechToTextConfig:
+    return riva_nmt.StreamingTranslateSpeechToTextConfig(
+        translation_config=riva_nmt.TranslationConfig(source_language_code='en-US')
+    )
+
+
+def test_multi_target_shares_chunks_and_merges_responses() -> None:
+    client = FakeS2T()
+    translator = MultiTargetSpeechToText(client, s2t_config(), ['de', 'fr', 'es'], max_buffered_chunks=2)
+    chunks = [b'one.', b'two', b'three.']
+    results = [
+        (language, response.results[0].alternatives[0].transcript)
+        for language, response in translator.generate(iter(chunks))
+    ]
+    for language in ['de', 'fr', 'es']:
+        assert [t for l, t in results if l == language] == [f'{language}:one.', f'{language}:three.']
+        assert all(a is b for a, b in zip(client.chunks[language], chunks))
+        assert translator.stats[language].n_items == 2
+    with pytest.raises(ValueError):
+        MultiTargetSpeechToText(client, s2t_config(), ['de', 'de'])
+
+
+def test_finished_stream_does_not_block_others() -> None:
+    client = FakeS2T()
+    translator = MultiTargetSpeechToText(client, s2t_config(), ['de', 'fr'], max_buffered_chunks=1)
+    chunks = [b'stop'] + [b'x'] * 20 + [b'end.']
+    results = [language for language, _ in translator.generate(chunks)]
+    assert results == ['de']
+    assert len(client.chunks['de']) == len(chunks)
+
+
+def test_audio_errors_are_raised() -> None:
+    def chunks():
+        yield b'one.'
+        raise IOError('read failed')
+
+    translator = MultiTargetSpeechToText(FakeS2T(), s2t_config(), ['de'])
+    with pytest.raises(IOError, match='read failed'):
+        list(translator.generate(chunks()))
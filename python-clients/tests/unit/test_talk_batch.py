@@ -0,0 +1,94 @@
+# SPDX-FileCopyrightText: Copyright (c) 2022 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+
+import json
+import sys
+from concurrent.futures import Future
+from pathlib import Path
+from typing import List
+
+import pytest
+
+import riva.client
+import riva.client.proto.riva_tts_pb2 as rtts
+from scripts.tts.talk_batch import main, read_items, read_manifest
+
+
+def test_read_items(tmp_path: Path) -> None:
+    path = tmp_path / 'input.txt'
+    path.write_text("Hello.\n\n  World.  \n", encoding='utf-8')
+    assert list(read_items(path, False, 'voice', 'en-US')) == [
+        ('1', 'Hello.', 'voice', 'en-US'), ('3', 'World.', 'voice', 'en-US')
+    ]
+    path = tmp_path / 'input.jsonl'
+    path.write_text(
+        '{"id": "a", "text": "Hello.", "voice": "other"}\n{"text": "Hallo.", "language_code": "de-DE"}\n',
+        encoding='utf-8',
+    )
+    assert list(read_items(path, True, None, 'en-US')) == [
+        ('a', 'Hello.', 'other', 'en-US'), ('2', 'Hallo.', None, 'de-DE')
+    ]
+
+
+@pytest.mark.parametrize(
+    'lines',
+    [
+        ['{"id": "../a", "text": "x"}'],
+        ['{"id": "..", "text": "x"}'],
+        ['{"id": "", "text": "x"}'],
+        ['{"id": "a", "text": "x"}', '{"id": "a", "text": "y"}'],
+        ['{"id": "a"}'],
+        ['["x"]'],
+        ['{"text": "x"'],
+    ],
+)
+def test_read_items_rejects_invalid_lines(tmp_path: Path, lines: List[str]) -> None:
+    path = tmp_path / 'input.jsonl'
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    with pytest.raises(ValueError):
+        list(read_items(path, True, None, 'en-US'))
+
+
+def test_read_manifest(tmp_path: Path) -> None:
+    path = tmp_path / 'manifest.jsonl'
+    assert read_manifest(path) == set()
+    path.write_text(
+        '{"id": "1", "status": "ok"}\n{"id": "2", "status": "failed", "error": "x"}\n{"id": "3", "sta',
+        encoding='utf-8',
+    )
+    assert read_manifest(path) == {'1'}
+
+
+class FakeSynthesisService:
+    texts: List[str] = []
+
+    def __init__(self, auth: riva.client.Auth) -> None:
+        pass
+
+    def synthesize_with_profile(self, text: str, profile: riva.client.VoiceProfile, future: bool = False) -> Future:
+        self.texts.append(text)
+        if text == 'Fail.':
+            raise RuntimeError("invalid request")
+        result = Future()
+        result.set_result(rtts.SynthesizeSpeechResponse(audio=b'\x00\x00' * 100))
+        return result
+
+
+def test_failed_lines_are_rendered_on_resume(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(riva.client, 'SpeechSynthesisService', FakeSynthesisService)
+    monkeypatch.setattr(FakeSynthesisService, 'texts', [])
+    input_file = tmp_path / 'input.txt'
+    output_dir = tmp_path / 'out'
+    argv = ['talk_batch.py', '--input-file', str(input_file), '--output-dir', str(output_dir), '--max-in-flight', '1']
+    monkeypatch.setattr(sys, 'argv', argv + ['--max-pending-writes', '1'])
+    input_file.write_text("One.\nFail.\nThree.\n", encoding='utf-8')
+    with pytest.raises(SystemExit):
+        main()
+    assert FakeSynthesisService.texts == ['One.', 'Fail.', 'Three.']
+    records = [json.loads(line) for line in (output_dir / 'manifest.jsonl').read_text(encoding='utf-8').splitlines()]
+    assert sorted((record['id'], record['status']) for record in records) == [('1', 'ok'), ('2', 'failed'), ('3', 'ok')]
+
+    input_file.write_text("One.\nTwo.\nThree.\n", encoding='utf-8')
+    main()
+    assert FakeSynthesisService.texts == ['One.', 'Fail.', 'Three.', 'Two.']
+    assert sorted(path.name for path in output_dir.glob('*.wav')) == ['1.wav', '2.wav', '3.wav']
@@ -1,15 +1,24 @@
 # SPDX-FileCopyrightText: Copyright (c) 2022 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
 # SPDX-License-Identifier: MIT
 
+import warnings
+import wave
 from math import ceil
 from typing import Any, Generator
 from unittest.mock import patch, Mock
 
+import pytest
+
 import riva.client.proto.riva_tts_pb2 as rtts
 from riva.client import AudioEncoding
-from riva.client.tts import SpeechSynthesisService
+from riva.client.tts import (
+    CachingSpeechSynthesisService,
+    SpeechSynthesisService,
+    VoiceProfile,
+    split_text_for_synthesis,
+)
 
-from .helpers import set_auth_mock
+from .helpers import ReverseOrderFutureMock, set_auth_mock
 
 
 TEXT = 'foo'
@@ -115,3 +124,170 @@ class TestSpeechSynthesisService:
         assert count == ceil(len(AUDIO_BYTES_1_SECOND) / STREAMING_CHUNK_SIZE)
 
 
+PARALLEL_TEXT = "Hello there, my friend, how are you doing today? I am fine. Thanks for asking!"
+
+
+def test_split_text_for_synthesis() -> None:
+    assert split_text_for_synthesis(PARALLEL_TEXT, max_chars=30, first_chunk_max_chars=15) == [
+        'Hello there,', 'my friend,', 'how are you doing today?', 'I am fine.', 'Thanks for asking!'
+    ]
+    assert split_text_for_synthesis(PARALLEL_TEXT, first_chunk_max_chars=None) == [
+        'Hello there, my friend, how are you doing today?', 'I am fine.', 'Thanks for asking!'
+    ]
+    assert split_text_for_synthesis('  ') == []
+
+
+def test_split_text_for_synthesis_cjk() -> None:
+    text = '你好，我的朋友。今天怎么样？我很好！' + '谢' * 25 + '。'
+    assert split_text_for_synthesis(text, max_chars=10, first_chunk_max_chars=4) == [
+        '你好，', '我的朋友。', '今天怎么样？', '我很好！', '谢' * 10, '谢' * 10, '谢' * 5 + '。'
+    ]
+    assert split_text_for_synthesis(text, max_chars=20, first_chunk_max_chars=None)[:2] == [
+        '你好，我的朋友。', '今天怎么样？'
+    ]
+
+
+@patch("riva.client.proto.riva_tts_pb2_grpc.RivaSpeechSynthesisStub.__init__", riva_tts_stub_init_patch)
+def test_synthesize_parallel_yields_audio_in_order() -> None:
+    auth, _ = set_auth_mock()
+    service = SpeechSynthesisService(auth)
+    chunks = split_text_for_synthesis(PARALLEL_TEXT, 30, 15)
+    synthesize_mock = ReverseOrderFutureMock(
+        lambda request: rtts.SynthesizeSpeechResponse(audio=request.text.encode()), n_pending=2, n_requests=len(chunks)
+    )
+    service.stub.Synthesize = Mock()
+    service.stub.Synthesize.future = synthesize_mock
+    responses = list(
+        service.synthesize_parallel(
+            PARALLEL_TEXT, VOICE_NAME, LANGUAGE_CODE, max_in_flight=2, max_chars=30, first_chunk_max_chars=15
+        )
+    )
+    assert [r.audio for r in responses] == [c.encode() for c in chunks]
+    assert [r.text for r in synthesize_mock.requests] == chunks
+    assert all(r.voice_name == VOICE_NAME for r in synthesize_mock.requests)
+    assert synthesize_mock.max_pending == 2
+
+
+@patch("riva.client.proto.riva_tts_pb2_grpc.RivaSpeechSynthesisStub.__init__", riva_tts_stub_init_patch)
+class TestCachingSpeechSynthesisService:
+    def test_synthesize_hit(self, tmp_path) -> None:
+        auth, _ = set_auth_mock()
+        SYNTHESIZE_MOCK.reset_mock()
+        service = CachingSpeechSynthesisService(auth, disk_cache_dir=tmp_path)
+        first = service.synthesize(TEXT, VOICE_NAME, LANGUAGE_CODE, ENCODING, SAMPLE_RATE_HZ)
+        second = service.synthesize(TEXT, VOICE_NAME, LANGUAGE_CODE, ENCODING, SAMPLE_RATE_HZ)
+        assert first == second and isinstance(second, rtts.SynthesizeSpeechResponse)
+        service.synthesize(TEXT, VOICE_NAME, LANGUAGE_CODE, ENCODING, SAMPLE_RATE_HZ, custom_dictionary={'a': 'b'})
+        assert SYNTHESIZE_MOCK.call_count == 2
+        future = service.synthesize(TEXT, VOICE_NAME, LANGUAGE_CODE, ENCODING, SAMPLE_RATE_HZ, future=True)
+        assert future.result() == first
+        assert service.stats.memory_hits == 2 and service.stats.misses == 2
+
+        restarted = CachingSpeechSynthesisService(auth, disk_cache_dir=tmp_path)
+        assert restarted.synthesize(TEXT, VOICE_NAME, LANGUAGE_CODE, ENCODING, SAMPLE_RATE_HZ) == first
+        assert restarted.synthesize(TEXT, VOICE_NAME, LANGUAGE_CODE, ENCODING, SAMPLE_RATE_HZ) == first
+        assert restarted.stats.disk_hits == 2 and len(restarted.cache.memory) == 0
+        assert SYNTHESIZE_MOCK.call_count == 2
+        restarted.close()
+
+    def test_synthesize_online_hit(self) -> None:
+        auth, _ = set_auth_mock()
+        SYNTHESIZE_ONLINE_MOCK.reset_mock()
+        SYNTHESIZE_ONLINE_MOCK.side_effect = lambda *args, **kwargs: response_generator()
+        try:
+            service = CachingSpeechSynthesisService(auth)
+            first = list(service.synthesize_online(TEXT, VOICE_NAME, LANGUAGE_CODE, ENCODING, SAMPLE_RATE_HZ))
+            second = list(service.synthesize_online(TEXT, VOICE_NAME, LANGUAGE_CODE, ENCODING, SAMPLE_RATE_HZ))
+        finally:
+            SYNTHESIZE_ONLINE_MOCK.side_effect = None
+        assert len(first) > 1 and first == second
+        assert SYNTHESIZE_ONLINE_MOCK.call_count == 1
+        assert service.stats.hit_rate == 0.5
+
+    def test_profile_requests_do_not_hash_prompt(self, tmp_path) -> None:
+        auth, _ = set_auth_mock()
+        SYNTHESIZE_MOCK.reset_mock()
+        prompt = tmp_path / 'prompt.wav'
+        write_wav_prompt(prompt, 4)
+        service = CachingSpeechSynthesisService(auth)
+        first = service.synthesize(TEXT, VOICE_NAME, zero_shot_audio_prompt_file=prompt)
+        profile = VoiceProfile(VOICE_NAME, zero_shot_audio_prompt_file=prompt)
+        with patch('riva.client.tts.request_settings_digest') as digest_mock:
+            assert service.synthesize_with_profile(TEXT, profile) == first
+        digest_mock.assert_not_called()
+        assert SYNTHESIZE_MOCK.call_count == 1
+        write_wav_prompt(prompt, 5)
+        service.synthesize_with_profile(TEXT, VoiceProfile(VOICE_NAME, zero_shot_audio_prompt_file=prompt))
+        assert SYNTHESIZE_MOCK.call_count == 2
+
+
+def write_wav_prompt(path, seconds: float) -> None:
+    with wave.open(str(path), 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(16000)
+        f.writeframes(b'\x00\x00' * int(16000 * seconds))
+
+
+class TestVoiceProfile:
+    def test_request_template(self, tmp_path) -> None:
+        prompt = tmp_path / 'prompt.wav'
+        write_wav_prompt(prompt, 4)
+        profile = VoiceProfile(
+            VOICE_NAME,
+            zero_shot_audio_prompt_file=str(prompt),
+            zero_shot_transcript='hello',
+            custom_dictionary={'NVIDIA': 'ɛn.ˈvɪ.di.ə'},
+        )
+        prompt.unlink()
+        req = profile.request(TEXT)
+        assert req.text == TEXT and req.voice_name == VOICE_NAME
+        assert req.zero_shot_data.transcript == 'hello' and len(req.zero_shot_data.audio_prompt) > 0
+        assert req.custom_dictionary == 'NVIDIA  ɛn.ˈvɪ.di.ə'
+        assert profile.request('other').text == 'other' and profile.template.text == ''
+
+    def test_validation(self, tmp_path) -> None:
+        with pytest.raises(ValueError):
+            VoiceProfile(custom_dictionary={'a,b': 'c'})
+        with pytest.raises(ValueError):
+            VoiceProfile(sample_rate_hz=0)
+        empty = tmp_path / 'empty.wav'
+        empty.write_bytes(b'')
+        with pytest.raises(ValueError):
+            VoiceProfile(zero_shot_audio_prompt_file=empty)
+        long_prompt = tmp_path / 'long.wav'
+        write_wav_prompt(long_prompt, 12)
+        with pytest.warns(UserWarning):
+            VoiceProfile(zero_shot_audio_prompt_file=long_prompt)
+
+    @patch("riva.client.proto.riva_tts_pb2_grpc.RivaSpeechSynthesisStub.__init__", riva_tts_stub_init_patch)
+    def test_synthesize_online_sends_zero_shot_transcript(self, tmp_path) -> None:
+        auth, _ = set_auth_mock()
+        SYNTHESIZE_ONLINE_MOCK.reset_mock()
+        prompt = tmp_path / 'prompt.wav'
+        write_wav_prompt(prompt, 4)
+        service = SpeechSynthesisService(auth)
+        service.synthesize_online(TEXT, zero_shot_audio_prompt_file=prompt, zero_shot_transcript='hello')
+        assert SYNTHESIZE_ONLINE_MOCK.call_args.args[0].zero_shot_data.transcript == 'hello'
+        profile = VoiceProfile(VOICE_NAME)
+        service.synthesize_online_with_profile(TEXT, profile)
+        assert SYNTHESIZE_ONLINE_MOCK.call_args.args[0] == profile.request(TEXT)
+
+    @patch("riva.client.proto.riva_tts_pb2_grpc.RivaSpeechSynthesisStub.__init__", riva_tts_stub_init_patch)
+    def test_synthesize_does_not_validate(self, tmp_path) -> None:
+        auth, _ = set_auth_mock()
+        SYNTHESIZE_MOCK.reset_mock()
+        prompt = tmp_path / 'prompt.wav'
+        write_wav_prompt(prompt, 12)
+        service = SpeechSynthesisService(auth)
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            service.synthesize(
+                TEXT,
+                sample_rate_hz=0,
+                zero_shot_audio_prompt_file=prompt,
+                zero_shot_quality=50,
+                custom_dictionary={'a,b': 'c'},
+            )
+        req = SYNTHESIZE_MOCK.call_args.args[0]
+        assert req.sample_rate_hz == 0 and req.zero_shot_data.quality == 50 and req.custom_dictionary == 'a,b  c'